@@ -1,6 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import Utilisateur
+from django import forms
+from .models import Compte, Transaction, Utilisateur
+from .services.pagination import EstimatedCountPaginator
 
 @admin.register(Utilisateur)
 class UtilisateurAdmin(BaseUserAdmin):
@@ -17,3 +20,75 @@ class UtilisateurAdmin(BaseUserAdmin):
             'fields': ('phone_number', 'password1', 'password2', 'is_active', 'is_staff')}
         ),
     )
+
+
+class TransactionActionForm(ActionForm):
+    # Cible de l'action « recatégoriser »
+    categorie = forms.ChoiceField(
+        choices=[('', '---------')] + Transaction.CATEGORIES_SAISIE,
+        required=False,
+        label="Catégorie"
+    )
+
+
+# 🔹 Listes sur des millions de lignes : pas de COUNT(*) complet (total estimé, pas de
+# « tout afficher »), utilisateurs et portefeuilles chargés par jointure, recherche exacte
+# par numéro (index unique) plutôt qu'un LIKE sur toute la table
+@admin.register(Transaction)
+class TransactionAdmin(admin.ModelAdmin):
+    list_display = ('date', 'utilisateur', 'type_transaction', 'montant', 'compte', 'categorie',
+                    'portefeuille', 'status')
+    list_select_related = ('utilisateur', 'portefeuille')
+    list_filter = ('type_transaction', 'status', 'compte', 'categorie')
+    date_hierarchy = 'date'
+    search_fields = ('=utilisateur__phone_number',)
+    search_help_text = "Numéro de téléphone exact de l'utilisateur"
+    raw_id_fields = ('utilisateur', 'portefeuille')
+    readonly_fields = ('created', 'modified')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    list_max_show_all = 0
+    action_form = TransactionActionForm
+    actions = ('desactiver', 'recategoriser')
+
+    def get_actions(self, request):
+        # La suppression en masse (QuerySet.delete) contournerait Transaction.delete() et laisserait
+        # les soldes faux : la désactivation la remplace
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description="Désactiver les transactions sélectionnées", permissions=['change'])
+    def desactiver(self, request, queryset):
+        # Un seul UPDATE, soldes, cumuls et grand livre corrigés (TransactionManager.desactiver)
+        nombre = Transaction.objects.desactiver(queryset)
+        self.message_user(request, f"{nombre} transaction(s) désactivée(s).", messages.SUCCESS)
+
+    @admin.action(description="Recatégoriser les transactions sélectionnées", permissions=['change'])
+    def recategoriser(self, request, queryset):
+        categorie = request.POST.get('categorie')
+        if not categorie:
+            self.message_user(request, "Choisissez la nouvelle catégorie.", messages.WARNING)
+            return
+        try:
+            nombre = Transaction.objects.recategoriser(queryset, categorie)
+        except ValueError as e:
+            self.message_user(request, str(e), messages.ERROR)
+            return
+        self.message_user(request, f"{nombre} transaction(s) recatégorisée(s).", messages.SUCCESS)
+
+
+@admin.register(Compte)
+class CompteAdmin(admin.ModelAdmin):
+    list_display = ('label', 'type_compte', 'phone', 'user', 'balance', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('type_compte',)
+    search_fields = ('=phone', '=user__phone_number')
+    search_help_text = "Numéro exact du portefeuille ou de l'utilisateur"
+    raw_id_fields = ('user',)
+    # Maintenu par des UPDATE atomiques (Compte.objects.ajuster_solde), jamais saisi
+    readonly_fields = ('balance', 'created_at', 'updated_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
@@ -0,0 +1,17 @@
+from django.contrib.auth.backends import ModelBackend
+
+from finance.services import cache as cache_finance
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend dont get_user() passe par le cache : AuthenticationMiddleware ne relit
+    plus l'utilisateur en base à chaque requête. L'entrée est supprimée quand
+    l'utilisateur est enregistré ou que son solde change (voir finance/signals.py).
+    """
+
+    def get_user(self, user_id):
+        return cache_finance.utilisateur(user_id, super().get_user)
+
+    async def aget_user(self, user_id):
+        return await cache_finance.autilisateur(user_id, super().aget_user)
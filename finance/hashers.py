@@ -0,0 +1,37 @@
+"""
+Hachage des mots de passe à coût réglable depuis les settings.
+
+Les classes gardent le nom d'algorithme de Django : les hachages existants restent
+valides, et Django re-hache automatiquement au prochain login réussi quand
+l'algorithme préféré (premier de PASSWORD_HASHERS) ou son coût change.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, 'FINANCE_PBKDF2_ITERATIONS', None) or super().iterations
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return getattr(settings, 'FINANCE_SCRYPT_WORK_FACTOR', None) or super().work_factor
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Nécessite le paquet argon2-cffi (pip install "django[argon2]")."""
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'FINANCE_ARGON2_TIME_COST', None) or super().time_cost
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'FINANCE_ARGON2_MEMORY_COST', None) or super().memory_cost
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'FINANCE_ARGON2_PARALLELISM', None) or super().parallelism
@@ -0,0 +1,50 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from finance.models import Transaction
+from finance.services.archivage import TAILLE_LOT, archiver, limite_de_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les transactions plus anciennes que la durée de rétention vers des fichiers "
+        "JSON Lines gzip en lecture seule ; soldes, cumuls mensuels et grand livre sont conservés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-months', type=int, default=settings.FINANCE_ARCHIVE_RETENTION_MONTHS,
+                            help="Mois conservés en base, mois en cours compris.")
+        parser.add_argument('--before', help="Limite explicite (AAAA-MM-JJ), ramenée au premier jour du mois.")
+        parser.add_argument('--output', default=str(settings.FINANCE_ARCHIVE_DIR),
+                            help="Dossier des fichiers d'archive.")
+        parser.add_argument('--batch-size', type=int, default=TAILLE_LOT)
+        parser.add_argument('--dry-run', action='store_true', help="Compte seulement les transactions concernées.")
+
+    def handle(self, *args, **options):
+        if options['before']:
+            jour = parse_date(options['before'])
+            if jour is None:
+                raise CommandError(f"--before : date invalide {options['before']!r}")
+            # 🔹 Limite au début d'un mois : les mois archivés le sont en entier (cumuls, partitions)
+            jusqu_a = timezone.make_aware(datetime.combine(jour.replace(day=1), time.min))
+        else:
+            if options['retention_months'] < 1:
+                raise CommandError("--retention-months doit être positif.")
+            jusqu_a = limite_de_retention(options['retention_months'] - 1)
+
+        if options['dry_run']:
+            nombre = Transaction.objects.filter(date__lt=jusqu_a).count()
+            self.stdout.write(f"{nombre} transaction(s) antérieure(s) au {jusqu_a:%Y-%m-%d} à archiver.")
+            return
+
+        archive = archiver(jusqu_a, options['output'], taille_lot=options['batch_size'])
+        if archive is None:
+            self.stdout.write(f"Aucune transaction antérieure au {jusqu_a:%Y-%m-%d}.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{archive.nombre} transaction(s) archivée(s) dans {archive.fichier} (sha256 {archive.sha256})."
+        ))
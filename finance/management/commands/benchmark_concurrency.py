@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.management.commands.benchmark_views import percentile
+from finance.models import Utilisateur
+
+
+def ouvrir_session(user):
+    """Crée une session authentifiée pour `user` et retourne sa clé (cookie sessionid)."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+async def requete(url, cookie, lecture_lente):
+    """Un GET HTTP/1.1 sur une connexion neuve ; retourne (statut, durée en secondes)."""
+    parties = urlsplit(url)
+    debut = time.perf_counter()
+    lecteur, ecrivain = await asyncio.open_connection(parties.hostname, parties.port or 80)
+    chemin = parties.path + (f"?{parties.query}" if parties.query else '')
+    ecrivain.write((
+        f"GET {chemin} HTTP/1.1\r\nHost: {parties.netloc}\r\n"
+        f"Cookie: {settings.SESSION_COOKIE_NAME}={cookie}\r\nConnection: close\r\n\r\n"
+    ).encode())
+    await ecrivain.drain()
+    ligne = await lecteur.readline()
+    # Client mobile lent : la réponse est lue par petits morceaux espacés
+    while await lecteur.read(4096 if lecture_lente else -1):
+        if lecture_lente:
+            await asyncio.sleep(lecture_lente)
+    ecrivain.close()
+    statut = int(ligne.split()[1]) if ligne else 0
+    return statut, time.perf_counter() - debut
+
+
+async def charger(url, cookie, nombre, concurrence, lecture_lente):
+    semaphore = asyncio.Semaphore(concurrence)
+    durees, erreurs = [], 0
+
+    async def une():
+        nonlocal erreurs
+        async with semaphore:
+            try:
+                statut, duree = await requete(url, cookie, lecture_lente)
+            except OSError:
+                erreurs += 1
+                return
+            if statut != 200:
+                erreurs += 1
+            else:
+                durees.append(duree * 1000)
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(une() for _ in range(nombre)))
+    total = time.perf_counter() - debut
+    return {
+        'requests': nombre,
+        'errors': erreurs,
+        'rps': round(len(durees) / total, 1),
+        'p50_ms': round(percentile(durees, 50), 1) if durees else None,
+        'p99_ms': round(percentile(durees, 99), 1) if durees else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit de serveurs déjà lancés (WSGI et ASGI) sous forte concurrence. Exemple : "
+        "gunicorn mess_finance.wsgi -w 1 --threads 8 -b :8000 & "
+        "uvicorn mess_finance.asgi:application --workers 1 --port 8001 & "
+        "manage.py benchmark_concurrency --user 07... "
+        "--target wsgi=http://127.0.0.1:8000/api/resume/ --target asgi=http://127.0.0.1:8001/async/api/resume/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='phone_number', required=True,
+                            help="Utilisateur dont la session est utilisée pour les requêtes.")
+        parser.add_argument('--target', action='append', required=True,
+                            help="nom=url, répétable (ex. wsgi=http://127.0.0.1:8000/).")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--slow-read', type=float, default=0.0,
+                            help="Pause (secondes) entre deux lectures de 4 Ko, pour simuler des clients lents.")
+        parser.add_argument('--json', action='store_true', help="Affiche les résultats en JSON.")
+
+    def handle(self, *args, phone_number, target, requests, concurrency, slow_read, **options):
+        try:
+            user = Utilisateur.objects.get(phone_number=phone_number)
+        except Utilisateur.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {phone_number}")
+        cookie = ouvrir_session(user)
+
+        cibles = []
+        for valeur in target:
+            nom, sep, url = valeur.partition('=')
+            if not sep or not url.startswith('http://'):
+                raise CommandError(f"Cible invalide : {valeur} (attendu nom=http://hote:port/chemin)")
+            cibles.append((nom, url))
+
+        resultats = {
+            nom: asyncio.run(charger(url, cookie, requests, concurrency, slow_read))
+            for nom, url in cibles
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultats, indent=2))
+            return
+        self.stdout.write(f"{'cible':<12} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'erreurs':>8}")
+        for nom, r in resultats.items():
+            self.stdout.write(f"{nom:<12} {r['rps']:>8} {r['p50_ms'] or '-':>9} {r['p99_ms'] or '-':>9} {r['errors']:>8}")
@@ -0,0 +1,106 @@
+import json
+import statistics
+import time
+from copy import deepcopy
+from importlib.util import find_spec
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from finance.management.commands.benchmark_views import percentile
+
+MODES = ('sans', 'persistant', 'pool')
+
+
+def configuration(settings_dict, mode, max_age):
+    """Copie des réglages de la base pour un mode : connexion par requête, persistante ou poolée."""
+    reglages = deepcopy(settings_dict)
+    reglages['OPTIONS'] = {k: v for k, v in reglages.get('OPTIONS', {}).items() if k != 'pool'}
+    reglages['CONN_MAX_AGE'] = max_age if mode == 'persistant' else 0
+    reglages['CONN_HEALTH_CHECKS'] = mode == 'persistant'
+    if mode == 'pool':
+        reglages['OPTIONS']['pool'] = deepcopy(settings_dict.get('OPTIONS', {}).get('pool')) or {'min_size': 1}
+    return reglages
+
+
+def simuler_requetes(settings_dict, mode, nombre, max_age=60):
+    """
+    Rejoue `nombre` cycles requête/réponse sur une connexion dédiée : comme les signaux
+    request_started / request_finished, on appelle close_if_unusable_or_obsolete() avant
+    et après une requête SQL triviale. Retourne latences et connexions serveur ouvertes.
+    """
+    reglages = configuration(settings_dict, mode, max_age)
+    # Alias distinct : les pools du backend PostgreSQL sont indexés par alias
+    wrapper = load_backend(reglages['ENGINE']).DatabaseWrapper(reglages, f'benchmark_{mode}')
+    postgresql = wrapper.vendor == 'postgresql'
+    durees, serveurs = [], set()
+    try:
+        for _ in range(nombre):
+            debut = time.perf_counter()
+            wrapper.close_if_unusable_or_obsolete()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()' if postgresql else 'SELECT 1')
+                valeur = cursor.fetchone()[0]
+            wrapper.close_if_unusable_or_obsolete()
+            durees.append((time.perf_counter() - debut) * 1000)
+            if postgresql:
+                serveurs.add(valeur)
+    finally:
+        wrapper.close()
+        if mode == 'pool':
+            wrapper.close_pool()
+    return {
+        'mean_ms': round(statistics.fmean(durees), 3),
+        'p50_ms': round(percentile(durees, 50), 3),
+        'p99_ms': round(percentile(durees, 99), 3),
+        # Nombre de processus serveur distincts (PostgreSQL seulement)
+        'connections': len(serveurs) if postgresql else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût d'ouverture des connexions : une connexion par requête (CONN_MAX_AGE=0), "
+        "connexions persistantes avec health checks, et pool psycopg (PostgreSQL + psycopg[pool])."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--requests', type=int, default=200, help="Cycles requête/réponse par mode.")
+        parser.add_argument('--modes', default=None,
+                            help=f"Modes séparés par des virgules parmi {', '.join(MODES)} (défaut : tous ceux disponibles).")
+        parser.add_argument('--max-age', type=int, default=60, help="CONN_MAX_AGE du mode persistant.")
+        parser.add_argument('--json', action='store_true', help="Sortie JSON brute.")
+
+    def handle(self, *args, **options):
+        settings_dict = connections[options['database']].settings_dict
+        pool_disponible = (
+            settings_dict['ENGINE'] == 'django.db.backends.postgresql' and find_spec('psycopg_pool') is not None
+        )
+        if options['modes']:
+            modes = [m.strip() for m in options['modes'].split(',')]
+            inconnus = set(modes) - set(MODES)
+            if inconnus:
+                raise CommandError(f"Mode(s) inconnu(s) : {', '.join(sorted(inconnus))}")
+            if 'pool' in modes and not pool_disponible:
+                raise CommandError("Le mode pool demande PostgreSQL avec psycopg 3 et psycopg[pool].")
+        else:
+            modes = [m for m in MODES if m != 'pool' or pool_disponible]
+        if options['requests'] < 1:
+            raise CommandError("--requests doit être positif.")
+
+        resultats = {
+            mode: simuler_requetes(settings_dict, mode, options['requests'], options['max_age'])
+            for mode in modes
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultats, indent=2))
+            return
+        for mode, mesure in resultats.items():
+            connexions = '' if mesure['connections'] is None else f"   {mesure['connections']} connexion(s) serveur"
+            self.stdout.write(
+                f"{mode:<11} moyenne {mesure['mean_ms']:>8.3f} ms   p50 {mesure['p50_ms']:>8.3f} ms   "
+                f"p99 {mesure['p99_ms']:>8.3f} ms{connexions}"
+            )
@@ -0,0 +1,100 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from finance.models import Transaction, Utilisateur
+from finance.services.aggregations import resume_utilisateur, totaux_par_compte
+from finance.services.pagination import page_par_curseur
+
+
+class AnnulerMesure(Exception):
+    """Sert à annuler la transaction qui a supprimé les index le temps de la mesure."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare plans d'exécution et latences des requêtes par utilisateur avec et sans "
+        "les index composites de Transaction (à lancer sur une base de benchmark, "
+        "voir seed_transactions). La suppression des index est annulée en fin de mesure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='phone_number',
+                            help="Utilisateur mesuré (par défaut celui qui a le plus de transactions).")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--json', action='store_true', help="Sortie JSON brute.")
+
+    def handle(self, *args, phone_number=None, repeat=20, **options):
+        user = self.choisir_utilisateur(phone_number)
+
+        resultats = {}
+        try:
+            with transaction.atomic():
+                self.supprimer_index()
+                resultats['avant'] = self.mesurer(user, repeat)
+                raise AnnulerMesure
+        except AnnulerMesure:
+            pass
+        resultats['apres'] = self.mesurer(user, repeat)
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultats, indent=2))
+            return
+        for nom in resultats['apres']:
+            avant, apres = resultats['avant'][nom], resultats['apres'][nom]
+            self.stdout.write(self.style.MIGRATE_HEADING(nom))
+            self.stdout.write(f"  avant : {avant['p50_ms']:.2f} ms (p50)\n{self.indenter(avant['plan'])}")
+            self.stdout.write(f"  après : {apres['p50_ms']:.2f} ms (p50)\n{self.indenter(apres['plan'])}")
+
+    def choisir_utilisateur(self, phone_number):
+        users = Utilisateur.objects.all()
+        if phone_number:
+            users = users.filter(phone_number=phone_number)
+        user = users.annotate(nb=Count('transactions')).order_by('-nb').first()
+        if user is None:
+            raise CommandError("Aucun utilisateur : lancez d'abord seed_transactions.")
+        return user
+
+    def supprimer_index(self):
+        """État « avant » : seulement l'index de la clé étrangère, comme dans 0004_transaction."""
+        table = connection.ops.quote_name(Transaction._meta.db_table)
+        with connection.cursor() as cursor:
+            for index in Transaction._meta.indexes:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+            cursor.execute(
+                f"CREATE INDEX {connection.ops.quote_name('transaction_bench_fk_idx')} "
+                f"ON {table} ({connection.ops.quote_name('utilisateur_id')})"
+            )
+
+    def requetes(self, user):
+        actives = Transaction.objects.active().filter(utilisateur=user)
+        _, curseur = page_par_curseur(actives, taille=500)
+        return {
+            'historique_premiere_page': (actives.order_by('-date', '-id')[:26],
+                                         lambda: page_par_curseur(actives)),
+            'historique_page_profonde': (None, lambda: page_par_curseur(actives, curseur)),
+            'resume': (None, lambda: resume_utilisateur(user)),
+            'totaux_par_compte': (None, lambda: totaux_par_compte(user)),
+        }
+
+    def mesurer(self, user, repeat):
+        resultats = {}
+        for nom, (queryset, fonction) in self.requetes(user).items():
+            durees = []
+            for _ in range(repeat):
+                debut = time.perf_counter()
+                fonction()
+                durees.append((time.perf_counter() - debut) * 1000)
+            plan = ''
+            if queryset is not None:
+                analyze = connection.vendor == 'postgresql'
+                plan = queryset.explain(analyze=analyze) if analyze else queryset.explain()
+            resultats[nom] = {'p50_ms': statistics.median(durees), 'max_ms': max(durees), 'plan': plan}
+        return resultats
+
+    def indenter(self, texte):
+        return '\n'.join(f"    {ligne}" for ligne in texte.splitlines())
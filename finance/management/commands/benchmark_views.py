@@ -0,0 +1,143 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from finance.services.generateur import generer_donnees
+
+MOT_DE_PASSE = 'benchmark-mdp'
+
+
+def percentile(valeurs, rang):
+    if len(valeurs) < 2:
+        return valeurs[0]
+    return statistics.quantiles(valeurs, n=100, method='inclusive')[rang - 1]
+
+
+def mesurer_taille(nb_utilisateurs, nb_transactions, repeat, prefixe):
+    """
+    Génère le jeu de données puis chronomètre chaque vue via le client de test.
+    Retourne {vue: {'p50_ms', 'p99_ms', 'queries'}}.
+    """
+    utilisateurs = generer_donnees(nb_utilisateurs, nb_transactions, prefixe=prefixe, graine=0)
+    user = utilisateurs[0]
+    user.set_password(MOT_DE_PASSE)
+    user.save(update_fields=['password'])
+
+    client = Client()
+    client.force_login(user)
+    page_suivante = client.get(reverse('transaction')).context['curseur_suivant']
+
+    scenarios = {
+        'IndexView': lambda: client.get(reverse('index')),
+        'TransactionView': lambda: client.get(reverse('transaction')),
+        'TransactionView (page 2)': lambda: client.get(reverse('transaction'), {'avant': page_suivante or ''}),
+        'AddView': lambda: client.post(reverse('add'), {
+            'type_transaction': 'REVENU', 'montant': '1', 'compte': 'momo',
+            'categorie': 'autre', 'description': 'benchmark',
+        }),
+        'LoginView': lambda: Client().post(reverse('login'), {
+            'phone_number': user.phone_number, 'password': MOT_DE_PASSE,
+        }),
+    }
+
+    resultats = {}
+    for nom, scenario in scenarios.items():
+        durees, requetes = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as capture:
+                debut = time.perf_counter()
+                response = scenario()
+                durees.append((time.perf_counter() - debut) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f"{nom} : HTTP {response.status_code}")
+            requetes.append(len(capture))
+        resultats[nom] = {
+            'p50_ms': round(percentile(durees, 50), 3),
+            'p99_ms': round(percentile(durees, 99), 3),
+            'queries': max(requetes),
+        }
+    return resultats
+
+
+def comparer(resultats, reference, tolerance):
+    """Liste des régressions : latence p50 au-delà de la tolérance ou requêtes supplémentaires."""
+    regressions = []
+    for taille, vues in resultats.items():
+        for vue, mesure in vues.items():
+            base = reference.get(taille, {}).get(vue)
+            if base is None:
+                continue
+            if mesure['queries'] > base['queries']:
+                regressions.append(f"{taille} {vue} : {base['queries']} -> {mesure['queries']} requêtes")
+            if mesure['p50_ms'] > base['p50_ms'] * (1 + tolerance):
+                regressions.append(f"{taille} {vue} : p50 {base['p50_ms']} -> {mesure['p50_ms']} ms")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure p50/p99 et nombre de requêtes de IndexView, TransactionView, AddView et LoginView "
+        "sur des jeux de données de tailles croissantes (dans une base de test jetable), "
+        "puis compare à une référence JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='5x100,5x1000,5x10000',
+                            help="Tailles « utilisateurs x transactions », séparées par des virgules.")
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'))
+        parser.add_argument('--save', action='store_true', help="Enregistre les résultats comme nouvelle référence.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Dégradation de p50 tolérée avant de signaler une régression (0.25 = 25 %%).")
+
+    def handle(self, *args, **options):
+        tailles = []
+        for taille in options['sizes'].split(','):
+            try:
+                nb_utilisateurs, nb_transactions = (int(n) for n in taille.lower().split('x'))
+            except ValueError:
+                raise CommandError(f"Taille invalide : {taille!r} (attendu : 10x1000)")
+            tailles.append((taille.strip(), nb_utilisateurs, nb_transactions))
+
+        setup_test_environment()
+        nom_base = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            resultats = {}
+            for i, (taille, nb_utilisateurs, nb_transactions) in enumerate(tailles):
+                self.stdout.write(f"Taille {taille}...")
+                resultats[taille] = mesurer_taille(nb_utilisateurs, nb_transactions, options['repeat'], f"08{i}")
+        finally:
+            connection.creation.destroy_test_db(nom_base, verbosity=0)
+            teardown_test_environment()
+
+        for taille, vues in resultats.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(taille))
+            for vue, mesure in vues.items():
+                self.stdout.write(
+                    f"  {vue:<26} p50 {mesure['p50_ms']:>9.2f} ms   p99 {mesure['p99_ms']:>9.2f} ms   "
+                    f"{mesure['queries']} requête(s)"
+                )
+
+        chemin = Path(options['baseline'])
+        if options['save']:
+            chemin.parent.mkdir(parents=True, exist_ok=True)
+            chemin.write_text(json.dumps(resultats, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f"Référence enregistrée dans {chemin}"))
+            return
+
+        if not chemin.exists():
+            self.stdout.write(f"Pas de référence ({chemin}) : relancez avec --save pour en créer une.")
+            return
+        regressions = comparer(resultats, json.loads(chemin.read_text(encoding='utf-8')), options['tolerance'])
+        if regressions:
+            raise CommandError("Régressions détectées :\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la référence."))
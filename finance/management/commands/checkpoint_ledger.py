@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Utilisateur
+from finance.services.grand_livre import MARGE, creer_points_de_controle
+
+
+class Command(BaseCommand):
+    help = "Crée un point de contrôle du grand livre pour chaque utilisateur ayant de nouvelles écritures."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='phone_number',
+                            help="Limite l'opération à un numéro de téléphone.")
+        parser.add_argument('--margin', type=int, default=int(MARGE.total_seconds()),
+                            help="Marge (secondes) : les écritures plus récentes restent hors du point de contrôle.")
+
+    def handle(self, *args, phone_number=None, margin=None, **options):
+        utilisateurs = None
+        if phone_number:
+            utilisateurs = Utilisateur.objects.filter(phone_number=phone_number)
+            if not utilisateurs.exists():
+                raise CommandError(f"Utilisateur introuvable : {phone_number}")
+
+        crees = creer_points_de_controle(utilisateurs, marge=timedelta(seconds=margin))
+        self.stdout.write(self.style.SUCCESS(f"{crees} point(s) de contrôle créé(s)."))
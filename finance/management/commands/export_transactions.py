@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Transaction, Utilisateur
+from finance.services.export import FORMATS, TAILLE_BLOC, transactions_a_exporter
+from finance.services.recherche import lire_date
+
+
+class Command(BaseCommand):
+    help = "Exporte en flux les transactions d'un utilisateur (ou de tous) en CSV ou JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='phone_number',
+                            help="Numéro de téléphone ; par défaut, tous les utilisateurs.")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--debut', help="Date de début incluse (AAAA-MM-JJ).")
+        parser.add_argument('--fin', help="Date de fin incluse (AAAA-MM-JJ).")
+        parser.add_argument('--compte', choices=[code for code, _ in Transaction.COMPTES])
+        parser.add_argument('--categorie', choices=[code for code, _ in Transaction.CATEGORIES])
+        parser.add_argument('--output', '-o', help="Fichier de sortie (sortie standard par défaut).")
+        parser.add_argument('--chunk-size', type=int, default=TAILLE_BLOC)
+
+    def handle(self, *args, phone_number=None, **options):
+        utilisateur = None
+        if phone_number:
+            try:
+                utilisateur = Utilisateur.objects.get(phone_number=phone_number)
+            except Utilisateur.DoesNotExist:
+                raise CommandError(f"Utilisateur introuvable : {phone_number}")
+
+        dates = {}
+        for nom in ('debut', 'fin'):
+            if options[nom]:
+                dates[nom] = lire_date(options[nom])
+                if dates[nom] is None:
+                    raise CommandError(f"--{nom} : date invalide {options[nom]!r}")
+
+        queryset = transactions_a_exporter(
+            utilisateur, compte=options['compte'], categorie=options['categorie'], **dates
+        )
+        generer, _ = FORMATS[options['format']]
+        lignes = generer(queryset, avec_utilisateur=utilisateur is None, taille_bloc=options['chunk_size'])
+
+        if not options['output']:
+            for ligne in lignes:
+                self.stdout.write(ligne, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as sortie:
+            sortie.writelines(lignes)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Utilisateur
+from finance.services.importation import TAILLE_LOT, ErreurImport, importer_transactions, lire_csv
+
+
+class Command(BaseCommand):
+    help = "Importe un fichier CSV de transactions pour un utilisateur (tout ou rien)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('phone_number')
+        parser.add_argument('fichier')
+        parser.add_argument('--batch-size', type=int, default=TAILLE_LOT)
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, phone_number, fichier, **options):
+        try:
+            user = Utilisateur.objects.get(phone_number=phone_number)
+        except Utilisateur.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {phone_number}")
+
+        try:
+            with open(fichier, 'rb') as f:
+                total = importer_transactions(
+                    user, lire_csv(f, encodage=options['encoding']), taille_lot=options['batch_size']
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except ErreurImport as e:
+            raise CommandError(f"Import annulé. {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} transaction(s) importée(s)."))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from finance.models import TransactionArchive
+from finance.services import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Entretient le partitionnement mensuel des transactions (PostgreSQL) : crée les partitions "
+        "des prochains mois et supprime celles des mois entièrement archivés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3,
+                            help="Nombre de mois à venir dont la partition doit exister.")
+        parser.add_argument('--convert', action='store_true',
+                            help="Partitionne d'abord la table si elle ne l'est pas (copie complète, à faire en maintenance).")
+        parser.add_argument('--drop-archived', action='store_true',
+                            help="Supprime les partitions vides des mois antérieurs à la dernière archive.")
+
+    def handle(self, *args, ahead=3, convert=False, drop_archived=False, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Le partitionnement n'est disponible que sous PostgreSQL.")
+        if not partitions.est_partitionnee(connection):
+            if not convert:
+                raise CommandError(
+                    "Table non partitionnée : TRANSACTION_PARTITIONING=True avant migrate, ou --convert."
+                )
+            try:
+                partitions.convertir(connection, partitionner=True, avance=ahead)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Table {partitions.TABLE} partitionnée par mois.")
+
+        mois = timezone.localdate().replace(day=1)
+        for nom in partitions.creer_partitions(connection, mois, partitions.ajouter_mois(mois, ahead)):
+            self.stdout.write(f"Partition créée : {nom}")
+
+        if drop_archived:
+            limite = TransactionArchive.objects.limite()
+            if limite is None:
+                self.stdout.write("Aucune archive : rien à supprimer.")
+                return
+            # Seuls les mois entièrement antérieurs à la limite d'archivage
+            fin = timezone.localtime(limite).date()
+            for mois in partitions.partitions(connection):
+                if partitions.ajouter_mois(mois) > fin:
+                    break
+                if partitions.supprimer_partition(connection, mois):
+                    self.stdout.write(f"Partition supprimée : {partitions.nom_partition(mois)}")
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        f"{partitions.nom_partition(mois)} contient encore des lignes : conservée."
+                    ))
+
+        self.stdout.write(self.style.SUCCESS("Partitions à jour."))
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from finance.models import Compte, SoldeArchive, Transaction, Utilisateur, montant_signe
+from finance.services.cache import invalider
+
+
+class Command(BaseCommand):
+    help = "Recalcule (ou vérifie avec --check) le solde dénormalisé de chaque utilisateur et portefeuille."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Vérifie seulement, sans corriger ; code de sortie non nul si écart.")
+        parser.add_argument('--user', dest='phone_number',
+                            help="Limite l'opération à un numéro de téléphone.")
+
+    def handle(self, *args, check=False, phone_number=None, **options):
+        users = Utilisateur.objects.only('pk', 'phone_number', 'initial_balance', 'balance')
+        comptes = Compte.objects.select_related('user').only('pk', 'label', 'balance', 'user__phone_number')
+        transactions = Transaction.objects.all()
+        archives = SoldeArchive.objects.all()
+        if phone_number:
+            users = users.filter(phone_number=phone_number)
+            comptes = comptes.filter(user__phone_number=phone_number)
+            transactions = transactions.filter(utilisateur__phone_number=phone_number)
+            archives = archives.filter(utilisateur__phone_number=phone_number)
+
+        # 🔹 Une seule requête groupée pour tous les soldes, puis un parcours en flux des utilisateurs
+        nets = dict(
+            transactions.order_by().values('utilisateur')
+            .annotate(net=Sum(montant_signe()))
+            .values_list('utilisateur', 'net')
+        )
+        # Effet des transactions archivées (archive_transactions), sorties de la table
+        nets_archives = dict(
+            archives.order_by().values('utilisateur').annotate(total=Sum('net')).values_list('utilisateur', 'total')
+        )
+
+        ecarts = 0
+        for user in users.iterator():
+            attendu = user.initial_balance + (nets.get(user.pk) or 0) + (nets_archives.get(user.pk) or 0)
+            if attendu == user.balance:
+                continue
+            ecarts += 1
+            self.stdout.write(f"{user.phone_number}: stocké {user.balance}, attendu {attendu}")
+            if not check:
+                Utilisateur.objects.filter(pk=user.pk).update(balance=attendu)
+                invalider(user.pk)
+
+        nets_comptes = dict(
+            transactions.filter(portefeuille__isnull=False).order_by().values('portefeuille')
+            .annotate(net=Sum(montant_signe()))
+            .values_list('portefeuille', 'net')
+        )
+        archives_comptes = dict(
+            archives.filter(portefeuille__isnull=False).order_by().values('portefeuille')
+            .annotate(total=Sum('net'))
+            .values_list('portefeuille', 'total')
+        )
+        for compte in comptes.iterator():
+            attendu = (nets_comptes.get(compte.pk) or 0) + (archives_comptes.get(compte.pk) or 0)
+            if attendu == compte.balance:
+                continue
+            ecarts += 1
+            self.stdout.write(f"{compte.user.phone_number} / {compte.label}: stocké {compte.balance}, attendu {attendu}")
+            if not check:
+                Compte.objects.filter(pk=compte.pk).update(balance=attendu)
+
+        if check and ecarts:
+            raise CommandError(f"{ecarts} solde(s) incohérent(s).")
+        action = "vérifié(s)" if check else "corrigé(s)"
+        self.stdout.write(self.style.SUCCESS(f"Terminé : {ecarts} écart(s) {action}."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Utilisateur
+from finance.services.analytique import TAILLE_LOT, reconstruire_resumes
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les cumuls mensuels (MonthlySummary) à partir des transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='phone_number',
+                            help="Limite la reconstruction à un numéro de téléphone.")
+        parser.add_argument('--batch-size', type=int, default=TAILLE_LOT)
+
+    def handle(self, *args, phone_number=None, batch_size=TAILLE_LOT, **options):
+        utilisateurs = None
+        if phone_number:
+            utilisateurs = Utilisateur.objects.filter(phone_number=phone_number)
+            if not utilisateurs.exists():
+                raise CommandError(f"Utilisateur introuvable : {phone_number}")
+
+        total = reconstruire_resumes(utilisateurs, taille_lot=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{total} ligne(s) de cumul reconstruite(s)."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from finance.services.recurrences import TAILLE_LOT, executer_echeances
+
+
+class Command(BaseCommand):
+    help = "Crée les transactions des modèles récurrents arrivés à échéance (à lancer chaque nuit)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', help="Date/heure ISO limite (par défaut : maintenant).")
+        parser.add_argument('--batch-size', type=int, default=TAILLE_LOT)
+
+    def handle(self, *args, until=None, batch_size=TAILLE_LOT, **options):
+        maintenant = None
+        if until:
+            maintenant = parse_datetime(until)
+            if maintenant is None:
+                raise CommandError(f"Date invalide : {until}")
+            if timezone.is_naive(maintenant):
+                maintenant = timezone.make_aware(maintenant)
+
+        modeles, creees = executer_echeances(maintenant, taille_lot=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"{modeles} modèle(s) récurrent(s) traité(s), {creees} transaction(s) créée(s)."
+        ))
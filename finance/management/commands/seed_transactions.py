@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from finance.services.generateur import generer_donnees
+
+
+class Command(BaseCommand):
+    help = "Génère N utilisateurs × M transactions (données de benchmark)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--transactions', type=int, default=1000,
+                            help="Nombre de transactions par utilisateur.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='09',
+                            help="Préfixe des numéros de téléphone générés.")
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        utilisateurs = generer_donnees(
+            options['users'], options['transactions'],
+            taille_lot=options['batch_size'], prefixe=options['prefix'], graine=options['seed'],
+        )
+        total = len(utilisateurs) * options['transactions']
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(utilisateurs)} utilisateur(s), {total} transaction(s) créé(s)."
+        ))
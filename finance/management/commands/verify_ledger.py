@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import Utilisateur
+from finance.services.grand_livre import TAILLE_LOT, verifier
+
+
+class Command(BaseCommand):
+    help = "Vérifie en un parcours l'historique du grand livre : points de contrôle et soldes stockés."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='phone_number',
+                            help="Limite la vérification à un numéro de téléphone.")
+        parser.add_argument('--batch-size', type=int, default=TAILLE_LOT)
+
+    def handle(self, *args, phone_number=None, batch_size=TAILLE_LOT, **options):
+        utilisateurs = None
+        if phone_number:
+            utilisateurs = Utilisateur.objects.filter(phone_number=phone_number)
+            if not utilisateurs.exists():
+                raise CommandError(f"Utilisateur introuvable : {phone_number}")
+
+        anomalies = 0
+        for user, message in verifier(utilisateurs, taille_lot=batch_size):
+            anomalies += 1
+            self.stdout.write(f"{user.phone_number}: {message}")
+
+        if anomalies:
+            raise CommandError(f"{anomalies} anomalie(s) dans le grand livre.")
+        self.stdout.write(self.style.SUCCESS("Grand livre cohérent."))
@@ -0,0 +1,93 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from finance.services import metriques
+
+logger = logging.getLogger('finance.instrumentation')
+
+
+class _Collecteur:
+    """execute_wrapper : chronomètre et mémorise chaque requête SQL de la requête HTTP."""
+
+    def __init__(self):
+        self.nombre = 0
+        self.duree = 0.0
+        self.gabarits = Counter()   # même SQL, paramètres quelconques
+        self.identiques = Counter()  # même SQL et mêmes paramètres
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duree += time.perf_counter() - debut
+            self.nombre += 1
+            self.gabarits[sql] += 1
+            try:
+                self.identiques[(sql, repr(params))] += 1
+            except Exception:
+                pass
+
+
+class InstrumentationMiddleware:
+    """
+    Mesure, pour chaque requête : durée totale, nombre de requêtes SQL et temps SQL,
+    et signale les motifs N+1 (même requête répétée avec des paramètres différents)
+    et les requêtes dupliquées. Activé par FINANCE_INSTRUMENTATION dans les settings.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.seuil_n_plus_un = getattr(settings, 'FINANCE_N_PLUS_ONE_THRESHOLD', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        collecteur = _Collecteur()
+        debut = time.perf_counter()
+        with ExitStack() as pile:
+            for connexion in connections.all():
+                pile.enter_context(connexion.execute_wrapper(collecteur))
+            response = self.get_response(request)
+        duree = time.perf_counter() - debut
+
+        vue = self.nom_vue(request)
+        doublons = sum(n - 1 for n in collecteur.identiques.values() if n > 1)
+        repetees = {sql: n for sql, n in collecteur.gabarits.items() if n >= self.seuil_n_plus_un}
+        if repetees:
+            for sql, n in repetees.items():
+                logger.warning("N+1 probable dans %s : %d exécutions de %s", vue, n, sql[:200])
+        if doublons:
+            logger.info("%s : %d requête(s) SQL dupliquée(s)", vue, doublons)
+
+        metriques.enregistrer(vue, duree, collecteur.nombre, collecteur.duree, int(bool(repetees)), doublons)
+
+        response['Server-Timing'] = f"app;dur={duree * 1000:.1f}, db;dur={collecteur.duree * 1000:.1f}"
+        response['X-DB-Queries'] = str(collecteur.nombre)
+        return response
+
+    async def __acall__(self, request):
+        # 🔹 Sous ASGI, l'ORM async exécute le SQL dans un thread dédié, hors de portée
+        # d'execute_wrapper : seule la durée est mesurée
+        debut = time.perf_counter()
+        response = await self.get_response(request)
+        duree = time.perf_counter() - debut
+        metriques.enregistrer(self.nom_vue(request), duree, 0, 0.0, 0, 0)
+        response['Server-Timing'] = f"app;dur={duree * 1000:.1f}"
+        return response
+
+    def nom_vue(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'non_resolue'
+        return match.view_name or match._func_path
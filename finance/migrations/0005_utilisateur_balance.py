@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:42
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+from finance.models import montant_signe
+
+
+def initialiser_soldes(apps, schema_editor):
+    Utilisateur = apps.get_model('finance', 'Utilisateur')
+    Transaction = apps.get_model('finance', 'Transaction')
+
+    nets = dict(
+        Transaction.objects.values('utilisateur')
+        .annotate(net=Sum(montant_signe()))
+        .values_list('utilisateur', 'net')
+    )
+    for user in Utilisateur.objects.only('pk', 'initial_balance').iterator():
+        Utilisateur.objects.filter(pk=user.pk).update(
+            balance=user.initial_balance + (nets.get(user.pk) or 0)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_transaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utilisateur',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Balance'),
+        ),
+        migrations.RunPython(initialiser_soldes, migrations.RunPython.noop),
+    ]
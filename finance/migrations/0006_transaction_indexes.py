@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_utilisateur_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['utilisateur', '-date', '-id'], name='transaction_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['utilisateur', 'type_transaction'], name='transaction_user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 1)), fields=['utilisateur', '-date', '-id'], name='transaction_user_actif_idx'),
+        ),
+        # L'index simple de la clé étrangère n'est supprimé qu'une fois les index composites créés
+        migrations.AlterField(
+            model_name='transaction',
+            name='utilisateur',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
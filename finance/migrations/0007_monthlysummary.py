@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+def initialiser_resumes(apps, schema_editor):
+    Transaction = apps.get_model('finance', 'Transaction')
+    MonthlySummary = apps.get_model('finance', 'MonthlySummary')
+
+    lignes = (
+        Transaction.objects.filter(status=1).order_by()
+        .annotate(mois=TruncMonth('date', output_field=DateField()))
+        .values('utilisateur_id', 'mois', 'type_transaction', 'compte', 'categorie')
+        .annotate(total=Sum('montant'), nombre=Count('id'))
+    )
+    lot = []
+    for ligne in lignes.iterator(chunk_size=5000):
+        lot.append(MonthlySummary(**ligne))
+        if len(lot) >= 5000:
+            MonthlySummary.objects.bulk_create(lot)
+            lot = []
+    MonthlySummary.objects.bulk_create(lot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField(verbose_name='Mois')),
+                ('type_transaction', models.CharField(choices=[('REVENU', 'Revenu'), ('DEPENSE', 'Dépense'), ('ECHEC', 'Épargne')], max_length=10)),
+                ('compte', models.CharField(choices=[('Especes', 'Especes'), ('momo', 'MoMo'), ('orange', 'Orange Money'), ('banque', 'Épargne bancaire')], max_length=20)),
+                ('categorie', models.CharField(choices=[('nourriture', 'Alimentation & Restaurants'), ('transport', 'Transport'), ('shopping', 'Shopping'), ('loisirs', 'Loisirs & Divertissement'), ('factures', 'Factures & Services'), ('sante', 'Santé'), ('education', 'Éducation'), ('autre', 'Autre')], max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('nombre', models.PositiveIntegerField(default=0)),
+                ('utilisateur', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='resumes_mensuels', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Résumé mensuel',
+                'verbose_name_plural': 'Résumés mensuels',
+                'ordering': ['-mois'],
+                'constraints': [models.UniqueConstraint(fields=('utilisateur', 'mois', 'type_transaction', 'compte', 'categorie'), name='monthly_summary_unique')],
+            },
+        ),
+        migrations.RunPython(initialiser_resumes, migrations.RunPython.noop),
+    ]
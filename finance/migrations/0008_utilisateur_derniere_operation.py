@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_monthlysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utilisateur',
+            name='derniere_operation',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Last Operation'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+from finance.models import montant_signe
+
+COMPTE_TRANSACTION = {'MTN': 'momo', 'Orange': 'orange'}
+
+
+def rattacher_portefeuilles(apps, schema_editor):
+    """
+    Rattache l'historique momo / orange au portefeuille correspondant quand l'utilisateur
+    n'en a qu'un de ce type, puis calcule le solde de chaque portefeuille.
+    """
+    Compte = apps.get_model('finance', 'Compte')
+    Transaction = apps.get_model('finance', 'Transaction')
+
+    uniques = (
+        Compte.objects.values('user_id', 'type_compte')
+        .annotate(nombre=Count('id')).filter(nombre=1)
+        .values_list('user_id', 'type_compte')
+    )
+    for user_id, type_compte in uniques.iterator():
+        compte = Compte.objects.get(user_id=user_id, type_compte=type_compte)
+        Transaction.objects.filter(
+            utilisateur_id=user_id, compte=COMPTE_TRANSACTION[type_compte], portefeuille__isnull=True
+        ).update(portefeuille=compte)
+
+    soldes = (
+        Transaction.objects.filter(portefeuille__isnull=False).order_by()
+        .values('portefeuille').annotate(net=Sum(montant_signe()))
+        .values_list('portefeuille', 'net')
+    )
+    for compte_id, net in soldes.iterator():
+        Compte.objects.filter(pk=compte_id).update(balance=net or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_utilisateur_derniere_operation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compte',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Balance'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='portefeuille',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='finance.compte', verbose_name='Portefeuille'),
+        ),
+        migrations.AlterField(
+            model_name='monthlysummary',
+            name='categorie',
+            field=models.CharField(choices=[('nourriture', 'Alimentation & Restaurants'), ('transport', 'Transport'), ('shopping', 'Shopping'), ('loisirs', 'Loisirs & Divertissement'), ('factures', 'Factures & Services'), ('sante', 'Santé'), ('education', 'Éducation'), ('autre', 'Autre'), ('virement', 'Virement entre comptes')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='categorie',
+            field=models.CharField(choices=[('nourriture', 'Alimentation & Restaurants'), ('transport', 'Transport'), ('shopping', 'Shopping'), ('loisirs', 'Loisirs & Divertissement'), ('factures', 'Factures & Services'), ('sante', 'Santé'), ('education', 'Éducation'), ('autre', 'Autre'), ('virement', 'Virement entre comptes')], max_length=50, verbose_name='Catégorie'),
+        ),
+        migrations.RunPython(rattacher_portefeuilles, migrations.RunPython.noop),
+    ]
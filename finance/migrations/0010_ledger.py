@@ -0,0 +1,77 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:01
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def ouvrir_grand_livre(apps, schema_editor):
+    """Une écriture d'ouverture par transaction active existante."""
+    Transaction = apps.get_model('finance', 'Transaction')
+    LedgerEntry = apps.get_model('finance', 'LedgerEntry')
+
+    maintenant = timezone.now()
+    transactions = (
+        Transaction.objects.filter(status=1).order_by()
+        .values_list('pk', 'utilisateur_id', 'portefeuille_id', 'type_transaction', 'montant')
+    )
+    lot = []
+    for pk, utilisateur_id, portefeuille_id, type_transaction, montant in transactions.iterator(chunk_size=5000):
+        lot.append(LedgerEntry(
+            utilisateur_id=utilisateur_id, portefeuille_id=portefeuille_id, transaction_id=pk,
+            montant=montant if type_transaction == 'REVENU' else -montant,
+            motif='ouverture', cree_le=maintenant,
+        ))
+        if len(lot) >= 5000:
+            LedgerEntry.objects.bulk_create(lot)
+            lot = []
+    LedgerEntry.objects.bulk_create(lot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_compte_balance_transaction_portefeuille'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jusqu_a', models.DateTimeField()),
+                ('solde', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('nombre', models.PositiveIntegerField(default=0)),
+                ('cree_le', models.DateTimeField(auto_now_add=True)),
+                ('utilisateur', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='points_de_controle', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Point de contrôle',
+                'verbose_name_plural': 'Points de contrôle',
+                'ordering': ['-jusqu_a'],
+                'indexes': [models.Index(fields=['utilisateur', '-jusqu_a'], name='checkpoint_user_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Montant signé (CFA)')),
+                ('motif', models.CharField(choices=[('saisie', 'Saisie'), ('correction', 'Correction'), ('annulation', 'Annulation'), ('lot', 'Import par lot'), ('ouverture', "Solde d'ouverture")], max_length=20)),
+                ('cree_le', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('portefeuille', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ecritures', to='finance.compte')),
+                ('transaction', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ecritures', to='finance.transaction')),
+                ('utilisateur', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ecritures', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Écriture',
+                'verbose_name_plural': 'Grand livre',
+                'ordering': ['cree_le'],
+                'indexes': [models.Index(fields=['utilisateur', 'cree_le'], name='ledger_user_date_idx')],
+            },
+        ),
+        migrations.RunPython(ouvrir_grand_livre, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:07
+
+import django.db.models.deletion
+import django_extensions.db.fields
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringTransaction',
+            fields=[
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('status', models.IntegerField(choices=[(0, 'Inactive'), (1, 'Active')], default=1, verbose_name='status')),
+                ('activate_date', models.DateTimeField(blank=True, help_text='keep empty for an immediate activation', null=True)),
+                ('deactivate_date', models.DateTimeField(blank=True, help_text='keep empty for indefinite activation', null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('meta', models.JSONField(blank=True, default=dict)),
+                ('type_transaction', models.CharField(choices=[('REVENU', 'Revenu'), ('DEPENSE', 'Dépense'), ('ECHEC', 'Épargne')], default='DEPENSE', max_length=10)),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Montant (CFA)')),
+                ('compte', models.CharField(choices=[('Especes', 'Especes'), ('momo', 'MoMo'), ('orange', 'Orange Money'), ('banque', 'Épargne bancaire')], max_length=20, verbose_name='Compte')),
+                ('categorie', models.CharField(choices=[('nourriture', 'Alimentation & Restaurants'), ('transport', 'Transport'), ('shopping', 'Shopping'), ('loisirs', 'Loisirs & Divertissement'), ('factures', 'Factures & Services'), ('sante', 'Santé'), ('education', 'Éducation'), ('autre', 'Autre'), ('virement', 'Virement entre comptes')], max_length=50, verbose_name='Catégorie')),
+                ('description', models.CharField(blank=True, max_length=255, null=True, verbose_name='Description')),
+                ('frequence', models.CharField(choices=[('quotidienne', 'Quotidienne'), ('hebdomadaire', 'Hebdomadaire'), ('mensuelle', 'Mensuelle'), ('annuelle', 'Annuelle')], default='mensuelle', max_length=15)),
+                ('intervalle', models.PositiveSmallIntegerField(default=1)),
+                ('debut', models.DateTimeField(verbose_name='Première échéance')),
+                ('fin', models.DateTimeField(blank=True, null=True, verbose_name='Dernière échéance possible')),
+                ('occurrences', models.PositiveIntegerField(default=0)),
+                ('prochaine_echeance', models.DateTimeField(editable=False)),
+                ('portefeuille', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions_recurrentes', to='finance.compte')),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions_recurrentes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transaction récurrente',
+                'verbose_name_plural': 'Transactions récurrentes',
+                'ordering': ['prochaine_echeance'],
+                'indexes': [models.Index(condition=models.Q(('status', 1)), fields=['prochaine_echeance'], name='recurrente_echeance_idx')],
+            },
+        ),
+    ]
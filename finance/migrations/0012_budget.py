@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_recurringtransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categorie', models.CharField(choices=[('nourriture', 'Alimentation & Restaurants'), ('transport', 'Transport'), ('shopping', 'Shopping'), ('loisirs', 'Loisirs & Divertissement'), ('factures', 'Factures & Services'), ('sante', 'Santé'), ('education', 'Éducation'), ('autre', 'Autre'), ('virement', 'Virement entre comptes')], max_length=50, verbose_name='Catégorie')),
+                ('plafond', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Plafond mensuel (CFA)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('utilisateur', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Budget',
+                'verbose_name_plural': 'Budgets',
+                'ordering': ['categorie'],
+                'constraints': [models.UniqueConstraint(fields=('utilisateur', 'categorie'), name='budget_unique')],
+            },
+        ),
+    ]
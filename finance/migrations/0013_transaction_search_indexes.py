@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:12
+
+from django.db import migrations
+
+
+def creer_index(apps, schema_editor):
+    # 🔹 Index propres à PostgreSQL : rien à faire sur les autres bases (SQLite en test)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('finance', 'Transaction')._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Même expression que celle générée par description__icontains
+    schema_editor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS transaction_description_trgm_idx "
+        f"ON {table} USING gin ((UPPER(description::text)) gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS transaction_meta_gin_idx "
+        f"ON {table} USING gin (meta jsonb_path_ops)"
+    )
+
+
+def supprimer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS transaction_description_trgm_idx")
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS transaction_meta_gin_idx")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('finance', '0012_budget'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
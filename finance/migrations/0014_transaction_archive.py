@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0013_transaction_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fichier', models.CharField(max_length=255)),
+                ('jusqu_a', models.DateTimeField()),
+                ('nombre', models.PositiveIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('cree_le', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archive de transactions',
+                'verbose_name_plural': 'Archives de transactions',
+                'ordering': ['-jusqu_a'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SoldeArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('net', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('nombre', models.PositiveIntegerField(default=0)),
+                ('portefeuille', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='soldes_archives', to='finance.compte')),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='soldes_archives', to=settings.AUTH_USER_MODEL)),
+                ('archive', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='soldes', to='finance.transactionarchive')),
+            ],
+            options={
+                'verbose_name': 'Solde archivé',
+                'verbose_name_plural': 'Soldes archivés',
+            },
+        ),
+    ]
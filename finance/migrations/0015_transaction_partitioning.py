@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:12
+
+from django.conf import settings
+from django.db import migrations
+
+from finance.services import partitions
+
+
+def partitionner(apps, schema_editor):
+    # 🔹 Facultatif (TRANSACTION_PARTITIONING) et propre à PostgreSQL ; sinon la table reste ordinaire.
+    # Activé après coup : maintain_partitions --convert
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or not settings.FINANCE_TRANSACTION_PARTITIONING:
+        return
+    if not partitions.est_partitionnee(connection):
+        partitions.convertir(connection, partitionner=True)
+
+
+def departitionner(apps, schema_editor):
+    connection = schema_editor.connection
+    if partitions.est_partitionnee(connection):
+        partitions.convertir(connection, partitionner=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0014_transaction_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(partitionner, departitionner),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+from finance.services import partitions
+
+INDEX_DATE = models.Index(fields=['-date', '-id'], name='transaction_date_idx')
+
+
+def creer_index_date(apps, schema_editor):
+    Transaction = apps.get_model('finance', 'Transaction')
+    connection = schema_editor.connection
+    # 🔹 Sans bloquer les écritures sous PostgreSQL ; CONCURRENTLY est refusé sur une table partitionnée
+    concurrent = connection.vendor == 'postgresql' and not partitions.est_partitionnee(connection)
+    if concurrent:
+        schema_editor.add_index(Transaction, INDEX_DATE, concurrently=True)
+    else:
+        schema_editor.add_index(Transaction, INDEX_DATE)
+
+
+def supprimer_index_date(apps, schema_editor):
+    Transaction = apps.get_model('finance', 'Transaction')
+    schema_editor.remove_index(Transaction, INDEX_DATE)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('finance', '0015_transaction_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compte',
+            index=models.Index(fields=['phone'], name='compte_phone_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='transaction', index=INDEX_DATE),
+            ],
+            database_operations=[
+                migrations.RunPython(creer_index_date, supprimer_index_date),
+            ],
+        ),
+    ]
@@ -1,10 +1,23 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 import uuid
-from django.db import models
-from django_extensions.db.models import ActivatorModel, TimeStampedModel
+from calendar import monthrange
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.dispatch import Signal
+from django_extensions.db.models import ActivatorModel, ActivatorModelManager, TimeStampedModel
 from django.conf import settings
 
 
+class SoldeInsuffisant(Exception):
+    """Levée quand une dépense rendrait le solde négatif."""
+
+
 class BlogBaseModel(ActivatorModel, TimeStampedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     meta = models.JSONField(default=dict, blank=True)
@@ -32,6 +45,7 @@ class UtilisateurManager(BaseUserManager):
             first_name=first_name,
             last_name=last_name,
             initial_balance=initial_balance,
+            balance=initial_balance,
             **extra_fields
         )
         user.set_password(password)
@@ -50,6 +64,19 @@ class UtilisateurManager(BaseUserManager):
         
         return self.create_user(phone_number, password, **extra_fields)
 
+    def ajuster_solde(self, utilisateur_id, delta, verifier=False):
+        """
+        Applique `delta` au solde courant par un UPDATE atomique (pas de lecture/écriture en Python)
+        et horodate la dernière opération (utilisée pour les ETag de l'API).
+        Avec verifier=True, un débit n'est appliqué que si le solde reste positif : la condition
+        est évaluée dans le même UPDATE, donc sans course entre deux requêtes concurrentes.
+        Retourne le nombre de lignes modifiées (0 si la vérification échoue).
+        """
+        utilisateurs = self.filter(pk=utilisateur_id)
+        if verifier and delta < 0:
+            utilisateurs = utilisateurs.filter(balance__gte=-delta)
+        return utilisateurs.update(balance=F('balance') + delta, derniere_operation=timezone.now())
+
 
 # 🔹 Modèle utilisateur
 class Utilisateur(AbstractUser, BlogBaseModel):
@@ -71,6 +98,21 @@ class Utilisateur(AbstractUser, BlogBaseModel):
         verbose_name="Initial Balance"
     )
 
+    # Solde courant (dénormalisé), maintenu par Transaction.save() / delete()
+    balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Balance"
+    )
+
+    # Horodatage de la dernière écriture de transaction, mis à jour avec le solde
+    derniere_operation = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Last Operation"
+    )
+
     username = None
     email = models.EmailField(blank=True, null=True)
 
@@ -82,6 +124,82 @@ class Utilisateur(AbstractUser, BlogBaseModel):
     def __str__(self):
         return self.phone_number
 
+    def save(self, *args, **kwargs):
+        # 🔹 Le solde (et son horodatage) n'est modifié que par des UPDATE atomiques : une instance chargée
+        # en début de requête ne doit pas réécrire une valeur périmée
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ('balance', 'derniere_operation')
+            ]
+        super().save(*args, **kwargs)
+
+
+class CompteManager(models.Manager):
+    def ajuster_solde(self, compte_id, delta, verifier=False):
+        """Même principe que UtilisateurManager.ajuster_solde(), pour le solde d'un portefeuille."""
+        comptes = self.filter(pk=compte_id)
+        if verifier and delta < 0:
+            comptes = comptes.filter(balance__gte=-delta)
+        return comptes.update(balance=F('balance') + delta, updated_at=timezone.now())
+
+    def pour_transaction(self, user, compte):
+        """
+        Portefeuille auquel rattacher une transaction saisie avec `Transaction.compte`
+        ('momo', 'orange') : le seul portefeuille de ce type de l'utilisateur, sinon None.
+        """
+        types = [t for t, code in Compte.COMPTE_TRANSACTION.items() if code == compte]
+        if not types:
+            return None
+        comptes = list(self.filter(user=user, type_compte__in=types)[:2])
+        return comptes[0] if len(comptes) == 1 else None
+
+    def transferer(self, source_id, destination_id, montant, description=None):
+        """
+        Virement entre deux portefeuilles d'un même utilisateur : une sortie (DEPENSE) et
+        une entrée (REVENU) de catégorie 'virement', écrites dans une seule transaction SQL.
+        Retourne (sortie, entree) ; lève SoldeInsuffisant si la source ne suffit pas.
+        """
+        montant = Decimal(str(montant))
+        if not montant.is_finite() or montant <= 0:
+            raise ValueError("Le montant du virement doit être positif.")
+        try:
+            montant = Transaction._meta.get_field('montant').clean(montant, None)
+        except ValidationError:
+            raise ValueError("Le montant du virement est invalide (12 chiffres, 2 décimales au plus).")
+        if source_id == destination_id:
+            raise ValueError("Les portefeuilles source et destination doivent être différents.")
+
+        with transaction.atomic():
+            # 🔹 Verrous pris dans l'ordre des pk : deux virements croisés (A→B et B→A)
+            # attendent le même premier verrou au lieu de s'interbloquer
+            comptes = {
+                c.pk: c for c in
+                self.select_for_update().filter(pk__in=[source_id, destination_id]).order_by('pk')
+            }
+            if len(comptes) != 2:
+                raise Compte.DoesNotExist("Portefeuille introuvable.")
+            source, destination = comptes[source_id], comptes[destination_id]
+            if source.user_id != destination.user_id:
+                raise ValueError("Les deux portefeuilles doivent appartenir au même utilisateur.")
+            if source.balance < montant:
+                raise SoldeInsuffisant(source.pk)
+
+            commun = {
+                'utilisateur_id': source.user_id,
+                'montant': montant,
+                'categorie': Transaction.CATEGORIE_VIREMENT,
+                'description': description,
+                'meta': {'virement': uuid.uuid4().hex},
+            }
+            sortie = Transaction(type_transaction='DEPENSE', portefeuille=source,
+                                 compte=source.compte_transaction, **commun)
+            entree = Transaction(type_transaction='REVENU', portefeuille=destination,
+                                 compte=destination.compte_transaction, **commun)
+            sortie.save()
+            entree.save()
+        return sortie, entree
+
 
 class Compte(models.Model):
     ACCOUNT_TYPES = [
@@ -89,6 +207,12 @@ class Compte(models.Model):
         ('Orange', 'Orange Money'),
     ]
 
+    # Valeur de Transaction.compte correspondant à chaque type de portefeuille
+    COMPTE_TRANSACTION = {
+        'MTN': 'momo',
+        'Orange': 'orange',
+    }
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -108,6 +232,14 @@ class Compte(models.Model):
         max_length=50
     )
 
+    # Solde du portefeuille (dénormalisé), maintenu comme Utilisateur.balance par des UPDATE atomiques
+    balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Balance"
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True
     )
@@ -116,11 +248,128 @@ class Compte(models.Model):
         auto_now=True
     )
 
+    objects = CompteManager()
+
+    class Meta:
+        indexes = [
+            # Recherche exacte par numéro dans l'administration
+            models.Index(fields=['phone'], name='compte_phone_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.get_account_type_display()} - {self.phone}"
-    
-    
-    
+        return f"{self.get_type_compte_display()} - {self.phone}"
+
+    @property
+    def compte_transaction(self):
+        return self.COMPTE_TRANSACTION.get(self.type_compte, 'Especes')
+
+    def save(self, *args, **kwargs):
+        # 🔹 Comme pour Utilisateur : le solde n'est jamais réécrit depuis une instance
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'balance'
+            ]
+        super().save(*args, **kwargs)
+
+
+# Envoyé après TransactionManager.enregistrer_lot(), desactiver() et recategoriser(),
+# qui ne déclenchent pas post_save (arguments : sender=Transaction, transactions=[...])
+lot_enregistre = Signal()
+
+
+class TransactionManager(ActivatorModelManager):
+    def enregistrer_lot(self, transactions):
+        """
+        Insère un lot de transactions avec bulk_create et applique leur effet sur les soldes
+        en un seul UPDATE par utilisateur, au lieu d'un Transaction.save() par ligne.
+        """
+        # savepoint=False : appelé en boucle dans un import, un point de sauvegarde par lot serait inutile
+        with transaction.atomic(savepoint=False):
+            transactions = self.bulk_create(transactions)
+            self._ajuster_soldes(transactions)
+            MonthlySummary.objects.appliquer(ajouts=transactions)
+            LedgerEntry.objects.bulk_create([
+                LedgerEntry(utilisateur_id=t.utilisateur_id, portefeuille_id=t.portefeuille_id,
+                            transaction_id=t.pk, montant=t.delta, motif='lot')
+                for t in transactions if t.delta
+            ])
+
+            lot_enregistre.send(sender=self.model, transactions=transactions)
+        return transactions
+
+    def _ajuster_soldes(self, transactions, signe=1):
+        """Un UPDATE par utilisateur et par portefeuille touchés, pour l'effet cumulé des transactions."""
+        deltas = defaultdict(Decimal)
+        deltas_comptes = defaultdict(Decimal)
+        for t in transactions:
+            deltas[t.utilisateur_id] += signe * t.delta
+            if t.portefeuille_id:
+                deltas_comptes[t.portefeuille_id] += signe * t.delta
+        for utilisateur_id, delta in deltas.items():
+            Utilisateur.objects.ajuster_solde(utilisateur_id, delta)
+        for compte_id, delta in deltas_comptes.items():
+            Compte.objects.ajuster_solde(compte_id, delta)
+
+    # Champs utiles aux soldes, cumuls et grand livre
+    CHAMPS_EFFET = ('id', 'utilisateur_id', 'portefeuille_id', 'type_transaction', 'montant',
+                    'compte', 'categorie', 'date', 'status')
+
+    def _verrouiller(self, queryset):
+        """Lignes des transactions actives de `queryset`, verrouillées (une requête)."""
+        return list(
+            queryset.filter(status=self.model.ACTIVE_STATUS).order_by()
+            .select_for_update(of=('self',)).values(*self.CHAMPS_EFFET)
+        )
+
+    def desactiver(self, queryset):
+        """
+        Désactive en un seul UPDATE les transactions actives de `queryset` (actions d'administration),
+        puis retire leur effet des soldes, des cumuls mensuels et du grand livre.
+        Retourne le nombre de transactions désactivées.
+        """
+        with transaction.atomic():
+            transactions = [self.model(**ligne) for ligne in self._verrouiller(queryset)]
+            if not transactions:
+                return 0
+            self.filter(pk__in=[t.pk for t in transactions]).update(
+                status=self.model.INACTIVE_STATUS, modified=timezone.now()
+            )
+            self._ajuster_soldes(transactions, signe=-1)
+            MonthlySummary.objects.appliquer(retraits=transactions)
+            LedgerEntry.objects.bulk_create([
+                LedgerEntry(utilisateur_id=t.utilisateur_id, portefeuille_id=t.portefeuille_id,
+                            transaction_id=t.pk, montant=-t.delta, motif='annulation')
+                for t in transactions if t.delta
+            ])
+            lot_enregistre.send(sender=self.model, transactions=transactions)
+        return len(transactions)
+
+    def recategoriser(self, queryset, categorie):
+        """
+        Change en un seul UPDATE la catégorie des transactions actives de `queryset`, virements
+        exclus (leurs deux écritures vont ensemble). Les soldes ne bougent pas ; les cumuls
+        mensuels passent d'une catégorie à l'autre. Retourne le nombre de transactions modifiées.
+        """
+        if categorie not in dict(self.model.CATEGORIES_SAISIE):
+            raise ValueError(f"Catégorie invalide : {categorie}")
+        with transaction.atomic():
+            lignes = self._verrouiller(queryset.exclude(categorie__in=[categorie, self.model.CATEGORIE_VIREMENT]))
+            if not lignes:
+                return 0
+            maintenant = timezone.now()
+            self.filter(pk__in=[ligne['id'] for ligne in lignes]).update(categorie=categorie, modified=maintenant)
+            # Soldes inchangés mais historique modifié : nouvelle dernière opération (ETag de l'API)
+            Utilisateur.objects.filter(
+                pk__in={ligne['utilisateur_id'] for ligne in lignes}
+            ).update(derniere_operation=maintenant)
+            anciennes = [self.model(**ligne) for ligne in lignes]
+            nouvelles = [self.model(**{**ligne, 'categorie': categorie}) for ligne in lignes]
+            MonthlySummary.objects.appliquer(ajouts=nouvelles, retraits=anciennes)
+            lot_enregistre.send(sender=self.model, transactions=nouvelles)
+        return len(anciennes)
+
+
 class Transaction(BlogBaseModel):
     TYPE_TRANSACTION = [
         ('REVENU', 'Revenu'),
@@ -144,12 +393,20 @@ class Transaction(BlogBaseModel):
         ('sante', 'Santé'),
         ('education', 'Éducation'),
         ('autre', 'Autre'),
+        ('virement', 'Virement entre comptes'),
     ]
 
+    # Les deux écritures d'un virement (Compte.objects.transferer) : exclues des analyses
+    CATEGORIE_VIREMENT = 'virement'
+    # Catégories proposées à la saisie (formulaires, API, import) : toutes sauf le virement (dernier
+    # choix), réservé à Compte.objects.transferer()
+    CATEGORIES_SAISIE = CATEGORIES[:-1]
+
     utilisateur = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='transactions'
+        related_name='transactions',
+        db_index=False  # couvert par les index composites (utilisateur, ...) de Meta.indexes
     )
     type_transaction = models.CharField(
         max_length=10,
@@ -167,6 +424,15 @@ class Transaction(BlogBaseModel):
         choices=COMPTES,
         verbose_name="Compte"
     )
+    # Portefeuille réel (Compte) concerné, dont le solde est maintenu avec celui de l'utilisateur
+    portefeuille = models.ForeignKey(
+        Compte,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transactions',
+        verbose_name="Portefeuille"
+    )
     categorie = models.CharField(
         max_length=50,
         choices=CATEGORIES,
@@ -179,37 +445,534 @@ class Transaction(BlogBaseModel):
         verbose_name="Description"
     )
     date = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,  # modifiable, pour les historiques importés ou générés
         verbose_name="Date"
     )
 
+    objects = TransactionManager()
+
     class Meta:
         ordering = ['-date']
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
+        # 🔹 Toutes les lectures portent sur les transactions d'un utilisateur triées par date
+        indexes = [
+            models.Index(fields=['utilisateur', '-date', '-id'], name='transaction_user_date_idx'),
+            models.Index(fields=['utilisateur', 'type_transaction'], name='transaction_user_type_idx'),
+            # Listes de l'application : transactions actives uniquement (index partiel, plus petit)
+            models.Index(
+                fields=['utilisateur', '-date', '-id'],
+                condition=models.Q(status=ActivatorModel.ACTIVE_STATUS),
+                name='transaction_user_actif_idx',
+            ),
+            # Listes de l'administration, tous utilisateurs : tri, date_hierarchy et filtres par date
+            models.Index(fields=['-date', '-id'], name='transaction_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_type_transaction_display()} - {self.montant} CFA - {self.compte}"
 
+    def clean(self):
+        # Une écriture de virement isolée fausserait les résumés, qui l'excluent
+        if self._state.adding and self.categorie == self.CATEGORIE_VIREMENT:
+            raise ValidationError({'categorie': "Les virements passent par un transfert entre portefeuilles."})
+
+    @property
+    def delta(self):
+        """Effet signé de la transaction sur le solde de l'utilisateur (nul si désactivée)."""
+        if self.status != self.ACTIVE_STATUS:
+            return Decimal('0')
+        montant = Decimal(str(self.montant))
+        if self.type_transaction == 'REVENU':
+            return montant
+        return -montant  # DEPENSE et ECHEC (épargne) sont des débits
+
     # 🔹 Surcharge de save() pour mettre à jour le solde utilisateur
-    def save(self, *args, **kwargs):
+    # verifier_solde=True : lève SoldeInsuffisant (et annule l'insertion) si le solde ne suffit pas
+    def save(self, *args, verifier_solde=False, **kwargs):
         # Vérifie si c'est une nouvelle transaction
-        is_new = self.pk is None
+        # (l'id UUID a une valeur par défaut : self.pk n'est jamais None)
+        is_new = self._state.adding
+
+        with transaction.atomic():
+            ancienne = None
+            transferee = False
+            if is_new:
+                delta = self.delta
+            else:
+                # Modification : on n'applique que la différence avec la version enregistrée
+                ancienne = Transaction.objects.select_for_update().get(pk=self.pk)
+                transferee = ancienne.utilisateur_id != self.utilisateur_id
+                # 🔹 Changement d'utilisateur : l'ancien perd tout l'effet, le nouveau le reçoit en entier
+                delta = self.delta if transferee else self.delta - ancienne.delta
+
+            super().save(*args, **kwargs)
+
+            if transferee:
+                Utilisateur.objects.ajuster_solde(ancienne.utilisateur_id, -ancienne.delta)
+
+            # Toujours exécuté (même si delta est nul) : horodate aussi la dernière opération
+            modifie = Utilisateur.objects.ajuster_solde(self.utilisateur_id, delta, verifier=verifier_solde)
+            if not modifie:
+                raise SoldeInsuffisant(self.utilisateur_id)
+
+            # 🔹 Le solde d'un portefeuille suit ses transactions depuis son rattachement, sans solde
+            # d'ouverture : seul le solde de l'utilisateur bloque une saisie (transferer() vérifie la source)
+            variations = self._variations(ancienne)
+            for compte_id, variation in sorted((k, v) for k, v in variations.items() if k is not None):
+                Compte.objects.ajuster_solde(compte_id, variation)
+            if transferee:
+                # Grand livre par utilisateur : annulation chez l'ancien, correction chez le nouveau
+                LedgerEntry.objects.ecrire(ancienne, {ancienne.portefeuille_id: -ancienne.delta}, 'annulation')
+                LedgerEntry.objects.ecrire(self, {self.portefeuille_id: self.delta}, 'correction')
+            else:
+                LedgerEntry.objects.ecrire(self, variations, 'saisie' if is_new else 'correction')
+            MonthlySummary.objects.appliquer(ajouts=[self], retraits=[ancienne] if ancienne else [])
+            if transferee:
+                # Cache, flux SSE et lecture de ses écritures de l'ancien utilisateur (post_save ne voit que le nouveau)
+                lot_enregistre.send(sender=Transaction, transactions=[ancienne])
+
+    def _variations(self, ancienne):
+        """
+        Effet de l'écriture par portefeuille (None : sans portefeuille) par rapport à la version
+        enregistrée `ancienne` : l'ancien portefeuille est recrédité, le nouveau débité.
+        """
+        variations = defaultdict(Decimal)
+        if ancienne is not None:
+            variations[ancienne.portefeuille_id] -= ancienne.delta
+        variations[self.portefeuille_id] += self.delta
+        return {compte_id: delta for compte_id, delta in variations.items() if delta}
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Utilisateur.objects.ajuster_solde(self.utilisateur_id, -self.delta)
+            if self.portefeuille_id:
+                Compte.objects.ajuster_solde(self.portefeuille_id, -self.delta)
+            LedgerEntry.objects.ecrire(self, {self.portefeuille_id: -self.delta}, 'annulation')
+            MonthlySummary.objects.appliquer(retraits=[self])
+        return result
+
+
+def montant_signe():
+    """
+    Expression SQL équivalente à Transaction.delta, pour les agrégations côté base.
+    """
+    return Case(
+        When(status=ActivatorModel.INACTIVE_STATUS, then=Value(Decimal('0'))),
+        When(type_transaction='REVENU', then=F('montant')),
+        default=-F('montant'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def debut_du_mois(date):
+    return timezone.localtime(date).date().replace(day=1)
+
+
+class MonthlySummaryManager(models.Manager):
+    CLE = ('utilisateur_id', 'mois', 'type_transaction', 'compte', 'categorie')
+
+    def appliquer(self, ajouts=(), retraits=()):
+        """
+        Répercute des transactions ajoutées ou retirées sur les cumuls mensuels :
+        un UPDATE par (utilisateur, mois, type, compte, catégorie) touché, pas de relecture.
+        """
+        variations = defaultdict(lambda: [Decimal('0'), 0])
+        for transactions, signe in ((ajouts, 1), (retraits, -1)):
+            for t in transactions:
+                if t.status != Transaction.ACTIVE_STATUS:
+                    continue
+                cle = (t.utilisateur_id, debut_du_mois(t.date), t.type_transaction, t.compte, t.categorie)
+                variations[cle][0] += signe * Decimal(str(t.montant))
+                variations[cle][1] += signe
+
+        for cle, (total, nombre) in variations.items():
+            if not total and not nombre:
+                continue
+            filtres = dict(zip(self.CLE, cle))
+            maj = {'total': F('total') + total, 'nombre': F('nombre') + nombre}
+            if self.filter(**filtres).update(**maj):
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(**filtres, total=total, nombre=nombre)
+            except IntegrityError:
+                # Ligne créée entre-temps par une écriture concurrente
+                self.filter(**filtres).update(**maj)
+
+
+class MonthlySummary(models.Model):
+    """
+    Cumul des transactions actives par utilisateur, mois, type, compte et catégorie.
+    Maintenu à chaque écriture de Transaction ; reconstructible avec rebuild_monthly_summaries.
+    """
+    utilisateur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='resumes_mensuels',
+        db_index=False  # couvert par la contrainte d'unicité (utilisateur, mois, ...)
+    )
+    mois = models.DateField(verbose_name="Mois")  # premier jour du mois
+    type_transaction = models.CharField(max_length=10, choices=Transaction.TYPE_TRANSACTION)
+    compte = models.CharField(max_length=20, choices=Transaction.COMPTES)
+    categorie = models.CharField(max_length=50, choices=Transaction.CATEGORIES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    nombre = models.PositiveIntegerField(default=0)
+
+    objects = MonthlySummaryManager()
+
+    class Meta:
+        ordering = ['-mois']
+        verbose_name = "Résumé mensuel"
+        verbose_name_plural = "Résumés mensuels"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['utilisateur', 'mois', 'type_transaction', 'compte', 'categorie'],
+                name='monthly_summary_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.utilisateur_id} - {self.mois:%Y-%m} - {self.type_transaction} - {self.total} CFA"
+
+
+
+class LedgerEntryManager(models.Manager):
+    def ecrire(self, transaction_, variations, motif):
+        """Ajoute une écriture par portefeuille touché ({portefeuille_id: montant signé})."""
+        return self.bulk_create([
+            self.model(utilisateur_id=transaction_.utilisateur_id, portefeuille_id=compte_id,
+                       transaction_id=transaction_.pk, montant=montant, motif=motif)
+            for compte_id, montant in variations.items() if montant
+        ])
+
+    def net(self, utilisateur_id):
+        """
+        Somme des écritures de l'utilisateur : dernier point de contrôle + écritures postérieures.
+        Le coût dépend de l'ancienneté du dernier point de contrôle, pas de la taille de l'historique.
+        """
+        point = BalanceCheckpoint.objects.filter(utilisateur_id=utilisateur_id).first()
+        ecritures = self.filter(utilisateur_id=utilisateur_id)
+        base = Decimal('0')
+        if point is not None:
+            ecritures = ecritures.filter(cree_le__gt=point.jusqu_a)
+            base = point.solde
+        return base + (ecritures.aggregate(total=Sum('montant'))['total'] or 0)
+
+    def solde(self, utilisateur):
+        """Solde de l'utilisateur recalculé depuis le grand livre."""
+        return utilisateur.initial_balance + self.net(utilisateur.pk)
+
+
+class LedgerEntry(models.Model):
+    """
+    Grand livre en ajout seul : chaque écriture de Transaction (création, correction,
+    annulation) y ajoute son effet signé, sans jamais modifier les lignes existantes.
+    Un virement produit deux écritures qui s'équilibrent.
+    """
+    MOTIFS = [
+        ('saisie', 'Saisie'),
+        ('correction', 'Correction'),
+        ('annulation', 'Annulation'),
+        ('lot', 'Import par lot'),
+        ('ouverture', "Solde d'ouverture"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    utilisateur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='ecritures',
+        db_index=False  # couvert par ledger_user_date_idx
+    )
+    # 🔹 Sans contrainte en base : l'historique survit à la suppression (ou l'archivage)
+    # de la transaction ou du portefeuille d'origine
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='ecritures'
+    )
+    portefeuille = models.ForeignKey(
+        Compte,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='ecritures'
+    )
+    montant = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Montant signé (CFA)")
+    motif = models.CharField(max_length=20, choices=MOTIFS)
+    cree_le = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = LedgerEntryManager()
+
+    class Meta:
+        ordering = ['cree_le']
+        verbose_name = "Écriture"
+        verbose_name_plural = "Grand livre"
+        indexes = [
+            models.Index(fields=['utilisateur', 'cree_le'], name='ledger_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.utilisateur_id} - {self.montant} CFA - {self.motif}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Les écritures du grand livre ne sont pas modifiables.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Les écritures du grand livre ne sont pas supprimables.")
+
+
+class BalanceCheckpoint(models.Model):
+    """
+    Somme des écritures d'un utilisateur jusqu'à `jusqu_a` (exclu du calcul des écritures
+    suivantes). Créé par la commande checkpoint_ledger avec une marge de temps, pour que
+    les transactions encore en cours à cet instant ne soient pas oubliées.
+    """
+    utilisateur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='points_de_controle',
+        db_index=False  # couvert par checkpoint_user_date_idx
+    )
+    jusqu_a = models.DateTimeField()
+    solde = models.DecimalField(max_digits=14, decimal_places=2)  # somme des écritures (hors solde initial)
+    nombre = models.PositiveIntegerField(default=0)  # nombre d'écritures couvertes depuis le précédent
+    cree_le = models.DateTimeField(auto_now_add=True)
 
-        super().save(*args, **kwargs)  # on sauvegarde d'abord pour générer la PK si nouvelle
+    class Meta:
+        ordering = ['-jusqu_a']
+        verbose_name = "Point de contrôle"
+        verbose_name_plural = "Points de contrôle"
+        indexes = [
+            models.Index(fields=['utilisateur', '-jusqu_a'], name='checkpoint_user_date_idx'),
+        ]
 
-        if is_new:
-            user = self.utilisateur
-            # On initialise le balance si inexistant
-            if not hasattr(user, 'balance'):
-                user.balance = getattr(user, 'initial_balance', 0)
+    def __str__(self):
+        return f"{self.utilisateur_id} - {self.jusqu_a:%Y-%m-%d %H:%M} - {self.solde} CFA"
+
+
+def ajouter_periodes(debut, frequence, nombre):
+    """`debut` + `nombre` périodes ; pour les mois, le jour est ramené au dernier jour du mois si besoin."""
+    if frequence == 'quotidienne':
+        return debut + timedelta(days=nombre)
+    if frequence == 'hebdomadaire':
+        return debut + timedelta(weeks=nombre)
+    mois = nombre * (12 if frequence == 'annuelle' else 1)
+    local = timezone.localtime(debut)
+    annee, mois = divmod(local.month - 1 + mois, 12)
+    annee += local.year
+    jour = min(local.day, monthrange(annee, mois + 1)[1])
+    return local.replace(year=annee, month=mois + 1, day=jour)
+
+
+class RecurringTransaction(BlogBaseModel):
+    """
+    Modèle de transaction répétée (salaire, loyer, abonnement), matérialisé en Transaction
+    par la commande run_recurring_transactions. Les échéances sont calculées depuis `debut`
+    et le nombre d'occurrences déjà créées : pas de dérive d'un mois sur l'autre (31 → 28 → 31).
+    """
+    FREQUENCES = [
+        ('quotidienne', 'Quotidienne'),
+        ('hebdomadaire', 'Hebdomadaire'),
+        ('mensuelle', 'Mensuelle'),
+        ('annuelle', 'Annuelle'),
+    ]
 
-            # Met à jour le solde selon le type
-            if self.type_transaction == 'DEPENSE':
-                user.balance -= self.montant
-            elif self.type_transaction == 'REVENU':
-                user.balance += self.montant
-            elif self.type_transaction == 'ECHEC':  # Épargne, à adapter selon logique
-                user.balance -= self.montant
+    utilisateur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='transactions_recurrentes'
+    )
+    type_transaction = models.CharField(max_length=10, choices=Transaction.TYPE_TRANSACTION, default='DEPENSE')
+    montant = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Montant (CFA)")
+    compte = models.CharField(max_length=20, choices=Transaction.COMPTES, verbose_name="Compte")
+    categorie = models.CharField(max_length=50, choices=Transaction.CATEGORIES, verbose_name="Catégorie")
+    portefeuille = models.ForeignKey(
+        Compte,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transactions_recurrentes'
+    )
+    description = models.CharField(max_length=255, blank=True, null=True, verbose_name="Description")
+
+    frequence = models.CharField(max_length=15, choices=FREQUENCES, default='mensuelle')
+    intervalle = models.PositiveSmallIntegerField(default=1)  # toutes les `intervalle` périodes
+    debut = models.DateTimeField(verbose_name="Première échéance")
+    fin = models.DateTimeField(blank=True, null=True, verbose_name="Dernière échéance possible")
+    occurrences = models.PositiveIntegerField(default=0)  # transactions déjà créées
+    prochaine_echeance = models.DateTimeField(editable=False)
+
+    class Meta:
+        ordering = ['prochaine_echeance']
+        verbose_name = "Transaction récurrente"
+        verbose_name_plural = "Transactions récurrentes"
+        indexes = [
+            # 🔹 Recherche des échéances dues par le planificateur (actives uniquement)
+            models.Index(
+                fields=['prochaine_echeance'],
+                condition=models.Q(status=ActivatorModel.ACTIVE_STATUS),
+                name='recurrente_echeance_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_transaction_display()} - {self.montant} CFA - {self.get_frequence_display()}"
+
+    def echeance(self, numero):
+        return ajouter_periodes(self.debut, self.frequence, numero * self.intervalle)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.prochaine_echeance = self.echeance(self.occurrences)
+        super().save(*args, **kwargs)
 
-   
\ No newline at end of file
+    def materialiser(self, jusqu_a, maximum=None):
+        """
+        Transactions (non enregistrées) de toutes les échéances <= jusqu_a, et avance
+        prochaine_echeance / occurrences en conséquence ; désactive le modèle après `fin`.
+        """
+        nouvelles = []
+        while self.prochaine_echeance <= jusqu_a and (maximum is None or len(nouvelles) < maximum):
+            if self.fin and self.prochaine_echeance > self.fin:
+                break
+            nouvelles.append(Transaction(
+                utilisateur_id=self.utilisateur_id,
+                type_transaction=self.type_transaction,
+                montant=self.montant,
+                compte=self.compte,
+                portefeuille_id=self.portefeuille_id,
+                categorie=self.categorie,
+                description=self.description,
+                date=self.prochaine_echeance,
+                meta={'recurrente': str(self.pk), 'occurrence': self.occurrences},
+            ))
+            self.occurrences += 1
+            self.prochaine_echeance = self.echeance(self.occurrences)
+        if self.fin and self.prochaine_echeance > self.fin:
+            self.status = self.INACTIVE_STATUS
+        return nouvelles
+
+
+class BudgetManager(models.Manager):
+    def avec_depense(self, mois):
+        """
+        Budgets annotés de `depense` : dépenses du mois `mois` dans la catégorie, lues dans
+        MonthlySummary (maintenu à chaque écriture) par l'index (utilisateur, mois, type, ...).
+        """
+        depense = (
+            MonthlySummary.objects
+            .filter(utilisateur=OuterRef('utilisateur'), mois=mois, type_transaction='DEPENSE',
+                    categorie=OuterRef('categorie'))
+            .order_by().values('utilisateur')
+            .annotate(somme=Sum('total')).values('somme')
+        )
+        zero = Value(Decimal('0'), output_field=models.DecimalField(max_digits=14, decimal_places=2))
+        return self.annotate(depense=Coalesce(Subquery(depense), zero))
+
+    def depassement(self, utilisateur_id, categorie, date):
+        """
+        Budget de la catégorie si les dépenses du mois de `date` le dépassent, sinon None.
+        Une seule requête, sans parcourir les transactions du mois.
+        """
+        budget = self.avec_depense(debut_du_mois(date)).filter(
+            utilisateur_id=utilisateur_id, categorie=categorie
+        ).first()
+        if budget is not None and budget.depense > budget.plafond:
+            return budget
+        return None
+
+
+class Budget(models.Model):
+    """Plafond mensuel de dépenses d'un utilisateur pour une catégorie."""
+    utilisateur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='budgets',
+        db_index=False  # couvert par la contrainte d'unicité (utilisateur, categorie)
+    )
+    categorie = models.CharField(max_length=50, choices=Transaction.CATEGORIES, verbose_name="Catégorie")
+    plafond = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Plafond mensuel (CFA)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BudgetManager()
+
+    class Meta:
+        ordering = ['categorie']
+        verbose_name = "Budget"
+        verbose_name_plural = "Budgets"
+        constraints = [
+            models.UniqueConstraint(fields=['utilisateur', 'categorie'], name='budget_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.utilisateur_id} - {self.get_categorie_display()} - {self.plafond} CFA"
+
+
+class TransactionArchiveManager(models.Manager):
+    def limite(self):
+        """Date (exclue) jusqu'à laquelle les transactions ont été archivées, ou None."""
+        return self.aggregate(limite=Max('jusqu_a'))['limite']
+
+
+class TransactionArchive(models.Model):
+    """
+    Fichier d'archive froide (JSON Lines gzip, en lecture seule) des transactions antérieures
+    à `jusqu_a`, écrit par la commande archive_transactions. Les lignes archivées quittent la
+    table Transaction ; leur effet reste dans les soldes, les cumuls mensuels et le grand
+    livre, et leur somme par utilisateur et portefeuille est gardée dans SoldeArchive.
+    """
+    fichier = models.CharField(max_length=255)
+    jusqu_a = models.DateTimeField()
+    nombre = models.PositiveIntegerField(default=0)
+    # Vide tant que l'archivage n'est pas terminé (interrompu : fichier lisible jusqu'au dernier lot)
+    sha256 = models.CharField(max_length=64, blank=True)
+    cree_le = models.DateTimeField(auto_now_add=True)
+
+    objects = TransactionArchiveManager()
+
+    class Meta:
+        ordering = ['-jusqu_a']
+        verbose_name = "Archive de transactions"
+        verbose_name_plural = "Archives de transactions"
+
+    def __str__(self):
+        return f"{self.fichier} ({self.nombre} transactions avant {self.jusqu_a:%Y-%m-%d})"
+
+
+class SoldeArchive(models.Model):
+    """
+    Effet net des transactions archivées d'un utilisateur (et d'un portefeuille), une ligne
+    par lot archivé : rebuild_balances l'ajoute aux transactions restantes.
+    """
+    archive = models.ForeignKey(TransactionArchive, on_delete=models.CASCADE, related_name='soldes')
+    utilisateur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='soldes_archives'
+    )
+    portefeuille = models.ForeignKey(
+        Compte,
+        on_delete=models.SET_NULL,  # comme Transaction.portefeuille
+        null=True,
+        blank=True,
+        related_name='soldes_archives'
+    )
+    net = models.DecimalField(max_digits=14, decimal_places=2)
+    nombre = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Solde archivé"
+        verbose_name_plural = "Soldes archivés"
+
+    def __str__(self):
+        return f"{self.utilisateur_id} - {self.net} CFA ({self.nombre} transactions)"
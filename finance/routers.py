@@ -0,0 +1,100 @@
+"""
+Routage des lectures vers un réplica (alias FINANCE_REPLICA_ALIAS, défini quand
+DB_REPLICA_HOST est renseigné).
+
+Seules les vues décorées par `lecture_replica` lisent sur le réplica, et seulement en
+GET/HEAD : écritures, sessions, authentification et autres vues restent sur 'default'.
+
+Lecture de ses propres écritures : chaque écriture validée pour un utilisateur (voir
+finance/signals.py) ouvre une fenêtre de FINANCE_READ_YOUR_WRITES secondes pendant
+laquelle ses lectures restent sur la base principale, le temps que le réplica rattrape
+son retard. La fenêtre est en cache, donc commune à tous ses appareils.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+LECTURES = ('GET', 'HEAD')
+
+_sur_replica = ContextVar('finance_sur_replica', default=False)
+
+
+def alias_replica():
+    return getattr(settings, 'FINANCE_REPLICA_ALIAS', None)
+
+
+def _cle_ecriture(user_id):
+    return f"finance:ecriture:{user_id}"
+
+
+def marquer_ecriture(user_id):
+    """Garde les lectures de l'utilisateur sur la base principale pendant la fenêtre."""
+    if alias_replica():
+        cache.set(_cle_ecriture(user_id), 1, settings.FINANCE_READ_YOUR_WRITES)
+
+
+def lecture_replica(vue):
+    """
+    Décorateur de vue (sync ou async) : les lectures des modèles de l'application faites
+    pendant la vue partent sur le réplica, sauf écriture récente de l'utilisateur.
+    """
+    if iscoroutinefunction(vue):
+        async def _vue(request, *args, **kwargs):
+            user = await request.auser()
+            replica = (
+                request.method in LECTURES and alias_replica() is not None
+                and not (user.pk and await cache.aget(_cle_ecriture(user.pk)))
+            )
+            jeton = _sur_replica.set(replica)
+            try:
+                return await vue(request, *args, **kwargs)
+            finally:
+                _sur_replica.reset(jeton)
+
+        return wraps(vue)(markcoroutinefunction(_vue))
+
+    @wraps(vue)
+    def _vue(request, *args, **kwargs):
+        # 🔹 request.user est chargé ici, avant d'activer le réplica
+        user_id = request.user.pk
+        replica = (
+            request.method in LECTURES and alias_replica() is not None
+            and not (user_id and cache.get(_cle_ecriture(user_id)))
+        )
+        jeton = _sur_replica.set(replica)
+        try:
+            return vue(request, *args, **kwargs)
+        finally:
+            _sur_replica.reset(jeton)
+
+    return _vue
+
+
+class ReplicaRouter:
+    """Réplica pour les lectures décorées, base principale pour tout le reste."""
+
+    def db_for_read(self, model, **hints):
+        if _sur_replica.get() and model._meta.app_label == 'finance' and alias_replica():
+            return alias_replica()
+        # Explicite : sinon un objet lu sur le réplica y relirait ses relations
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicite : sinon un objet lu sur le réplica y serait enregistré
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, alias_replica()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le réplica reçoit le schéma par la réplication
+        if db == alias_replica():
+            return False
+        return None
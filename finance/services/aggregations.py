@@ -0,0 +1,90 @@
+"""
+Agrégations côté base de données pour le tableau de bord.
+
+Chaque fonction exécute une seule requête (`aggregate` ou `values().annotate()`) sur
+les cumuls mensuels (MonthlySummary) : O(mois) plutôt que O(transactions), et les totaux
+couvrent aussi les transactions archivées (archive_transactions), dont les cumuls sont
+conservés. Les variantes préfixées par `a` sont les mêmes requêtes via l'ORM asynchrone,
+pour les vues ASGI.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from finance.models import MonthlySummary, Transaction
+
+
+def _sommes():
+    """Sommes filtrées par type : revenus, dépenses et épargne."""
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    return {
+        'revenus': Coalesce(Sum('total', filter=Q(type_transaction='REVENU')), zero),
+        'depenses': Coalesce(Sum('total', filter=Q(type_transaction='DEPENSE')), zero),
+        'epargne': Coalesce(Sum('total', filter=Q(type_transaction='ECHEC')), zero),
+    }
+
+
+def _avec_net(totaux):
+    totaux['net'] = totaux['revenus'] - totaux['depenses'] - totaux['epargne']
+    return totaux
+
+
+def _requete_groupee(user, champ):
+    return (
+        MonthlySummary.objects.filter(utilisateur=user)
+        .order_by()  # neutralise Meta.ordering, qui casserait le GROUP BY
+        .values(champ)
+        .annotate(**_sommes())
+    )
+
+
+def _regrouper(lignes, champ, choix):
+    # 🔹 Toutes les clés sont présentes, même sans transaction, pour simplifier les templates
+    resultat = {code: _avec_net({'revenus': 0, 'depenses': 0, 'epargne': 0}) for code, _ in choix}
+    for ligne in lignes:
+        resultat[ligne.pop(champ)] = _avec_net(ligne)
+    return resultat
+
+
+def _totaux_groupes(user, champ, choix):
+    return _regrouper(_requete_groupee(user, champ), champ, choix)
+
+
+def _transactions_resume(user):
+    # Les virements entre portefeuilles (net nul) ne comptent ni en revenus ni en dépenses
+    return MonthlySummary.objects.filter(utilisateur=user).exclude(
+        categorie=Transaction.CATEGORIE_VIREMENT
+    )
+
+
+def _avec_solde(user, totaux):
+    totaux = _avec_net(totaux)
+    totaux['solde'] = user.initial_balance + totaux['net']
+    return totaux
+
+
+def resume_utilisateur(user):
+    """
+    Totaux globaux de l'utilisateur : revenus, dépenses, épargne et solde recalculé.
+    """
+    return _avec_solde(user, _transactions_resume(user).aggregate(**_sommes()))
+
+
+async def aresume_utilisateur(user):
+    return _avec_solde(user, await _transactions_resume(user).aaggregate(**_sommes()))
+
+
+def totaux_par_compte(user):
+    """Totaux par `Transaction.compte` : {'momo': {'revenus', 'depenses', 'epargne', 'net'}, ...}"""
+    return _totaux_groupes(user, 'compte', Transaction.COMPTES)
+
+
+async def atotaux_par_compte(user):
+    lignes = [ligne async for ligne in _requete_groupee(user, 'compte')]
+    return _regrouper(lignes, 'compte', Transaction.COMPTES)
+
+
+def totaux_par_categorie(user):
+    """Totaux par `Transaction.categorie`, même forme que totaux_par_compte()."""
+    return _totaux_groupes(user, 'categorie', Transaction.CATEGORIES)
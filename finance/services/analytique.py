@@ -0,0 +1,73 @@
+"""
+Analyses mensuelles lues depuis MonthlySummary : le coût dépend du nombre de mois
+affichés, pas du nombre de transactions.
+"""
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+from finance.models import MonthlySummary, Transaction, TransactionArchive, debut_du_mois
+
+TAILLE_LOT = 5000
+
+
+def reconstruire_resumes(utilisateurs=None, taille_lot=TAILLE_LOT):
+    """
+    Recalcule les cumuls mensuels depuis les transactions (tous les utilisateurs si None).
+    Les mois archivés (archive_transactions) n'ont plus leurs transactions : leurs cumuls
+    sont conservés tels quels. Retourne le nombre de lignes de cumul créées.
+    """
+    transactions = Transaction.objects.active()
+    resumes = MonthlySummary.objects.all()
+    limite = TransactionArchive.objects.limite()
+    if limite is not None:
+        transactions = transactions.filter(date__gte=limite)
+        resumes = resumes.filter(mois__gte=debut_du_mois(limite))
+    if utilisateurs is not None:
+        transactions = transactions.filter(utilisateur__in=utilisateurs)
+        resumes = resumes.filter(utilisateur__in=utilisateurs)
+
+    lignes = (
+        transactions.order_by()
+        .annotate(mois=TruncMonth('date', output_field=DateField()))
+        .values('utilisateur_id', 'mois', 'type_transaction', 'compte', 'categorie')
+        .annotate(total=Sum('montant'), nombre=Count('id'))
+    )
+
+    total = 0
+    with transaction.atomic():
+        resumes.delete()
+        lot = []
+        for ligne in lignes.iterator(chunk_size=taille_lot):
+            lot.append(MonthlySummary(**ligne))
+            if len(lot) >= taille_lot:
+                total += len(MonthlySummary.objects.bulk_create(lot))
+                lot = []
+        if lot:
+            total += len(MonthlySummary.objects.bulk_create(lot))
+    return total
+
+
+def revenus_depenses_par_mois(user, depuis=None):
+    """[{'mois': date, 'REVENU': x, 'DEPENSE': y, 'ECHEC': z}, ...] du plus récent au plus ancien."""
+    resumes = MonthlySummary.objects.filter(utilisateur=user).exclude(categorie=Transaction.CATEGORIE_VIREMENT)
+    if depuis:
+        resumes = resumes.filter(mois__gte=depuis)
+    par_mois = {}
+    for ligne in resumes.values('mois', 'type_transaction').annotate(total=Sum('total')).order_by('-mois'):
+        mois = par_mois.setdefault(ligne['mois'], {'mois': ligne['mois'], 'REVENU': 0, 'DEPENSE': 0, 'ECHEC': 0})
+        mois[ligne['type_transaction']] = ligne['total']
+    return list(par_mois.values())
+
+
+def depenses_par_categorie(user, depuis=None):
+    """[(categorie, libellé, total), ...] des dépenses, de la plus forte à la plus faible."""
+    resumes = MonthlySummary.objects.filter(utilisateur=user, type_transaction='DEPENSE').exclude(
+        categorie=Transaction.CATEGORIE_VIREMENT
+    )
+    if depuis:
+        resumes = resumes.filter(mois__gte=depuis)
+    libelles = dict(Transaction.CATEGORIES)
+    lignes = resumes.values('categorie').annotate(total=Sum('total')).order_by('-total')
+    return [(ligne['categorie'], libelles.get(ligne['categorie'], ligne['categorie']), ligne['total'])
+            for ligne in lignes]
@@ -0,0 +1,106 @@
+"""
+Archivage froid des transactions anciennes (commande archive_transactions).
+
+Les transactions antérieures à une limite (premier jour d'un mois, heure locale) sont
+écrites dans un fichier JSON Lines compressé (gzip), mis en lecture seule, puis supprimées
+de la table par lots. La suppression passe par un DELETE SQL direct, pas par
+Transaction.delete() : soldes, cumuls mensuels et grand livre gardent leur effet. L'effet
+net de chaque lot par utilisateur et portefeuille est conservé dans SoldeArchive pour
+rebuild_balances.
+
+Chaque lot est écrit et synchronisé sur disque avant la validation de sa suppression :
+une interruption laisse un fichier lisible jusqu'au dernier lot validé.
+"""
+import gzip
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from finance.models import SoldeArchive, Transaction, TransactionArchive, Utilisateur
+from finance.services.grand_livre import creer_points_de_controle
+
+TAILLE_LOT = 2000
+CHAMPS = tuple(champ.attname for champ in Transaction._meta.concrete_fields)
+
+
+def limite_de_retention(mois, maintenant=None):
+    """Premier jour (minuit local) du mois situé `mois` mois avant celui de `maintenant`."""
+    jour = timezone.localtime(maintenant or timezone.now()).date()
+    annee, numero = divmod(jour.year * 12 + jour.month - 1 - mois, 12)
+    return timezone.make_aware(datetime.combine(jour.replace(year=annee, month=numero + 1, day=1), time.min))
+
+
+def archiver(jusqu_a, dossier, taille_lot=TAILLE_LOT):
+    """
+    Archive puis supprime les transactions datées avant `jusqu_a`.
+    Retourne l'archive créée, ou None s'il n'y avait rien à archiver.
+    """
+    if not Transaction.objects.filter(date__lt=jusqu_a).exists():
+        return None
+
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin = dossier / f"transactions-avant-{jusqu_a:%Y%m%d}-{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz"
+    archive = TransactionArchive.objects.create(fichier=str(chemin), jusqu_a=jusqu_a)
+    cle_primaire = Transaction._meta.pk
+    table = connection.ops.quote_name(Transaction._meta.db_table)
+    utilisateurs = set()
+
+    with gzip.open(chemin, 'xt', encoding='utf-8') as sortie:
+        while True:
+            with transaction.atomic():
+                lot = list(
+                    Transaction.objects.select_for_update().filter(date__lt=jusqu_a)
+                    .order_by('pk').values(*CHAMPS)[:taille_lot]
+                )
+                if not lot:
+                    break
+
+                nets = defaultdict(lambda: [Decimal('0'), 0])
+                for ligne in lot:
+                    sortie.write(json.dumps(ligne, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+                    net = nets[ligne['utilisateur_id'], ligne['portefeuille_id']]
+                    net[0] += Transaction(**ligne).delta
+                    net[1] += 1
+                # 🔹 Sur disque avant de supprimer quoi que ce soit
+                sortie.flush()
+                os.fsync(sortie.buffer.fileno())
+
+                SoldeArchive.objects.bulk_create([
+                    SoldeArchive(archive=archive, utilisateur_id=utilisateur_id, portefeuille_id=portefeuille_id,
+                                 net=net, nombre=nombre)
+                    for (utilisateur_id, portefeuille_id), (net, nombre) in nets.items()
+                ])
+                ids = [cle_primaire.get_db_prep_value(ligne['id'], connection) for ligne in lot]
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+                TransactionArchive.objects.filter(pk=archive.pk).update(nombre=F('nombre') + len(lot))
+                utilisateurs.update(utilisateur_id for utilisateur_id, _ in nets)
+
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(1 << 20), b''):
+            empreinte.update(bloc)
+    chemin.chmod(0o444)
+    TransactionArchive.objects.filter(pk=archive.pk).update(sha256=empreinte.hexdigest())
+
+    # Point de contrôle du grand livre pour les utilisateurs archivés
+    creer_points_de_controle(Utilisateur.objects.filter(pk__in=utilisateurs))
+    archive.refresh_from_db()
+    return archive
+
+
+def lire_archive(chemin):
+    """Lignes d'un fichier d'archive (dictionnaires des champs de Transaction, valeurs JSON)."""
+    with gzip.open(chemin, 'rt', encoding='utf-8') as entree:
+        for ligne in entree:
+            yield json.loads(ligne)
@@ -0,0 +1,163 @@
+"""
+Cache par utilisateur du tableau de bord (solde, dernières transactions, totaux par compte).
+
+Les clés incluent un numéro de version propre à l'utilisateur, incrémenté à chaque
+écriture de transaction (voir finance/signals.py) : une écriture rend immédiatement
+inaccessibles les anciennes entrées, qui expirent ensuite d'elles-mêmes.
+
+L'utilisateur connecté (request.user) est aussi mis en cache par
+finance.backends.CachedModelBackend, sous une clé versionnée de la même façon.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from finance.services.aggregations import atotaux_par_compte, totaux_par_compte
+
+DERNIERES_TRANSACTIONS = 10
+
+_compteurs = Counter()
+_verrou = threading.Lock()
+
+
+def _compter(nom):
+    with _verrou:
+        _compteurs[nom] += 1
+
+
+def statistiques():
+    """Compteurs de ce processus : {'hits': ..., 'misses': ..., 'invalidations': ...}"""
+    with _verrou:
+        return {nom: _compteurs[nom] for nom in ('hits', 'misses', 'invalidations')}
+
+
+def _cle_version(user_id):
+    return f"finance:version:{user_id}"
+
+
+def version(user_id):
+    cle = _cle_version(user_id)
+    valeur = cache.get(cle)
+    if valeur is None:
+        # 🔹 Version initiale horodatée : si la clé a été évincée, on ne retombe pas
+        # sur une ancienne version dont les entrées seraient encore en cache
+        cache.add(cle, time.time_ns(), None)
+        valeur = cache.get(cle)
+    return valeur
+
+
+async def aversion(user_id):
+    cle = _cle_version(user_id)
+    valeur = await cache.aget(cle)
+    if valeur is None:
+        await cache.aadd(cle, time.time_ns(), None)
+        valeur = await cache.aget(cle)
+    return valeur
+
+
+def _changer_version(user_id):
+    try:
+        cache.incr(_cle_version(user_id))
+    except ValueError:
+        cache.set(_cle_version(user_id), time.time_ns(), None)
+
+
+def invalider(user_id):
+    """Rend obsolètes toutes les entrées en cache de l'utilisateur."""
+    _compter('invalidations')
+    _changer_version(user_id)
+
+
+def _cle_utilisateur(user_id, version_):
+    return f"finance:user:{user_id}:{version_}"
+
+
+def utilisateur(user_id, charger):
+    """
+    Utilisateur en cache, ou charger(user_id) mis en cache s'il existe.
+    La clé porte la version lue avant le chargement : si une écriture invalide le cache
+    pendant le chargement, l'entrée écrite est déjà obsolète et ne sera jamais relue.
+    """
+    cle = _cle_utilisateur(user_id, version(user_id))
+    user = cache.get(cle)
+    if user is None:
+        user = charger(user_id)
+        if user is not None:
+            cache.set(cle, user, settings.FINANCE_USER_CACHE_TIMEOUT)
+    return user
+
+
+async def autilisateur(user_id, charger):
+    """Version asynchrone de utilisateur() ; `charger` est une coroutine."""
+    cle = _cle_utilisateur(user_id, await aversion(user_id))
+    user = await cache.aget(cle)
+    if user is None:
+        user = await charger(user_id)
+        if user is not None:
+            await cache.aset(cle, user, settings.FINANCE_USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalider_utilisateur(user_id):
+    """Utilisateur enregistré (profil, mot de passe, ...) : ses entrées en cache deviennent obsolètes."""
+    _changer_version(user_id)
+
+
+def _solde(user):
+    return get_user_model().objects.filter(pk=user.pk).values_list('balance', flat=True).first()
+
+
+async def _asolde(user):
+    return await get_user_model().objects.filter(pk=user.pk).values_list('balance', flat=True).afirst()
+
+
+def tableau_de_bord(user):
+    cle = f"finance:dashboard:{user.pk}:{version(user.pk)}"
+    resume = cache.get(cle)
+    if resume is not None:
+        _compter('hits')
+        return resume
+
+    _compter('misses')
+    resume = {
+        # 🔹 Relu en base après la version : `user.balance` (lu plus tôt dans la requête) peut
+        # précéder une écriture validée entre-temps, qui serait figée sous la nouvelle clé
+        'solde': _solde(user),
+        'transactions': list(
+            user.transactions.active()
+            .order_by('-date', '-id')
+            .values('id', 'type_transaction', 'montant', 'compte', 'categorie', 'description', 'date')
+            [:DERNIERES_TRANSACTIONS]
+        ),
+        'par_compte': totaux_par_compte(user),
+    }
+    cache.set(cle, resume, settings.FINANCE_CACHE_TIMEOUT)
+    return resume
+
+
+async def atableau_de_bord(user):
+    """Version asynchrone de tableau_de_bord(), mêmes clés de cache."""
+    cle = f"finance:dashboard:{user.pk}:{await aversion(user.pk)}"
+    resume = await cache.aget(cle)
+    if resume is not None:
+        _compter('hits')
+        return resume
+
+    _compter('misses')
+    transactions = (
+        user.transactions.active()
+        .order_by('-date', '-id')
+        .values('id', 'type_transaction', 'montant', 'compte', 'categorie', 'description', 'date')
+        [:DERNIERES_TRANSACTIONS]
+    )
+    resume = {
+        'solde': await _asolde(user),
+        'transactions': [t async for t in transactions],
+        'par_compte': await atotaux_par_compte(user),
+    }
+    await cache.aset(cle, resume, settings.FINANCE_CACHE_TIMEOUT)
+    return resume
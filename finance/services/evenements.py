@@ -0,0 +1,110 @@
+"""
+Diffusion d'événements par utilisateur (solde, nouvelle transaction) vers les flux SSE.
+
+Le broker est choisi par settings.FINANCE_EVENT_BROKER (chemin pointé). MemoireBroker
+fonctionne dans un seul processus : avec plusieurs workers, il faut un broker partagé
+(Redis pub/sub, LISTEN/NOTIFY...) implémentant la même interface.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+TAILLE_FILE = 100
+
+
+class Broker:
+    """Interface : publier() est appelé depuis du code synchrone, abonner() depuis une boucle asyncio."""
+
+    def publier(self, user_id, type_evenement, donnees):
+        raise NotImplementedError
+
+    def abonner(self, user_id):
+        """Retourne un abonnement : `await abonnement.recevoir()` puis `abonnement.fermer()`."""
+        raise NotImplementedError
+
+    def a_des_abonnes(self, user_id):
+        # Un broker distant ne sait pas si un autre processus écoute : on publie toujours
+        return True
+
+
+class Abonnement:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.boucle = asyncio.get_running_loop()
+        self.file = asyncio.Queue(maxsize=TAILLE_FILE)
+
+    async def recevoir(self):
+        """(type, données) du prochain événement."""
+        return await self.file.get()
+
+    def deposer(self, evenement):
+        # Exécuté dans la boucle de l'abonné ; un client trop lent perd les événements en trop
+        # (le prochain événement 'solde' le remet à jour)
+        try:
+            self.file.put_nowait(evenement)
+        except asyncio.QueueFull:
+            pass
+
+    def fermer(self):
+        self.broker.desabonner(self)
+
+
+class MemoireBroker(Broker):
+    def __init__(self):
+        self._abonnements = defaultdict(set)
+        self._verrou = threading.Lock()
+
+    def abonner(self, user_id):
+        abonnement = Abonnement(self, user_id)
+        with self._verrou:
+            self._abonnements[user_id].add(abonnement)
+        return abonnement
+
+    def desabonner(self, abonnement):
+        with self._verrou:
+            abonnes = self._abonnements.get(abonnement.user_id)
+            if abonnes is not None:
+                abonnes.discard(abonnement)
+                if not abonnes:
+                    del self._abonnements[abonnement.user_id]
+
+    def a_des_abonnes(self, user_id):
+        with self._verrou:
+            return bool(self._abonnements.get(user_id))
+
+    def publier(self, user_id, type_evenement, donnees):
+        with self._verrou:
+            abonnes = list(self._abonnements.get(user_id, ()))
+        for abonnement in abonnes:
+            # 🔹 publier() s'exécute dans le thread de la requête qui écrit :
+            # la file asyncio n'est manipulée que depuis sa propre boucle
+            try:
+                abonnement.boucle.call_soon_threadsafe(abonnement.deposer, (type_evenement, donnees))
+            except RuntimeError:
+                # boucle fermée : abonné disparu sans se désabonner
+                self.desabonner(abonnement)
+
+
+@cache
+def broker():
+    return import_string(settings.FINANCE_EVENT_BROKER)()
+
+
+@receiver(setting_changed)
+def _reinitialiser_broker(setting, **kwargs):
+    if setting == 'FINANCE_EVENT_BROKER':
+        broker.cache_clear()
+
+
+def format_sse(type_evenement, donnees):
+    """Un message au format text/event-stream."""
+    return f"event: {type_evenement}\ndata: {json.dumps(donnees, cls=DjangoJSONEncoder)}\n\n"
@@ -0,0 +1,69 @@
+"""
+Export en flux de l'historique des transactions (CSV ou JSON).
+
+Les lignes sont lues avec `queryset.iterator(chunk_size=...)` et produites une à une :
+la mémoire utilisée ne dépend pas du volume exporté, et les premiers octets partent
+avant la fin de la requête SQL. Les colonnes sont celles attendues par l'import CSV.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from finance.models import Transaction
+
+CHAMPS = ('date', 'type_transaction', 'montant', 'compte', 'categorie', 'description')
+TAILLE_BLOC = 2000
+
+
+class _Tampon:
+    """Pseudo-fichier : csv.writer écrit une ligne, on la renvoie directement."""
+
+    def write(self, valeur):
+        return valeur
+
+
+def transactions_a_exporter(utilisateur=None, debut=None, fin=None, compte=None, categorie=None):
+    """Transactions actives filtrées, dans l'ordre chronologique. `utilisateur=None` : tous."""
+    queryset = Transaction.objects.active()
+    if utilisateur is not None:
+        queryset = queryset.filter(utilisateur=utilisateur)
+    if debut:
+        queryset = queryset.filter(date__date__gte=debut)
+    if fin:
+        queryset = queryset.filter(date__date__lte=fin)
+    if compte:
+        queryset = queryset.filter(compte=compte)
+    if categorie:
+        queryset = queryset.filter(categorie=categorie)
+    return queryset.order_by('date', 'id')
+
+
+def _colonnes(avec_utilisateur):
+    return (('utilisateur__phone_number',) if avec_utilisateur else ()) + CHAMPS
+
+
+def lignes_csv(queryset, avec_utilisateur=False, taille_bloc=TAILLE_BLOC):
+    colonnes = _colonnes(avec_utilisateur)
+    writer = csv.writer(_Tampon())
+    yield writer.writerow(['phone_number' if c == 'utilisateur__phone_number' else c for c in colonnes])
+    for ligne in queryset.values_list(*colonnes).iterator(chunk_size=taille_bloc):
+        yield writer.writerow(ligne)
+
+
+def lignes_json(queryset, avec_utilisateur=False, taille_bloc=TAILLE_BLOC):
+    """Un tableau JSON, produit élément par élément."""
+    colonnes = _colonnes(avec_utilisateur)
+    separateur = '[\n'
+    for ligne in queryset.values(*colonnes).iterator(chunk_size=taille_bloc):
+        if avec_utilisateur:
+            ligne['phone_number'] = ligne.pop('utilisateur__phone_number')
+        yield separateur + json.dumps(ligne, cls=DjangoJSONEncoder, ensure_ascii=False)
+        separateur = ',\n'
+    yield '[]\n' if separateur == '[\n' else '\n]\n'
+
+
+FORMATS = {
+    'csv': (lignes_csv, 'text/csv; charset=utf-8'),
+    'json': (lignes_json, 'application/json'),
+}
@@ -0,0 +1,59 @@
+"""
+Génération de jeux de données volumineux pour les benchmarks.
+
+Les utilisateurs passent par UtilisateurManager.create_user ; les transactions sont
+insérées par lots avec Transaction.objects.enregistrer_lot() (bulk_create et un seul
+ajustement du solde par lot).
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from finance.models import Transaction, Utilisateur
+
+TYPES = [code for code, _ in Transaction.TYPE_TRANSACTION]
+COMPTES = [code for code, _ in Transaction.COMPTES]
+CATEGORIES = [code for code, _ in Transaction.CATEGORIES_SAISIE]
+
+
+def generer_donnees(nb_utilisateurs, nb_transactions, taille_lot=5000, jours=3 * 365,
+                    prefixe='09', graine=None):
+    """
+    Crée `nb_utilisateurs` utilisateurs ayant chacun `nb_transactions` transactions
+    réparties sur les `jours` derniers jours. Retourne la liste des utilisateurs créés.
+    """
+    aleatoire = random.Random(graine)
+    maintenant = timezone.now()
+    utilisateurs = []
+
+    for i in range(nb_utilisateurs):
+        with transaction.atomic():
+            user = Utilisateur.objects.create_user(
+                phone_number=f"{prefixe}{i:08d}",
+                first_name="Bench",
+                last_name=str(i),
+                initial_balance=Decimal('100000'),
+            )
+            lot = []
+            for _ in range(nb_transactions):
+                t = Transaction(
+                    utilisateur=user,
+                    type_transaction=aleatoire.choice(TYPES),
+                    montant=Decimal(aleatoire.randint(100, 50000)),
+                    compte=aleatoire.choice(COMPTES),
+                    categorie=aleatoire.choice(CATEGORIES),
+                    description=f"Transaction {aleatoire.randint(1, 10**6)}",
+                    date=maintenant - timedelta(seconds=aleatoire.randint(0, jours * 86400)),
+                )
+                lot.append(t)
+                if len(lot) >= taille_lot:
+                    Transaction.objects.enregistrer_lot(lot)
+                    lot = []
+            if lot:
+                Transaction.objects.enregistrer_lot(lot)
+        utilisateurs.append(user)
+
+    return utilisateurs
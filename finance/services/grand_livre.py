@@ -0,0 +1,81 @@
+"""
+Points de contrôle et vérification du grand livre (LedgerEntry).
+
+Le solde d'un utilisateur se recalcule comme : solde initial + dernier point de contrôle
++ écritures postérieures (LedgerEntry.objects.solde). Les points de contrôle sont pris
+avec une marge de temps : une écriture horodatée avant `jusqu_a` mais validée après
+(transaction SQL plus longue que la marge) serait oubliée, ce que verifier() signale.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from finance.models import BalanceCheckpoint, LedgerEntry, Utilisateur
+
+MARGE = timedelta(minutes=5)
+TAILLE_LOT = 5000
+
+
+def creer_points_de_controle(utilisateurs=None, marge=MARGE):
+    """
+    Un point de contrôle par utilisateur ayant de nouvelles écritures depuis le précédent.
+    Seules les écritures postérieures au précédent point sont sommées.
+    Retourne le nombre de points créés.
+    """
+    jusqu_a = timezone.now() - marge
+    utilisateurs = Utilisateur.objects.all() if utilisateurs is None else utilisateurs
+
+    crees = 0
+    for user_id in utilisateurs.values_list('pk', flat=True).iterator():
+        precedent = BalanceCheckpoint.objects.filter(utilisateur_id=user_id).first()
+        ecritures = LedgerEntry.objects.filter(utilisateur_id=user_id, cree_le__lte=jusqu_a)
+        base = Decimal('0')
+        if precedent is not None:
+            if precedent.jusqu_a >= jusqu_a:
+                continue
+            ecritures = ecritures.filter(cree_le__gt=precedent.jusqu_a)
+            base = precedent.solde
+
+        totaux = ecritures.aggregate(total=Sum('montant'), nombre=Count('id'))
+        if not totaux['nombre']:
+            continue
+        BalanceCheckpoint.objects.create(
+            utilisateur_id=user_id, jusqu_a=jusqu_a, solde=base + totaux['total'], nombre=totaux['nombre']
+        )
+        crees += 1
+    return crees
+
+
+def verifier(utilisateurs=None, taille_lot=TAILLE_LOT):
+    """
+    Parcourt en flux tout l'historique de chaque utilisateur et produit un message
+    (utilisateur, texte) pour chaque point de contrôle ou solde stocké incohérent.
+    """
+    utilisateurs = Utilisateur.objects.all() if utilisateurs is None else utilisateurs
+    utilisateurs = utilisateurs.only('pk', 'phone_number', 'initial_balance', 'balance').order_by('pk')
+
+    for user in utilisateurs.iterator():
+        points = list(BalanceCheckpoint.objects.filter(utilisateur=user).order_by('jusqu_a'))
+        ecritures = (
+            LedgerEntry.objects.filter(utilisateur=user).order_by('cree_le')
+            .values_list('cree_le', 'montant')
+        )
+
+        cumul = Decimal('0')
+        for cree_le, montant in ecritures.iterator(chunk_size=taille_lot):
+            while points and cree_le > points[0].jusqu_a:
+                yield from _controler(user, points.pop(0), cumul)
+            cumul += montant
+        for point in points:
+            yield from _controler(user, point, cumul)
+
+        attendu = user.initial_balance + cumul
+        if attendu != user.balance:
+            yield user, f"solde stocké {user.balance}, grand livre {attendu}"
+
+
+def _controler(user, point, cumul):
+    if point.solde != cumul:
+        yield user, f"point de contrôle du {point.jusqu_a:%Y-%m-%d %H:%M:%S} : {point.solde}, grand livre {cumul}"
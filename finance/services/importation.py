@@ -0,0 +1,132 @@
+"""
+Import en masse de transactions depuis un fichier CSV (relevés MTN MoMo, Orange Money, ...).
+
+Le fichier est lu ligne par ligne (jamais chargé en mémoire en entier) ; les lignes valides
+sont insérées par lots via Transaction.objects.enregistrer_lot(), le tout dans un seul bloc
+atomique : une erreur sur n'importe quelle ligne annule l'import complet.
+
+Colonnes attendues (en-tête obligatoire) :
+    date, type_transaction, montant, compte, categorie[, description]
+Les valeurs de type/compte/catégorie acceptent le code ou le libellé (ex. « momo » ou « MoMo »).
+"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from finance.models import Transaction
+
+TAILLE_LOT = 1000
+COLONNES_REQUISES = ('date', 'type_transaction', 'montant', 'compte', 'categorie')
+FORMATS_DATE = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y', '%Y-%m-%d')
+
+
+class ErreurImport(Exception):
+    def __init__(self, ligne, message):
+        self.ligne = ligne
+        super().__init__(f"Ligne {ligne} : {message}")
+
+
+def _correspondances(choix):
+    """{'momo': 'momo', 'MoMo'.lower(): 'momo', ...} : code ou libellé, sans casse."""
+    table = {}
+    for code, libelle in choix:
+        table[code.lower()] = code
+        table[libelle.lower()] = code
+    return table
+
+
+TYPES = _correspondances(Transaction.TYPE_TRANSACTION)
+COMPTES = _correspondances(Transaction.COMPTES)
+CATEGORIES = _correspondances(Transaction.CATEGORIES_SAISIE)
+
+
+def lire_csv(fichier, encodage='utf-8-sig'):
+    """Itère sur les lignes d'un fichier binaire (upload Django ou fichier ouvert en 'rb')."""
+    texte = io.TextIOWrapper(fichier, encoding=encodage, newline='')
+    lecteur = csv.DictReader(texte)
+    manquantes = set(COLONNES_REQUISES) - set(lecteur.fieldnames or ())
+    if manquantes:
+        raise ErreurImport(1, f"colonnes manquantes : {', '.join(sorted(manquantes))}")
+    yield from lecteur
+
+
+def _choix(valeur, table, nom, numero):
+    code = table.get((valeur or '').strip().lower())
+    if code is None:
+        raise ErreurImport(numero, f"{nom} inconnu : {valeur!r}")
+    return code
+
+
+def _date(valeur, numero):
+    valeur = (valeur or '').strip()
+    try:
+        date = parse_datetime(valeur)
+    except ValueError:
+        # Bien formée mais impossible (ex. 2024-02-30T10:00)
+        raise ErreurImport(numero, f"date invalide : {valeur!r}")
+    if date is None:
+        for fmt in FORMATS_DATE:
+            try:
+                date = datetime.strptime(valeur, fmt)
+                break
+            except ValueError:
+                continue
+    if date is None:
+        raise ErreurImport(numero, f"date invalide : {valeur!r}")
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def _montant(valeur, numero):
+    # « 1 250,50 » (relevés mobile money) comme « 1250.50 »
+    brut = (valeur or '').replace('\u00a0', '').replace(' ', '').replace(',', '.')
+    try:
+        montant = Decimal(brut)
+    except InvalidOperation:
+        raise ErreurImport(numero, f"montant invalide : {valeur!r}")
+    if not montant.is_finite() or montant <= 0:
+        raise ErreurImport(numero, f"montant invalide : {valeur!r}")
+    # 🔹 Chiffres et décimales du champ (12 chiffres, 2 décimales) : sinon erreur SQL ou ligne illisible
+    try:
+        return Transaction._meta.get_field('montant').clean(montant, None)
+    except ValidationError:
+        raise ErreurImport(numero, f"montant invalide : {valeur!r}")
+
+
+def construire_transaction(user, ligne, numero):
+    return Transaction(
+        utilisateur=user,
+        date=_date(ligne.get('date'), numero),
+        type_transaction=_choix(ligne.get('type_transaction'), TYPES, "type", numero),
+        montant=_montant(ligne.get('montant'), numero),
+        compte=_choix(ligne.get('compte'), COMPTES, "compte", numero),
+        categorie=_choix(ligne.get('categorie'), CATEGORIES, "catégorie", numero),
+        description=(ligne.get('description') or '').strip()[:255] or None,
+        meta={'import': True},
+    )
+
+
+def importer_transactions(user, lignes, taille_lot=TAILLE_LOT):
+    """
+    Importe les lignes (dictionnaires, ex. lire_csv()) pour `user`.
+    Retourne le nombre de transactions créées ; lève ErreurImport sans rien écrire en cas d'erreur.
+    """
+    total = 0
+    with transaction.atomic():
+        lot = []
+        # Numéro de ligne du fichier : l'en-tête est la ligne 1
+        for numero, ligne in enumerate(lignes, start=2):
+            lot.append(construire_transaction(user, ligne, numero))
+            if len(lot) >= taille_lot:
+                total += len(Transaction.objects.enregistrer_lot(lot))
+                lot = []
+        if lot:
+            total += len(Transaction.objects.enregistrer_lot(lot))
+    return total
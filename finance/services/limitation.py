@@ -0,0 +1,88 @@
+"""
+Limitation des tentatives de connexion, par numéro de téléphone et par IP.
+
+Fenêtre glissante approchée par deux compteurs de cache à fenêtre fixe (courante et
+précédente, pondérée par la part de la fenêtre précédente encore couverte). cache.incr
+est atomique sur Redis/Memcached, le comptage est donc partagé entre les workers.
+
+Le numéro compte toutes ses tentatives (remis à zéro par un login réussi) ; l'IP ne compte
+que les échecs : derrière un proxy ou un NAT d'opérateur, beaucoup de clients légitimes
+partagent la même adresse.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _cle(portee, identifiant, indice):
+    return f"finance:login:{portee}:{identifiant}:{indice}"
+
+
+def _fenetre():
+    return settings.FINANCE_LOGIN_WINDOW
+
+
+def tentatives(portee, identifiant, maintenant=None):
+    """Nombre estimé de tentatives sur la dernière fenêtre."""
+    maintenant = time.time() if maintenant is None else maintenant
+    fenetre = _fenetre()
+    indice, ecoule = divmod(maintenant, fenetre)
+    indice = int(indice)
+    valeurs = cache.get_many([_cle(portee, identifiant, indice), _cle(portee, identifiant, indice - 1)])
+    courante = valeurs.get(_cle(portee, identifiant, indice), 0)
+    precedente = valeurs.get(_cle(portee, identifiant, indice - 1), 0)
+    return courante + precedente * (1 - ecoule / fenetre)
+
+
+def _incrementer(portee, identifiant, maintenant):
+    cle = _cle(portee, identifiant, int(maintenant // _fenetre()))
+    # add() ne fait rien si la clé existe ; la clé vit deux fenêtres (courante + précédente)
+    cache.add(cle, 0, timeout=2 * _fenetre())
+    try:
+        cache.incr(cle)
+    except ValueError:
+        # clé expirée entre add() et incr()
+        cache.set(cle, 1, timeout=2 * _fenetre())
+
+
+def adresse_client(request):
+    """
+    IP du client : REMOTE_ADDR, ou, derrière FINANCE_LOGIN_TRUSTED_PROXIES proxys de confiance,
+    l'adresse que le plus éloigné d'entre eux a ajoutée à X-Forwarded-For.
+    """
+    proxys = settings.FINANCE_LOGIN_TRUSTED_PROXIES
+    if proxys > 0:
+        # Seules les `proxys` dernières entrées sont fiables : le client peut forger les précédentes
+        adresses = [a.strip() for a in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if a.strip()]
+        if len(adresses) >= proxys:
+            return adresses[-proxys]
+    return request.META.get('REMOTE_ADDR')
+
+
+def tentative_autorisee(phone_number, ip):
+    """
+    Retourne False si le numéro ou l'IP a dépassé sa limite (sans rien compter),
+    sinon enregistre la tentative pour le numéro et retourne True.
+    """
+    maintenant = time.time()
+    limites = [('phone', phone_number, settings.FINANCE_LOGIN_MAX_PER_PHONE)]
+    if ip:
+        limites.append(('ip', ip, settings.FINANCE_LOGIN_MAX_PER_IP))
+
+    if any(tentatives(portee, ident, maintenant) >= maximum for portee, ident, maximum in limites):
+        return False
+    _incrementer('phone', phone_number, maintenant)
+    return True
+
+
+def connexion_echouee(ip):
+    """Compte un échec d'authentification pour l'IP."""
+    if ip:
+        _incrementer('ip', ip, time.time())
+
+
+def connexion_reussie(phone_number):
+    """Remet à zéro le compteur du numéro après un login réussi."""
+    indice = int(time.time() // _fenetre())
+    cache.delete_many([_cle('phone', phone_number, indice), _cle('phone', phone_number, indice - 1)])
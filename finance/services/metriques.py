@@ -0,0 +1,100 @@
+"""
+Compteurs de performance par vue (temps total, requêtes SQL, temps SQL, N+1, doublons),
+alimentés par finance.middleware.InstrumentationMiddleware et exposés au format texte
+Prometheus par /metrics/. Les compteurs sont propres au processus.
+"""
+import threading
+from collections import defaultdict
+
+from finance.services import cache as cache_finance
+
+# Bornes (secondes) de l'histogramme des durées de requête
+BORNES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_verrou = threading.Lock()
+
+
+def _vue_vide():
+    return {
+        'requetes': 0,
+        'duree': 0.0,
+        'sql': 0,
+        'duree_sql': 0.0,
+        'n_plus_un': 0,
+        'doublons': 0,
+        'buckets': [0] * len(BORNES),
+    }
+
+
+_vues = defaultdict(_vue_vide)
+
+
+def enregistrer(vue, duree, nb_sql, duree_sql, n_plus_un, doublons):
+    with _verrou:
+        stats = _vues[vue]
+        stats['requetes'] += 1
+        stats['duree'] += duree
+        stats['sql'] += nb_sql
+        stats['duree_sql'] += duree_sql
+        stats['n_plus_un'] += n_plus_un
+        stats['doublons'] += doublons
+        for i, borne in enumerate(BORNES):
+            if duree <= borne:
+                stats['buckets'][i] += 1
+
+
+def reinitialiser():
+    with _verrou:
+        _vues.clear()
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_prometheus():
+    with _verrou:
+        vues = {vue: dict(stats, buckets=list(stats['buckets'])) for vue, stats in _vues.items()}
+
+    lignes = []
+
+    def metrique(nom, type_, aide, valeurs):
+        lignes.append(f"# HELP {nom} {aide}")
+        lignes.append(f"# TYPE {nom} {type_}")
+        for labels, valeur in valeurs:
+            etiquettes = ','.join(f'{cle}="{_echapper(v)}"' for cle, v in labels.items())
+            lignes.append(f"{nom}{{{etiquettes}}} {valeur}" if etiquettes else f"{nom} {valeur}")
+
+    metrique('flowfunds_requests_total', 'counter', "Requêtes HTTP traitées par vue.",
+             [({'view': vue}, s['requetes']) for vue, s in vues.items()])
+
+    histogramme = []
+    for vue, s in vues.items():
+        for borne, nombre in zip(BORNES, s['buckets']):
+            histogramme.append(({'view': vue, 'le': borne}, nombre))
+        histogramme.append(({'view': vue, 'le': '+Inf'}, s['requetes']))
+    lignes.append("# HELP flowfunds_request_duration_seconds Durée des requêtes HTTP par vue.")
+    lignes.append("# TYPE flowfunds_request_duration_seconds histogram")
+    for labels, valeur in histogramme:
+        etiquettes = ','.join(f'{cle}="{_echapper(v)}"' for cle, v in labels.items())
+        lignes.append(f"flowfunds_request_duration_seconds_bucket{{{etiquettes}}} {valeur}")
+    for vue, s in vues.items():
+        lignes.append(f'flowfunds_request_duration_seconds_sum{{view="{_echapper(vue)}"}} {s["duree"]}')
+        lignes.append(f'flowfunds_request_duration_seconds_count{{view="{_echapper(vue)}"}} {s["requetes"]}')
+
+    metrique('flowfunds_db_queries_total', 'counter', "Requêtes SQL exécutées par vue.",
+             [({'view': vue}, s['sql']) for vue, s in vues.items()])
+    metrique('flowfunds_db_duration_seconds_total', 'counter', "Temps passé en base par vue.",
+             [({'view': vue}, s['duree_sql']) for vue, s in vues.items()])
+    metrique('flowfunds_n_plus_one_total', 'counter', "Requêtes HTTP où un motif N+1 a été détecté.",
+             [({'view': vue}, s['n_plus_un']) for vue, s in vues.items()])
+    metrique('flowfunds_duplicate_queries_total', 'counter', "Requêtes SQL strictement identiques répétées.",
+             [({'view': vue}, s['doublons']) for vue, s in vues.items()])
+
+    stats_cache = cache_finance.statistiques()
+    metrique('flowfunds_dashboard_cache_total', 'counter', "Accès au cache du tableau de bord.",
+             [({'result': 'hit'}, stats_cache['hits']), ({'result': 'miss'}, stats_cache['misses'])])
+    metrique('flowfunds_dashboard_cache_invalidations_total', 'counter', "Invalidations du cache du tableau de bord.",
+             [({}, stats_cache['invalidations'])])
+
+    return '\n'.join(lignes) + '\n'
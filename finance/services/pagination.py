@@ -0,0 +1,95 @@
+"""
+Pagination par curseur (keyset / seek) sur l'ordre (-date, -id) des transactions.
+
+Contrairement à OFFSET, le coût d'une page ne dépend pas de sa position dans
+l'historique : chaque page est un `WHERE (date, id) < (curseur) ORDER BY ... LIMIT n`.
+
+EstimatedCountPaginator sert aux listes de l'administration, qui restent paginées par numéro.
+"""
+import base64
+import binascii
+import json
+import uuid
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+TAILLE_PAGE = 25
+
+
+def _cle(ligne):
+    # Instances de modèle ou dictionnaires issus de .values()
+    if isinstance(ligne, dict):
+        return ligne['date'], ligne['id']
+    return ligne.date, ligne.pk
+
+
+def encoder_curseur(ligne):
+    date, pk = _cle(ligne)
+    brut = f"{date.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(brut).decode().rstrip('=')
+
+
+def decoder_curseur(curseur):
+    """Retourne (date, id), ou None si le curseur est absent ou invalide."""
+    if not curseur:
+        return None
+    try:
+        brut = base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)).decode()
+        date, pk = brut.split('|')
+        date = parse_datetime(date)
+        pk = uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return date, pk
+
+
+def _page(queryset, curseur, taille):
+    queryset = queryset.order_by('-date', '-id')
+    position = decoder_curseur(curseur)
+    if position:
+        date, pk = position
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+    # 🔹 On lit une ligne de plus pour savoir s'il existe une page suivante, sans COUNT(*)
+    return queryset[:taille + 1]
+
+
+def _decouper(lignes, taille):
+    suivant = encoder_curseur(lignes[taille - 1]) if len(lignes) > taille else None
+    return lignes[:taille], suivant
+
+
+def page_par_curseur(queryset, curseur=None, taille=TAILLE_PAGE):
+    """
+    Retourne (lignes, curseur_suivant) ; curseur_suivant vaut None sur la dernière page.
+    """
+    return _decouper(list(_page(queryset, curseur, taille)), taille)
+
+
+async def apage_par_curseur(queryset, curseur=None, taille=TAILLE_PAGE):
+    """Version asynchrone de page_par_curseur()."""
+    return _decouper([ligne async for ligne in _page(queryset, curseur, taille)], taille)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Au-delà de `seuil` lignes, le total est l'estimation du planificateur PostgreSQL
+    (EXPLAIN, sans exécuter la requête) au lieu d'un COUNT(*) qui parcourrait la table.
+    Comptage exact sous le seuil et sur les autres bases.
+    """
+    seuil = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == 'postgresql':
+            plan = json.loads(queryset.explain(format='json'))
+            estimation = int(plan[0]['Plan']['Plan Rows'])
+            if estimation > self.seuil:
+                return estimation
+        return super().count
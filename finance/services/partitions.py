@@ -0,0 +1,146 @@
+"""
+Partitionnement mensuel (PARTITION BY RANGE sur `date`) de la table des transactions,
+PostgreSQL seulement. Facultatif : activé par TRANSACTION_PARTITIONING (migration 0015)
+ou par `maintain_partitions --convert`, puis entretenu par maintain_partitions.
+
+Une partition par mois local (finance_transaction_pAAAAMM) et une partition par défaut
+pour les dates hors des mois créés. Les listes par utilisateur, triées par date et
+limitées, ne lisent ainsi que les partitions récentes, et les mois archivés
+(archive_transactions) se suppriment en détachant leur partition vide.
+
+La clé primaire devient (id, date) : PostgreSQL impose la clé de partition dans toute
+contrainte d'unicité. L'id UUID reste unique en pratique et Django ne voit pas la différence.
+"""
+import re
+from datetime import date, datetime, time
+
+from django.db import transaction
+from django.utils import timezone
+
+from finance.models import Transaction
+
+TABLE = Transaction._meta.db_table
+DEFAUT = f"{TABLE}_pdefaut"
+_NOM = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def ajouter_mois(mois, nombre=1):
+    annee, numero = divmod(mois.month - 1 + nombre, 12)
+    return date(mois.year + annee, numero + 1, 1)
+
+
+def nom_partition(mois):
+    return f"{TABLE}_p{mois:%Y%m}"
+
+
+def borne(mois):
+    """Minuit local du premier jour du mois, en littéral timestamptz."""
+    return timezone.make_aware(datetime.combine(mois, time.min)).isoformat()
+
+
+def est_partitionnee(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [TABLE]
+        )
+        return cursor.fetchone()[0]
+
+
+def partitions(connection):
+    """Mois (premier jour) des partitions mensuelles existantes, triés."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)", [TABLE]
+        )
+        noms = [nom for nom, in cursor.fetchall()]
+    return sorted(date(int(m[1]), int(m[2]), 1) for m in map(_NOM.match, noms) if m)
+
+
+def creer_partitions(connection, debut, fin):
+    """Crée les partitions manquantes des mois `debut` à `fin` inclus ; retourne leurs noms."""
+    existantes = set(partitions(connection))
+    creees = []
+    mois = debut.replace(day=1)
+    with connection.cursor() as cursor:
+        while mois <= fin:
+            if mois not in existantes:
+                cursor.execute(
+                    f"CREATE TABLE {nom_partition(mois)} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{borne(mois)}') TO ('{borne(ajouter_mois(mois))}')"
+                )
+                creees.append(nom_partition(mois))
+            mois = ajouter_mois(mois)
+    return creees
+
+
+def supprimer_partition(connection, mois):
+    """Détache puis supprime la partition du mois si elle est vide ; retourne True si supprimée."""
+    nom = nom_partition(mois)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {nom})")
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {nom}")
+        cursor.execute(f"DROP TABLE {nom}")
+    return True
+
+
+def convertir(connection, partitionner=True, avance=3):
+    """
+    Recrée la table des transactions partitionnée (ou, avec partitionner=False, ordinaire),
+    copie les lignes, puis remet index et clés étrangères sous les mêmes noms.
+    Bloque les écritures le temps de la copie : à lancer pendant une maintenance.
+    """
+    ancienne = f"{TABLE}_ancienne"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'", [TABLE]
+        )
+        entrantes = [nom for nom, in cursor.fetchall()]
+        if entrantes:
+            raise ValueError(f"Clés étrangères vers {TABLE} : {', '.join(entrantes)}")
+
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'f')", [TABLE]
+        )
+        contraintes = cursor.fetchall()
+        cle_primaire = next(nom for nom, type_, _ in contraintes if type_ == 'p')
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+            [TABLE]
+        )
+        # 🔹 Index d'une table partitionnée : « ON ONLY table », à remettre sur toute la table
+        index = [
+            definition.replace(' ON ONLY ', ' ON ', 1)
+            for nom, definition in cursor.fetchall() if nom != cle_primaire
+        ]
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {ancienne}")
+        cursor.execute(f"ALTER TABLE {ancienne} RENAME CONSTRAINT {cle_primaire} TO {ancienne}_pkey")
+        if partitionner:
+            cursor.execute(
+                f"CREATE TABLE {TABLE} (LIKE {ancienne} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+                f"PARTITION BY RANGE (date)"
+            )
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {cle_primaire} PRIMARY KEY (id, date)")
+            cursor.execute(f"SELECT min(date) FROM {ancienne}")
+            plus_ancienne = cursor.fetchone()[0] or timezone.now()
+            fin = ajouter_mois(timezone.localdate(), avance)
+            creer_partitions(connection, timezone.localtime(plus_ancienne).date(), fin)
+            cursor.execute(f"CREATE TABLE {DEFAUT} PARTITION OF {TABLE} DEFAULT")
+        else:
+            cursor.execute(f"CREATE TABLE {TABLE} (LIKE {ancienne} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {cle_primaire} PRIMARY KEY (id)")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {ancienne}")
+        # Supprime aussi ses partitions, index et contraintes, dont les noms redeviennent libres
+        cursor.execute(f"DROP TABLE {ancienne} CASCADE")
+        for nom, type_, definition in contraintes:
+            if type_ == 'f':
+                cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {nom} {definition}")
+        for definition in index:
+            cursor.execute(definition)
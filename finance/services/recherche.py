@@ -0,0 +1,99 @@
+"""
+Recherche et filtres sur l'historique des transactions (page Transactions et API).
+
+Sous PostgreSQL, la migration 0013 ajoute un index trigramme GIN sur UPPER(description),
+utilisé tel quel par `description__icontains` (UPPER(...) LIKE UPPER('%taxi%')), et un
+index GIN jsonb_path_ops sur meta pour `meta__contains` (@>). Les autres bases (SQLite
+en test) exécutent les mêmes filtres sans ces index.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.lookups import Exact
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from finance.models import Transaction
+
+# Paramètres GET reconnus (conservés dans les liens de pagination)
+FILTRES = ('q', 'type', 'categorie', 'compte', 'min', 'max', 'du', 'au', 'meta')
+
+
+def _decimal(valeur):
+    try:
+        nombre = Decimal(valeur) if valeur else None
+    except InvalidOperation:
+        return None
+    # NaN et Infinity ne se comparent pas aux montants
+    return nombre if nombre is not None and nombre.is_finite() else None
+
+
+def lire_date(valeur):
+    """Date AAAA-MM-JJ, ou None si absente, mal formée ou impossible (ex. 2024-02-30)."""
+    try:
+        return parse_date(valeur or '')
+    except ValueError:
+        return None
+
+
+def _debut_du_jour(valeur):
+    jour = lire_date(valeur)
+    if jour is None:
+        return None
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def filtrer_transactions(queryset, parametres):
+    """
+    Applique les filtres de `parametres` (QueryDict ou dict) ; les valeurs invalides sont ignorées.
+    q : texte dans la description ; meta : "cle:valeur", répétable.
+    """
+    q = (parametres.get('q') or '').strip()
+    if q:
+        queryset = queryset.filter(description__icontains=q)
+
+    for champ, parametre, choix in (
+        ('type_transaction', 'type', Transaction.TYPE_TRANSACTION),
+        ('categorie', 'categorie', Transaction.CATEGORIES),
+        ('compte', 'compte', Transaction.COMPTES),
+    ):
+        valeur = parametres.get(parametre)
+        if valeur in dict(choix):
+            queryset = queryset.filter(**{champ: valeur})
+
+    minimum, maximum = _decimal(parametres.get('min')), _decimal(parametres.get('max'))
+    if minimum is not None:
+        queryset = queryset.filter(montant__gte=minimum)
+    if maximum is not None:
+        queryset = queryset.filter(montant__lte=maximum)
+
+    du, au = _debut_du_jour(parametres.get('du')), _debut_du_jour(parametres.get('au'))
+    if du is not None:
+        queryset = queryset.filter(date__gte=du)
+    if au is not None:
+        queryset = queryset.filter(date__lt=au + timedelta(days=1))  # jour `au` inclus
+
+    metas = parametres.getlist('meta') if hasattr(parametres, 'getlist') else [parametres.get('meta')]
+    postgresql = connections[queryset.db].vendor == 'postgresql'
+    for meta in filter(None, metas):
+        cle, sep, valeur = meta.partition(':')
+        if not sep or not cle.isidentifier() or '__' in cle:
+            continue
+        if postgresql:
+            queryset = queryset.filter(meta__contains={cle: valeur})  # @>, index GIN
+        else:
+            # 🔹 Texte de la clé comparé directement : la clé reste une clé JSON littérale, jamais
+            # un nom de lookup (contains, isnull, in, ...)
+            queryset = queryset.filter(Exact(KeyTextTransform(cle, 'meta'), valeur))
+    return queryset
+
+
+def parametres_de_recherche(parametres):
+    """Chaîne de requête des seuls filtres actifs, pour les liens de pagination."""
+    filtres = parametres.copy()
+    for cle in list(filtres.keys()):
+        if cle not in FILTRES or not any(filtres.getlist(cle)):
+            del filtres[cle]
+    return filtres.urlencode()
@@ -0,0 +1,55 @@
+"""
+Planificateur des transactions récurrentes.
+
+Une seule requête (index partiel recurrente_echeance_idx) liste en flux les modèles dus,
+triés par utilisateur ; chaque utilisateur est ensuite traité dans sa propre transaction SQL :
+verrouillage des modèles, création des transactions par enregistrer_lot(), puis avancement
+des échéances. Comme l'échéance avance dans la même transaction que l'insertion, relancer
+la commande (ou en lancer deux en parallèle, grâce à skip_locked) ne crée pas de doublon.
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.utils import timezone
+
+from finance.models import RecurringTransaction, Transaction
+
+TAILLE_LOT = 2000
+# Échéances rattrapées au plus par modèle et par passage (ex. planificateur arrêté longtemps)
+MAX_RATTRAPAGE = 400
+
+
+def executer_echeances(maintenant=None, taille_lot=TAILLE_LOT):
+    """
+    Matérialise toutes les échéances <= maintenant. Retourne (modèles traités, transactions créées).
+    Les dépenses récurrentes ne sont pas bloquées par un solde insuffisant (comme un import).
+    """
+    maintenant = maintenant or timezone.now()
+    dues = (
+        RecurringTransaction.objects.active()
+        .filter(prochaine_echeance__lte=maintenant)
+        .order_by('utilisateur_id')
+        .values_list('utilisateur_id', 'pk')
+    )
+
+    modeles = creees = 0
+    for utilisateur_id, lignes in groupby(dues.iterator(chunk_size=taille_lot), key=itemgetter(0)):
+        ids = [pk for _, pk in lignes]
+        with transaction.atomic():
+            recurrentes = list(
+                RecurringTransaction.objects.select_for_update(skip_locked=True)
+                .filter(pk__in=ids, status=RecurringTransaction.ACTIVE_STATUS, prochaine_echeance__lte=maintenant)
+            )
+            nouvelles = []
+            for recurrente in recurrentes:
+                nouvelles.extend(recurrente.materialiser(maintenant, maximum=MAX_RATTRAPAGE))
+                recurrente.modified = timezone.now()
+            if nouvelles:
+                Transaction.objects.enregistrer_lot(nouvelles)
+            RecurringTransaction.objects.bulk_update(
+                recurrentes, ['occurrences', 'prochaine_echeance', 'status', 'modified']
+            )
+        modeles += len(recurrentes)
+        creees += len(nouvelles)
+    return modeles, creees
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from finance import routers
+from finance.models import Transaction, Utilisateur, lot_enregistre
+from finance.services import cache as cache_finance
+from finance.services import evenements
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalider_cache_utilisateur(sender, instance, **kwargs):
+    # 🔹 Après le commit seulement : invalider avant laisserait une requête concurrente
+    # remettre en cache l'état précédent
+    user_id = instance.utilisateur_id
+    transaction.on_commit(lambda: cache_finance.invalider(user_id))
+
+
+@receiver(lot_enregistre, sender=Transaction)
+def invalider_cache_lot(sender, transactions, **kwargs):
+    for user_id in {t.utilisateur_id for t in transactions}:
+        transaction.on_commit(lambda user_id=user_id: cache_finance.invalider(user_id))
+
+
+CHAMPS_EVENEMENT = ('id', 'type_transaction', 'montant', 'compte', 'categorie', 'description', 'date')
+
+
+def publier_solde(user_id, nouvelles=()):
+    """Publie les nouvelles transactions puis le solde validé de l'utilisateur (flux SSE)."""
+    diffuseur = evenements.broker()
+    if not diffuseur.a_des_abonnes(user_id):
+        return
+    for t in nouvelles:
+        diffuseur.publier(user_id, 'transaction', {champ: getattr(t, champ) for champ in CHAMPS_EVENEMENT})
+    solde = Utilisateur.objects.filter(pk=user_id).values('balance', 'derniere_operation').first()
+    if solde is not None:
+        diffuseur.publier(user_id, 'solde', {'solde': solde['balance'], 'derniere_operation': solde['derniere_operation']})
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def publier_transaction(sender, instance, created=False, **kwargs):
+    user_id = instance.utilisateur_id
+    nouvelles = [instance] if created else []
+    transaction.on_commit(lambda: publier_solde(user_id, nouvelles))
+
+
+@receiver(lot_enregistre, sender=Transaction)
+def publier_lot(sender, transactions, **kwargs):
+    # Un lot (import, génération) ne publie que le solde final, pas chaque ligne
+    for user_id in {t.utilisateur_id for t in transactions}:
+        transaction.on_commit(lambda user_id=user_id: publier_solde(user_id))
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Utilisateur)
+def marquer_ecriture(sender, instance, **kwargs):
+    # Lecture de ses propres écritures : l'utilisateur relit la base principale un moment
+    user_id = instance.utilisateur_id if sender is Transaction else instance.pk
+    transaction.on_commit(lambda: routers.marquer_ecriture(user_id))
+
+
+@receiver(lot_enregistre, sender=Transaction)
+def marquer_ecriture_lot(sender, transactions, **kwargs):
+    for user_id in {t.utilisateur_id for t in transactions}:
+        transaction.on_commit(lambda user_id=user_id: routers.marquer_ecriture(user_id))
+
+
+@receiver(post_save, sender=Utilisateur)
+@receiver(post_delete, sender=Utilisateur)
+def invalider_utilisateur_en_cache(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: cache_finance.invalider_utilisateur(user_id))
@@ -1,3 +1,1255 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from unittest import mock
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from finance.management.commands.benchmark_concurrency import charger
+from finance.management.commands.benchmark_connections import configuration
+from finance.management.commands.benchmark_views import comparer, mesurer_taille
+from finance.middleware import InstrumentationMiddleware
+from finance.routers import ReplicaRouter, lecture_replica
+from finance.models import (
+    BalanceCheckpoint, Budget, Compte, LedgerEntry, MonthlySummary, RecurringTransaction, SoldeInsuffisant, Transaction,
+    TransactionArchive, Utilisateur,
+)
+from finance.services import cache as cache_finance
+from finance.services import evenements, metriques, partitions
+from finance.services.archivage import limite_de_retention, lire_archive
+from finance.views.api_views import CHAMPS_TRANSACTION
+from finance.services.aggregations import resume_utilisateur, totaux_par_categorie, totaux_par_compte
+from finance.services.generateur import generer_donnees
+from finance.services.importation import ErreurImport, importer_transactions, lire_csv
+from finance.services.pagination import EstimatedCountPaginator, page_par_curseur
+
+
+def creer_utilisateur(phone_number='0700000000', initial_balance=1000, **extra_fields):
+    return Utilisateur.objects.create_user(
+        phone_number=phone_number,
+        password='motdepasse',
+        first_name='Awa',
+        last_name='Koné',
+        initial_balance=initial_balance,
+        **extra_fields
+    )
+
+
+def creer_transaction(user, type_transaction='DEPENSE', montant=100, **extra_fields):
+    extra_fields.setdefault('compte', 'Especes')
+    extra_fields.setdefault('categorie', 'nourriture')
+    return Transaction.objects.create(
+        utilisateur=user,
+        type_transaction=type_transaction,
+        montant=montant,
+        **extra_fields
+    )
+
+
+class SoldeTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+
+    def solde(self):
+        return Utilisateur.objects.get(pk=self.user.pk).balance
+
+    def test_solde_initial(self):
+        self.assertEqual(self.solde(), Decimal('1000'))
+
+    def test_save_met_a_jour_le_solde(self):
+        creer_transaction(self.user, 'REVENU', 500)
+        creer_transaction(self.user, 'DEPENSE', 200)
+        creer_transaction(self.user, 'ECHEC', 100)
+        self.assertEqual(self.solde(), Decimal('1200'))
+
+    def test_modification_et_suppression(self):
+        t = creer_transaction(self.user, 'DEPENSE', 200)
+        t.montant = 50
+        t.save()
+        self.assertEqual(self.solde(), Decimal('950'))
+        t.delete()
+        self.assertEqual(self.solde(), Decimal('1000'))
+
+    def test_transaction_reattribuee_a_un_autre_utilisateur(self):
+        autre = creer_utilisateur('0100000000')
+        t = creer_transaction(self.user, 'DEPENSE', 100)
+        t.utilisateur = autre
+        t.montant = 150
+        t.save()
+        autre.refresh_from_db()
+        self.assertEqual((self.solde(), autre.balance), (Decimal('1000'), Decimal('850')))
+        self.assertEqual(LedgerEntry.objects.solde(self.user), Decimal('1000'))
+        self.assertEqual(LedgerEntry.objects.solde(autre), Decimal('850'))
+        call_command('rebuild_balances', '--check', stdout=StringIO())
+
+    def test_save_utilisateur_ne_reecrit_pas_le_solde(self):
+        creer_transaction(self.user, 'REVENU', 500)
+        self.user.first_name = 'Adjoua'
+        self.user.save()  # instance chargée avant la transaction
+        self.assertEqual(self.solde(), Decimal('1500'))
+
+    def test_rebuild_balances(self):
+        creer_transaction(self.user, 'REVENU', 500)
+        Utilisateur.objects.filter(pk=self.user.pk).update(balance=0)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_balances', '--check', stdout=StringIO())
+
+        call_command('rebuild_balances', stdout=StringIO())
+        self.assertEqual(self.solde(), Decimal('1500'))
+        call_command('rebuild_balances', '--check', stdout=StringIO())
+
+
+class DepenseConcurrenteTests(TransactionTestCase):
+    """Rafale de dépenses simultanées sur un même utilisateur : le solde ne doit jamais passer sous zéro."""
+
+    nombre_threads = 20
+
+    def setUp(self):
+        # La garantie vient de l'UPDATE conditionnel, pas de verrous de ligne : testée aussi sous
+        # SQLite, sauf en mémoire partagée où les threads se heurtent à « table is locked » sans attendre
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("base SQLite en mémoire : pas d'attente entre connexions concurrentes")
+
+    def test_depenses_concurrentes(self):
+        user = creer_utilisateur(initial_balance=500)
+        depart = threading.Barrier(self.nombre_threads)
+        reussites = []
+
+        def depenser():
+            try:
+                depart.wait()
+                Transaction(
+                    utilisateur_id=user.pk, type_transaction='DEPENSE', montant=100,
+                    compte='momo', categorie='transport',
+                ).save(verifier_solde=True)
+                reussites.append(1)
+            except SoldeInsuffisant:
+                pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=depenser) for _ in range(self.nombre_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        user.refresh_from_db()
+        self.assertEqual(len(reussites), 5)
+        self.assertEqual(user.balance, Decimal('0'))
+        self.assertEqual(Transaction.objects.filter(utilisateur=user).count(), 5)
+
+
+class AddViewTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur(initial_balance=100)
+        self.client.force_login(self.user)
+
+    def poster(self, type_transaction, montant):
+        return self.client.post(reverse('add'), {
+            'type_transaction': type_transaction, 'montant': montant,
+            'compte': 'Especes', 'categorie': 'nourriture', 'description': 'Garba',
+        })
+
+    def test_depense_refusee_si_solde_insuffisant(self):
+        response = self.poster('DEPENSE', '150')
+        self.assertRedirects(response, reverse('add'), fetch_redirect_response=False)
+        self.assertFalse(Transaction.objects.exists())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('100'))
+
+    def test_depense_acceptee(self):
+        response = self.poster('DEPENSE', '60')
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('40'))
+
+    def test_saisies_invalides_refusees(self):
+        for type_transaction, montant in [('DEPENSE', '-5000'), ('DEPENSE', 'NaN'), ('DEPENSE', 'Infinity'),
+                                          ('BOGUS', '50'), ('ECHEC', '5000')]:
+            response = self.poster(type_transaction, montant)
+            self.assertRedirects(response, reverse('add'), fetch_redirect_response=False)
+        self.assertFalse(Transaction.objects.exists())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('100'))
+
+
+class AggregationTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+        creer_transaction(self.user, 'REVENU', 300, compte='momo', categorie='autre')
+        creer_transaction(self.user, 'DEPENSE', 120, compte='momo', categorie='transport')
+        creer_transaction(self.user, 'DEPENSE', 30, compte='Especes', categorie='nourriture')
+        creer_transaction(self.user, 'ECHEC', 50, compte='banque', categorie='autre')
+
+    def test_resume_utilisateur(self):
+        with self.assertNumQueries(1):
+            resume = resume_utilisateur(self.user)
+        self.assertEqual(resume['revenus'], Decimal('300'))
+        self.assertEqual(resume['depenses'], Decimal('150'))
+        self.assertEqual(resume['epargne'], Decimal('50'))
+        self.assertEqual(resume['solde'], Utilisateur.objects.get(pk=self.user.pk).balance)
+
+    def test_totaux_par_compte_et_categorie(self):
+        with self.assertNumQueries(1):
+            par_compte = totaux_par_compte(self.user)
+        self.assertEqual(par_compte['momo']['net'], Decimal('180'))
+        self.assertEqual(par_compte['Especes']['net'], Decimal('-30'))
+        self.assertEqual(par_compte['orange']['net'], 0)
+
+        par_categorie = totaux_par_categorie(self.user)
+        self.assertEqual(par_categorie['transport']['depenses'], Decimal('120'))
+
+    def test_page_comptes(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('account'))
+        self.assertContains(response, 'id="netWorth">1150')
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+        for i in range(7):
+            creer_transaction(self.user, 'REVENU', i + 1)
+        # Dates identiques deux à deux : l'id doit départager
+        for i, t in enumerate(Transaction.objects.all()):
+            Transaction.objects.filter(pk=t.pk).update(date=timezone.now() - timedelta(days=i // 2))
+
+    def test_parcours_complet_sans_doublon(self):
+        vus, curseur = [], None
+        while True:
+            lignes, curseur = page_par_curseur(Transaction.objects.all(), curseur, taille=3)
+            vus.extend(t.pk for t in lignes)
+            if curseur is None:
+                break
+        attendu = list(Transaction.objects.order_by('-date', '-id').values_list('pk', flat=True))
+        self.assertEqual(vus, attendu)
+
+    def test_curseur_invalide_ignore(self):
+        lignes, _ = page_par_curseur(Transaction.objects.all(), 'pas-un-curseur', taille=3)
+        self.assertEqual(len(lignes), 3)
+
+    def test_page_historique(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('transaction'))
+        self.assertEqual(len(response.context['transaction']), 7)
+        self.assertIsNone(response.context['curseur_suivant'])
+
+
+class IndexTests(TestCase):
+    def test_desactivation_annule_l_effet_sur_le_solde(self):
+        user = creer_utilisateur()
+        t = creer_transaction(user, 'DEPENSE', 300)
+        t.status = Transaction.INACTIVE_STATUS
+        t.save()
+        self.assertEqual(Utilisateur.objects.get(pk=user.pk).balance, Decimal('1000'))
+        self.assertEqual(resume_utilisateur(user)['depenses'], 0)
+        call_command('rebuild_balances', '--check', stdout=StringIO())
+
+    def test_benchmark_indexes(self):
+        generer_donnees(2, 30, taille_lot=10, graine=1)
+        sortie = StringIO()
+        call_command('benchmark_indexes', '--repeat', '1', '--json', stdout=sortie)
+        self.assertIn('transaction_user_actif_idx', sortie.getvalue())
+        # Les index supprimés pour la mesure « avant » ont été restaurés
+        noms = {index.name for index in Transaction._meta.indexes}
+        with connection.cursor() as cursor:
+            existants = connection.introspection.get_constraints(cursor, Transaction._meta.db_table)
+        self.assertLessEqual(noms, set(existants))
+
+
+class CacheTableauDeBordTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = creer_utilisateur()
+
+    def test_hit_puis_invalidation_apres_ecriture(self):
+        avant = cache_finance.statistiques()
+        premier = cache_finance.tableau_de_bord(self.user)
+        with self.assertNumQueries(0):
+            cache_finance.tableau_de_bord(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            creer_transaction(self.user, 'REVENU', 250)
+        # self.user n'est pas relu : le solde du résumé vient de la base, pas de l'instance
+        apres = cache_finance.tableau_de_bord(self.user)
+
+        self.assertEqual(premier['transactions'], [])
+        self.assertEqual(len(apres['transactions']), 1)
+        self.assertEqual(apres['solde'], Decimal('1250'))
+        stats = cache_finance.statistiques()
+        self.assertEqual(stats['hits'] - avant['hits'], 1)
+        self.assertEqual(stats['misses'] - avant['misses'], 2)
+
+    def test_tableau_de_bord(self):
+        creer_transaction(self.user, 'DEPENSE', 40, description='Garba')
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse('index')), 'Garba')
+
+
+class ImportTests(TestCase):
+    entete = "date,type_transaction,montant,compte,categorie,description\n"
+
+    def setUp(self):
+        self.user = creer_utilisateur()
+
+    def fichier(self, lignes):
+        return BytesIO((self.entete + lignes).encode('utf-8'))
+
+    def test_import_par_lots(self):
+        lignes = "".join(
+            f"2025-03-{jour:02d} 08:30,Dépense,1 000,MoMo,transport,Taxi\n" for jour in range(1, 8)
+        ) + "15/03/2025,REVENU,\"50000,00\",orange,autre,Salaire\n"
+        with CaptureQueriesContext(connection) as requetes:
+            total = importer_transactions(self.user, lire_csv(self.fichier(lignes)), taille_lot=3)
+        ecritures = [
+            q['sql'].split()[0] for q in requetes
+            if q['sql'].startswith(('INSERT INTO "finance_transaction"', 'UPDATE "finance_utilisateur"'))
+        ]
+        self.assertEqual(ecritures, ['INSERT', 'UPDATE'] * 3)  # un INSERT et un UPDATE du solde par lot
+        self.assertEqual(total, 8)
+        self.assertEqual(Utilisateur.objects.get(pk=self.user.pk).balance, Decimal('44000'))
+        self.assertEqual(Transaction.objects.filter(date__month=3, compte='momo').count(), 7)
+
+    def test_ligne_invalide_annule_tout(self):
+        lignes = "2025-03-01,DEPENSE,100,momo,transport,\n2025-03-02,DEPENSE,100,wave,transport,\n"
+        with self.assertRaisesMessage(ErreurImport, "Ligne 3"):
+            importer_transactions(self.user, lire_csv(self.fichier(lignes)), taille_lot=1)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_date_impossible(self):
+        lignes = "2025-03-01,DEPENSE,100,momo,transport,\n2024-02-30T10:00,DEPENSE,100,momo,transport,\n"
+        with self.assertRaisesMessage(ErreurImport, "Ligne 3 : date invalide"):
+            importer_transactions(self.user, lire_csv(self.fichier(lignes)))
+
+    def test_montant_hors_du_champ(self):
+        for montant in ('1e20', '1.999'):
+            lignes = f"2025-03-01,DEPENSE,100,momo,transport,\n2025-03-02,DEPENSE,{montant},momo,transport,\n"
+            with self.assertRaisesMessage(ErreurImport, "Ligne 3 : montant invalide"):
+                importer_transactions(self.user, lire_csv(self.fichier(lignes)))
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(Utilisateur.objects.get(pk=self.user.pk).balance, Decimal('1000'))
+
+    def test_vue_import(self):
+        self.client.force_login(self.user)
+        fichier = SimpleUploadedFile('releve.csv', (self.entete + "2025-03-01,REVENU,10,momo,autre,\n").encode())
+        response = self.client.post(reverse('import'), {'fichier': fichier})
+        self.assertRedirects(response, reverse('transaction'), fetch_redirect_response=False)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+        creer_transaction(self.user, 'DEPENSE', 100, compte='momo', description='Taxi')
+        creer_transaction(self.user, 'REVENU', 900, compte='orange', description='Salaire')
+
+    def test_export_csv_reimportable(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('export'), {'compte': 'momo'})
+        self.assertTrue(response.streaming)
+        contenu = b''.join(response.streaming_content)
+
+        autre = creer_utilisateur(phone_number='0711111111')
+        self.assertEqual(importer_transactions(autre, lire_csv(BytesIO(contenu))), 1)
+        self.assertEqual(Utilisateur.objects.get(pk=autre.pk).balance, Decimal('900'))
+
+    def test_export_json_tous_utilisateurs(self):
+        sortie = StringIO()
+        call_command('export_transactions', '--format', 'json', stdout=sortie)
+        lignes = json.loads(sortie.getvalue())
+        self.assertEqual(len(lignes), 2)
+        self.assertEqual(lignes[0]['phone_number'], self.user.phone_number)
+
+    def test_export_json_vide(self):
+        sortie = StringIO()
+        call_command('export_transactions', '--format', 'json', '--compte', 'banque', stdout=sortie)
+        self.assertEqual(json.loads(sortie.getvalue()), [])
+
+    def test_dates_impossibles(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('export'), {'format': 'json', 'debut': '2024-02-30', 'fin': '2024-13-01'})
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 2)
+        with self.assertRaises(CommandError):
+            call_command('export_transactions', '--debut', '2024-02-30', stdout=StringIO())
+
+
+class MonthlySummaryTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+
+    def cumuls(self):
+        return sorted(MonthlySummary.objects.values_list('type_transaction', 'categorie', 'total', 'nombre'))
+
+    def test_maintenu_a_chaque_ecriture(self):
+        t = creer_transaction(self.user, 'DEPENSE', 100, categorie='transport')
+        creer_transaction(self.user, 'DEPENSE', 50, categorie='transport')
+        creer_transaction(self.user, 'REVENU', 500, categorie='autre')
+        t.categorie = 'loisirs'
+        t.save()
+        self.assertEqual(self.cumuls(), [
+            ('DEPENSE', 'loisirs', Decimal('100'), 1),
+            ('DEPENSE', 'transport', Decimal('50'), 1),
+            ('REVENU', 'autre', Decimal('500'), 1),
+        ])
+        t.delete()
+        self.assertEqual(self.cumuls()[0], ('DEPENSE', 'loisirs', Decimal('0'), 0))
+
+    def test_reconstruction_identique(self):
+        generer_donnees(2, 40, taille_lot=15, graine=3)
+        attendu = set(MonthlySummary.objects.values_list(
+            'utilisateur', 'mois', 'type_transaction', 'compte', 'categorie', 'total', 'nombre'))
+        call_command('rebuild_monthly_summaries', stdout=StringIO())
+        obtenu = set(MonthlySummary.objects.values_list(
+            'utilisateur', 'mois', 'type_transaction', 'compte', 'categorie', 'total', 'nombre'))
+        self.assertEqual(obtenu, attendu)
+
+    def test_page_analytics(self):
+        creer_transaction(self.user, 'DEPENSE', 80, categorie='sante')
+        self.client.force_login(self.user)
+        with self.assertNumQueries(4):  # session, utilisateur, 2 lectures des cumuls
+            response = self.client.get(reverse('analytics'))
+        self.assertContains(response, 'Santé')
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+        self.client.force_login(self.user)
+
+    def test_authentification_requise(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_solde')).status_code, 401)
+
+    def test_creation_et_liste_paginee(self):
+        for montant in (10, 20, 30):
+            response = self.client.post(reverse('api_transactions'), {
+                'type_transaction': 'REVENU', 'montant': montant, 'compte': 'momo', 'categorie': 'autre',
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+
+        page = self.client.get(reverse('api_transactions'), {'limit': 2}).json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertEqual(set(page['results'][0]), set(CHAMPS_TRANSACTION))
+        suite = self.client.get(reverse('api_transactions'), {'limit': 2, 'avant': page['suivant']}).json()
+        self.assertEqual(len(suite['results']), 1)
+        self.assertIsNone(suite['suivant'])
+
+    def test_creation_refusee(self):
+        response = self.client.post(reverse('api_transactions'), {
+            'type_transaction': 'DEPENSE', 'montant': '5000', 'compte': 'momo', 'categorie': 'autre',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(reverse('api_transactions'), {
+            'type_transaction': 'DEPENSE', 'montant': '5', 'compte': 'wave', 'categorie': 'autre',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('compte', response.json()['champs'])
+
+    def test_etag_304_puis_changement_apres_ecriture(self):
+        etag = self.client.get(reverse('api_solde'))['ETag']
+        response = self.client.get(reverse('api_solde'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            creer_transaction(self.user, 'REVENU', 5)
+        response = self.client.get(reverse('api_solde'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['solde'], '1005.00')
+
+
+class BenchmarkVuesTests(TestCase):
+    def test_mesure_et_comparaison(self):
+        resultats = {'1x30': mesurer_taille(1, 30, repeat=2, prefixe='081')}
+        self.assertEqual(
+            set(resultats['1x30']),
+            {'IndexView', 'TransactionView', 'TransactionView (page 2)', 'AddView', 'LoginView'},
+        )
+        self.assertEqual(comparer(resultats, resultats, tolerance=0), [])
+
+        reference = json.loads(json.dumps(resultats))
+        reference['1x30']['IndexView']['queries'] -= 1
+        self.assertEqual(len(comparer(resultats, reference, tolerance=0)), 1)
+
+    @override_settings(FINANCE_LOGIN_MAX_PER_PHONE=2, FINANCE_LOGIN_MAX_PER_IP=2)
+    def test_logins_repetes_non_limites(self):
+        cache.clear()
+        resultats = mesurer_taille(1, 5, repeat=4, prefixe='082')
+        self.assertIn('LoginView', resultats)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'finance.middleware.InstrumentationMiddleware'})
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        metriques.reinitialiser()
+        self.user = creer_utilisateur()
+        self.client.force_login(self.user)
+
+    @override_settings(FINANCE_METRICS_TOKEN='secret')
+    def test_compteurs_et_format_prometheus(self):
+        response = self.client.get(reverse('transaction'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+
+        texte = self.client_class().get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').content.decode()
+        self.assertIn('flowfunds_requests_total{view="transaction"} 1', texte)
+        self.assertIn('flowfunds_request_duration_seconds_bucket{view="transaction",le="+Inf"} 1', texte)
+        self.assertIn('flowfunds_dashboard_cache_total{result="hit"}', texte)
+
+    @override_settings(FINANCE_N_PLUS_ONE_THRESHOLD=3)
+    def test_detection_n_plus_un(self):
+        for _ in range(3):
+            creer_transaction(self.user)
+        def vue(request):
+            # accès à t.utilisateur sans select_related : une requête par ligne
+            numeros = [t.utilisateur.phone_number for t in Transaction.objects.all()]
+            return HttpResponse(', '.join(numeros))
+
+        request = RequestFactory().get('/')
+        with self.assertLogs('finance.instrumentation', 'WARNING'):
+            InstrumentationMiddleware(vue)(request)
+        self.assertIn('flowfunds_n_plus_one_total{view="non_resolue"} 1', metriques.format_prometheus())
+
+    @override_settings(FINANCE_METRICS_TOKEN='secret', INTERNAL_IPS=['127.0.0.1'])
+    def test_acces_reserve_au_staff_et_au_jeton(self):
+        # Adresse locale (proxy inverse) : ne suffit pas
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 403)
+        anonyme = self.client_class()
+        self.assertEqual(anonyme.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer autre').status_code, 403)
+        self.assertEqual(anonyme.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        Utilisateur.objects.filter(pk=self.user.pk).update(is_staff=True)
+        cache_finance.invalider_utilisateur(self.user.pk)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+@override_settings(FINANCE_LOGIN_MAX_PER_PHONE=3, FINANCE_LOGIN_MAX_PER_IP=5)
+class ConnexionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = creer_utilisateur()
+
+    def connexion(self, password, phone_number='0700000000', ip='10.0.0.1'):
+        return self.client.post(
+            reverse('login'), {'phone_number': phone_number, 'password': password}, REMOTE_ADDR=ip
+        )
+
+    def test_limite_par_numero_avant_hachage(self):
+        for _ in range(3):
+            self.assertEqual(self.connexion('mauvais').status_code, 200)
+        with mock.patch('finance.views.auth_views.authenticate') as authenticate:
+            self.assertEqual(self.connexion('motdepasse').status_code, 429)
+        authenticate.assert_not_called()
+
+    def test_limite_par_ip(self):
+        for i in range(5):
+            self.connexion('mauvais', phone_number=f'07000000{i:02d}')
+        self.assertEqual(self.connexion('motdepasse').status_code, 429)
+        self.assertEqual(self.connexion('motdepasse', ip='10.0.0.2').status_code, 302)
+
+    def test_succes_remet_le_compteur_a_zero(self):
+        self.connexion('mauvais')
+        self.connexion('mauvais')
+        self.assertEqual(self.connexion('motdepasse').status_code, 302)
+        self.client.logout()
+        self.assertEqual(self.connexion('mauvais').status_code, 200)
+        self.assertEqual(self.connexion('mauvais').status_code, 200)
+
+    def test_succes_non_comptes_par_ip(self):
+        for _ in range(6):
+            self.assertEqual(self.connexion('motdepasse').status_code, 302)
+            self.client.logout()
+
+    @override_settings(FINANCE_LOGIN_TRUSTED_PROXIES=1)
+    def test_ip_lue_derriere_un_proxy(self):
+        for i in range(5):
+            self.client.post(reverse('login'), {'phone_number': f'07000000{i:02d}', 'password': 'mauvais'},
+                             REMOTE_ADDR='10.0.0.254', HTTP_X_FORWARDED_FOR=f'1.2.3.4, 10.1.0.{i}')
+        # Chaque client a sa propre limite, même derrière la même adresse de proxy
+        response = self.client.post(reverse('login'), {'phone_number': '0700000000', 'password': 'motdepasse'},
+                                    REMOTE_ADDR='10.0.0.254', HTTP_X_FORWARDED_FOR='10.1.0.9')
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(
+        PASSWORD_HASHERS=['finance.hashers.ScryptPasswordHasher', 'finance.hashers.PBKDF2PasswordHasher'],
+        FINANCE_SCRYPT_WORK_FACTOR=2 ** 10,
+    )
+    def test_rehachage_au_login(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(self.connexion('motdepasse').status_code, 302)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertIn('$1024$', self.user.password)
+
+
+class UtilisateurEnCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = creer_utilisateur()
+        self.client.force_login(self.user)
+
+    def requetes_utilisateur(self):
+        with CaptureQueriesContext(connection) as requetes:
+            self.client.get(reverse('profile'))
+        return [q['sql'] for q in requetes.captured_queries if 'FROM "finance_utilisateur"' in q['sql']]
+
+    def test_utilisateur_lu_depuis_le_cache(self):
+        self.requetes_utilisateur()
+        self.assertEqual(self.requetes_utilisateur(), [])
+
+    def test_invalide_par_le_profil_et_le_solde(self):
+        self.requetes_utilisateur()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('profile'), {'full_name': 'Awa Traoré', 'email': '', 'phone': ''})
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.context['user'].last_name, 'Traoré')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            creer_transaction(self.user, montant=250)
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.context['user'].balance, Decimal('750'))
+
+    def test_invalidation_pendant_le_chargement(self):
+        perime = Utilisateur.objects.get(pk=self.user.pk)
+
+        def charger(user_id):
+            # Une écriture concurrente est validée (et invalide le cache) pendant la lecture
+            cache_finance.invalider(user_id)
+            return perime
+
+        self.assertIs(cache_finance.utilisateur(self.user.pk, charger), perime)
+        frais = cache_finance.utilisateur(self.user.pk, lambda user_id: Utilisateur.objects.get(pk=user_id))
+        self.assertIsNot(frais, perime)
+
+
+class PortefeuilleTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+        self.mtn = Compte.objects.create(user=self.user, type_compte='MTN', phone='0500000000', label='MTN perso')
+        self.orange = Compte.objects.create(user=self.user, type_compte='Orange', phone='0700000000', label='OM')
+
+    def soldes(self):
+        self.mtn.refresh_from_db()
+        self.orange.refresh_from_db()
+        self.user.refresh_from_db()
+        return self.mtn.balance, self.orange.balance, self.user.balance
+
+    def test_solde_maintenu_par_les_transactions(self):
+        t = creer_transaction(self.user, 'REVENU', 500, compte='momo', portefeuille=self.mtn)
+        self.assertEqual(self.soldes(), (Decimal('500'), Decimal('0'), Decimal('1500')))
+        t.portefeuille = self.orange
+        t.save()
+        self.assertEqual(self.soldes(), (Decimal('0'), Decimal('500'), Decimal('1500')))
+        t.delete()
+        self.assertEqual(self.soldes(), (Decimal('0'), Decimal('0'), Decimal('1000')))
+
+    def test_virement(self):
+        creer_transaction(self.user, 'REVENU', 500, compte='momo', portefeuille=self.mtn)
+        sortie, entree = Compte.objects.transferer(self.mtn.pk, self.orange.pk, 200)
+        self.assertEqual(self.soldes(), (Decimal('300'), Decimal('200'), Decimal('1500')))
+        self.assertEqual(sortie.meta['virement'], entree.meta['virement'])
+        # Le virement n'apparaît ni en revenus ni en dépenses
+        self.assertEqual(resume_utilisateur(self.user)['revenus'], Decimal('500'))
+
+        with self.assertRaises(SoldeInsuffisant):
+            Compte.objects.transferer(self.mtn.pk, self.orange.pk, 301)
+        self.assertEqual(self.soldes(), (Decimal('300'), Decimal('200'), Decimal('1500')))
+
+    def test_virement_entre_utilisateurs_refuse(self):
+        autre = creer_utilisateur('0100000000')
+        compte = Compte.objects.create(user=autre, type_compte='MTN', phone='0100000000', label='Autre')
+        creer_transaction(self.user, 'REVENU', 500, compte='momo', portefeuille=self.mtn)
+        with self.assertRaises(ValueError):
+            Compte.objects.transferer(self.mtn.pk, compte.pk, 100)
+
+        self.client.force_login(self.user)
+        self.client.post(reverse('virement'), {'source': self.mtn.pk, 'destination': compte.pk, 'montant': '100'})
+        self.assertEqual(self.soldes()[0], Decimal('500'))
+
+        # Montants non finis ou hors du champ montant : refusés sans erreur serveur
+        for montant in ('NaN', 'Infinity', '1e15', '10.999'):
+            response = self.client.post(reverse('virement'), {
+                'source': self.mtn.pk, 'destination': self.orange.pk, 'montant': montant,
+            })
+            self.assertRedirects(response, reverse('account'), fetch_redirect_response=False)
+        for montant in ('NaN', '1e15'):
+            with self.assertRaises(ValueError):
+                Compte.objects.transferer(self.mtn.pk, self.orange.pk, montant)
+        self.assertEqual(self.soldes(), (Decimal('500'), Decimal('0'), Decimal('1500')))
+
+    def test_saisie_rattachee_et_page_comptes(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('add'), {
+            'type_transaction': 'REVENU', 'montant': '250', 'compte': 'orange', 'categorie': 'autre',
+        })
+        self.assertEqual(self.soldes()[1], Decimal('250'))
+        self.client.post(reverse('virement'), {'source': self.orange.pk, 'destination': self.mtn.pk, 'montant': '50'})
+        response = self.client.get(reverse('account'))
+        self.assertEqual(
+            [(p.label, p.balance) for p in response.context['portefeuilles']],
+            [('MTN perso', Decimal('50')), ('OM', Decimal('200'))],
+        )
+        self.assertEqual(str(self.mtn), 'MTN Mobile Money - 0500000000')
+
+    def test_depense_sur_portefeuille_rattache_sans_solde(self):
+        # Portefeuille rattaché à 0 : seul le solde de l'utilisateur compte
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('add'), {
+            'type_transaction': 'DEPENSE', 'montant': '100', 'compte': 'momo', 'categorie': 'transport',
+        })
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.assertEqual(self.soldes(), (Decimal('-100'), Decimal('0'), Decimal('900')))
+        response = self.client.post(reverse('api_transactions'), {
+            'type_transaction': 'DEPENSE', 'montant': '100', 'compte': 'momo', 'categorie': 'transport',
+        })
+        self.assertEqual(response.status_code, 201)
+
+    def test_categorie_virement_reservee_aux_transferts(self):
+        self.client.force_login(self.user)
+        donnees = {'type_transaction': 'REVENU', 'montant': '100', 'compte': 'Especes', 'categorie': 'virement'}
+        self.client.post(reverse('add'), donnees)
+        self.assertEqual(self.client.post(reverse('api_transactions'), donnees).status_code, 400)
+        with self.assertRaises(ErreurImport):
+            importer_transactions(self.user, [dict(donnees, date='2024-01-05')])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_rebuild_balances_portefeuilles(self):
+        creer_transaction(self.user, 'REVENU', 500, compte='momo', portefeuille=self.mtn)
+        Compte.objects.filter(pk=self.mtn.pk).update(balance=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_balances', check=True, stdout=StringIO())
+        call_command('rebuild_balances', stdout=StringIO())
+        self.assertEqual(self.soldes()[0], Decimal('500'))
+
+
+class GrandLivreTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+
+    def test_ecritures_en_ajout_seul(self):
+        t = creer_transaction(self.user, 'REVENU', 500)
+        t.montant = 300
+        t.save()
+        t.delete()
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(utilisateur=self.user).values_list('motif', 'montant')),
+            [('saisie', Decimal('500')), ('correction', Decimal('-200')), ('annulation', Decimal('-300'))],
+        )
+        ecriture = LedgerEntry.objects.first()
+        with self.assertRaises(ValueError):
+            ecriture.save()
+        with self.assertRaises(ValueError):
+            ecriture.delete()
+
+    def test_point_de_controle_plus_queue(self):
+        creer_transaction(self.user, 'REVENU', 500)
+        Transaction.objects.enregistrer_lot([
+            Transaction(utilisateur=self.user, type_transaction='DEPENSE', montant=50,
+                        compte='Especes', categorie='autre') for _ in range(3)
+        ])
+        call_command('checkpoint_ledger', margin=0, stdout=StringIO())
+        point = BalanceCheckpoint.objects.get(utilisateur=self.user)
+        self.assertEqual((point.solde, point.nombre), (Decimal('350'), 4))
+
+        creer_transaction(self.user, 'DEPENSE', 100)
+        with self.assertNumQueries(2):
+            self.assertEqual(LedgerEntry.objects.solde(self.user), Decimal('1250'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('1250'))
+
+    def test_verification(self):
+        creer_transaction(self.user, 'REVENU', 500)
+        call_command('checkpoint_ledger', margin=0, stdout=StringIO())
+        call_command('verify_ledger', stdout=StringIO())
+
+        Utilisateur.objects.filter(pk=self.user.pk).update(balance=0)
+        BalanceCheckpoint.objects.update(solde=1)
+        sortie = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('verify_ledger', stdout=sortie)
+        self.assertIn('point de contrôle', sortie.getvalue())
+        self.assertIn('solde stocké 0.00', sortie.getvalue())
+
+
+class VuesAsyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = creer_utilisateur()
+        for i in range(30):
+            creer_transaction(self.user, 'REVENU', 10, compte='momo', description=f"t{i}")
+        self.client = AsyncClient()
+        self.client.force_login(self.user)
+
+    async def test_tableau_de_bord_et_historique(self):
+        response = await self.client.get(reverse('async_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['solde'], Decimal('1300'))
+        self.assertEqual(response.context['par_compte']['momo']['net'], Decimal('300'))
+
+        response = await self.client.get(reverse('async_transaction'))
+        suivant = response.context['curseur_suivant']
+        self.assertEqual(len(response.context['transaction']), 25)
+        response = await self.client.get(reverse('async_transaction'), {'avant': suivant})
+        self.assertEqual(len(response.context['transaction']), 5)
+
+    async def test_api_identique_a_la_version_synchrone(self):
+        for nom in ('api_solde', 'api_resume', 'api_comptes', 'api_transactions'):
+            attendu = (await self.client.get(reverse(nom))).json()
+            self.assertEqual((await self.client.get(reverse(f'async_{nom}'))).json(), attendu)
+
+        etag = (await self.client.get(reverse('async_api_solde')))['ETag']
+        response = await self.client.get(reverse('async_api_solde'), headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_authentification_requise(self):
+        anonyme = AsyncClient()
+        self.assertEqual((await anonyme.get(reverse('async_api_resume'))).status_code, 401)
+        self.assertEqual((await anonyme.get(reverse('async_index'))).status_code, 302)
+
+
+class BenchmarkConcurrenceTests(TestCase):
+    def test_charge_sur_serveur_local(self):
+        async def scenario():
+            async def repondre(lecteur, ecrivain):
+                await lecteur.readuntil(b"\r\n\r\n")
+                ecrivain.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await ecrivain.drain()
+                ecrivain.close()
+
+            serveur = await asyncio.start_server(repondre, '127.0.0.1', 0)
+            port = serveur.sockets[0].getsockname()[1]
+            async with serveur:
+                return await charger(f"http://127.0.0.1:{port}/", 'cle', 20, 5, 0)
+
+        resultat = asyncio.run(scenario())
+        self.assertEqual((resultat['requests'], resultat['errors']), (20, 0))
+        self.assertGreater(resultat['rps'], 0)
+
+
+class BrokerEnregistreur(evenements.Broker):
+    """Broker de test : garde les publications en mémoire."""
+
+    def __init__(self):
+        self.publications = []
+
+    def publier(self, user_id, type_evenement, donnees):
+        self.publications.append((user_id, type_evenement, donnees))
+
+
+class EvenementsTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+
+    @override_settings(FINANCE_EVENT_BROKER='finance.tests.BrokerEnregistreur')
+    def test_publication_apres_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            t = creer_transaction(self.user, 'REVENU', 200)
+            self.assertEqual(evenements.broker().publications, [])
+        self.assertEqual(
+            [(type_evenement, donnees.get('id'), donnees.get('solde'))
+             for _, type_evenement, donnees in evenements.broker().publications],
+            [('transaction', t.pk, None), ('solde', None, Decimal('1200'))],
+        )
+
+    def test_broker_memoire_entre_threads(self):
+        async def scenario():
+            diffuseur = evenements.MemoireBroker()
+            abonnement = diffuseur.abonner(self.user.pk)
+            self.assertTrue(diffuseur.a_des_abonnes(self.user.pk))
+            await asyncio.to_thread(diffuseur.publier, self.user.pk, 'solde', {'solde': 1})
+            recu = await asyncio.wait_for(abonnement.recevoir(), 1)
+            abonnement.fermer()
+            self.assertFalse(diffuseur.a_des_abonnes(self.user.pk))
+            return recu
+
+        self.assertEqual(asyncio.run(scenario()), ('solde', {'solde': 1}))
+
+    async def test_flux_sse(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('evenements'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        flux = aiter(response.streaming_content)
+        self.assertEqual(await anext(flux), b"retry: 5000\n\n")
+        self.assertIn(b'"solde": "1000.00"', await anext(flux))
+
+        evenements.broker().publier(self.user.pk, 'solde', {'solde': 750})
+        self.assertEqual(await asyncio.wait_for(anext(flux), 1), b'event: solde\ndata: {"solde": 750}\n\n')
+        # Déconnexion du client : le serveur ASGI annule la tâche en attente
+        attente = asyncio.ensure_future(anext(flux))
+        await asyncio.sleep(0)
+        attente.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await attente
+        self.assertFalse(evenements.broker().a_des_abonnes(self.user.pk))
+
+    def test_sans_flux_sous_wsgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('evenements')).status_code, 204)
+        self.assertFalse(self.client.get(reverse('index')).context['flux_direct'])
+
+
+class RecurrenceTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+        self.debut = timezone.make_aware(timezone.datetime(2026, 1, 31, 8, 0))
+
+    def recurrente(self, **extra_fields):
+        champs = dict(utilisateur=self.user, type_transaction='REVENU', montant=500, compte='momo',
+                      categorie='autre', description='Salaire', debut=self.debut)
+        champs.update(extra_fields)
+        return RecurringTransaction.objects.create(**champs)
+
+    def executer(self, jusqu_a):
+        call_command('run_recurring_transactions', until=jusqu_a.isoformat(), stdout=StringIO())
+
+    def test_echeances_mensuelles_sans_derive(self):
+        recurrente = self.recurrente()
+        self.executer(self.debut + timedelta(days=100))
+        dates = [timezone.localtime(d).date().isoformat() for d in
+                 Transaction.objects.filter(utilisateur=self.user).order_by('date').values_list('date', flat=True)]
+        self.assertEqual(dates, ['2026-01-31', '2026-02-28', '2026-03-31', '2026-04-30'])
+        recurrente.refresh_from_db()
+        self.assertEqual(recurrente.occurrences, 4)
+        self.assertEqual(timezone.localtime(recurrente.prochaine_echeance).date().isoformat(), '2026-05-31')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('3000'))
+
+    def test_relance_idempotente(self):
+        self.recurrente()
+        self.recurrente(type_transaction='DEPENSE', montant=100, frequence='hebdomadaire', categorie='factures')
+        jusqu_a = self.debut + timedelta(days=20)
+        self.executer(jusqu_a)
+        self.executer(jusqu_a)
+        self.assertEqual(Transaction.objects.filter(utilisateur=self.user).count(), 1 + 3)
+        self.assertEqual(
+            MonthlySummary.objects.get(utilisateur=self.user, type_transaction='DEPENSE', mois='2026-02-01').nombre, 2
+        )
+
+    def test_fin_desactive_le_modele(self):
+        recurrente = self.recurrente(frequence='quotidienne', intervalle=2, fin=self.debut + timedelta(days=3))
+        self.executer(self.debut + timedelta(days=30))
+        recurrente.refresh_from_db()
+        self.assertEqual(recurrente.occurrences, 2)
+        self.assertEqual(recurrente.status, RecurringTransaction.INACTIVE_STATUS)
+        self.assertFalse(RecurringTransaction.objects.active().filter(prochaine_echeance__lte=timezone.now()).exists())
+
+
+class BudgetTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur(initial_balance=10000)
+        self.client.force_login(self.user)
+        Budget.objects.create(utilisateur=self.user, categorie='nourriture', plafond=300)
+
+    def depenser(self, montant, categorie='nourriture', compte='Especes'):
+        return self.client.post(reverse('add'), {
+            'type_transaction': 'DEPENSE', 'montant': str(montant), 'compte': compte, 'categorie': categorie,
+        }, follow=True)
+
+    def avertissements(self, response):
+        return [str(m) for m in response.context['messages'] if m.level_tag == 'warning']
+
+    def test_avertissement_au_depassement(self):
+        self.assertEqual(self.avertissements(self.depenser(200)), [])
+        # Le cumul porte sur tous les comptes de la catégorie
+        avertissements = self.avertissements(self.depenser(150, compte='momo'))
+        self.assertEqual(len(avertissements), 1)
+        self.assertIn('350', avertissements[0])
+        self.assertEqual(self.avertissements(self.depenser(1000, categorie='transport')), [])
+
+    def test_verification_en_une_requete(self):
+        creer_transaction(self.user, montant=400)
+        # Les dépenses d'un autre mois ne comptent pas
+        creer_transaction(self.user, montant=400, date=timezone.now() - timedelta(days=62))
+        with self.assertNumQueries(1):
+            budget = Budget.objects.depassement(self.user.pk, 'nourriture', timezone.now())
+        self.assertEqual(budget.depense, Decimal('400'))
+
+    def test_page_budgets(self):
+        self.client.post(reverse('budgets'), {'categorie': 'transport', 'plafond': '1000'})
+        self.client.post(reverse('budgets'), {'categorie': 'nourriture', 'plafond': '0'})
+        for plafond in ('NaN', 'Infinity', 'abc', '1e15', '10.999'):
+            response = self.client.post(reverse('budgets'), {'categorie': 'sante', 'plafond': plafond})
+            self.assertRedirects(response, reverse('budgets'), fetch_redirect_response=False)
+        creer_transaction(self.user, montant=250, categorie='transport')
+        response = self.client.get(reverse('budgets'))
+        self.assertEqual(
+            [(b.categorie, b.depense, b.pct) for b in response.context['budgets']],
+            [('transport', Decimal('250'), 25)],
+        )
+
+
+class RechercheTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur(initial_balance=10000)
+        self.client.force_login(self.user)
+        creer_transaction(self.user, montant=50, description='Taxi aéroport', categorie='transport')
+        creer_transaction(self.user, montant=300, description='Courses marché', meta={'ref': 'A1'})
+        creer_transaction(self.user, 'REVENU', 2000, description='Salaire', compte='momo', categorie='salaire')
+        ancienne = creer_transaction(self.user, montant=80, description='TAXI nuit', categorie='transport')
+        Transaction.objects.filter(pk=ancienne.pk).update(date=timezone.now() - timedelta(days=40))
+
+    def descriptions(self, **parametres):
+        response = self.client.get(reverse('transaction'), parametres)
+        return sorted(t.description for t in response.context['transaction'])
+
+    def test_texte_insensible_a_la_casse(self):
+        self.assertEqual(self.descriptions(q='taxi'), ['TAXI nuit', 'Taxi aéroport'])
+
+    def test_filtres_combines(self):
+        self.assertEqual(self.descriptions(type='REVENU'), ['Salaire'])
+        self.assertEqual(self.descriptions(categorie='transport', min='60'), ['TAXI nuit'])
+        self.assertEqual(self.descriptions(du=str(timezone.localdate() - timedelta(days=7))), [
+            'Courses marché', 'Salaire', 'Taxi aéroport',
+        ])
+        self.assertEqual(self.descriptions(au=str(timezone.localdate() - timedelta(days=30))), ['TAXI nuit'])
+        self.assertEqual(self.descriptions(meta='ref:A1'), ['Courses marché'])
+        # Valeurs invalides ignorées
+        self.assertEqual(len(self.descriptions(type='inconnu', min='abc', meta='a__b:1')), 4)
+        self.assertEqual(len(self.descriptions(min='NaN', max='Infinity', du='2024-02-30', au='2024-13-01')), 4)
+        # Une clé meta reste une clé, pas un lookup
+        for meta in ('contains:x', 'isnull:x', 'in:A1', 'regex:A1', 'gt:A'):
+            self.assertEqual(self.descriptions(meta=meta), [])
+        response = self.client.get(reverse('api_transactions'), {'min': 'NaN', 'meta': 'isnull:x'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_filtres_conserves_entre_les_pages(self):
+        for i in range(30):
+            creer_transaction(self.user, montant=1, description=f'Taxi {i}', categorie='transport')
+        response = self.client.get(reverse('transaction'), {'q': 'taxi', 'page': 'ignoré'})
+        self.assertEqual(response.context['filtres'], 'q=taxi')
+        self.assertContains(response, f'?q=taxi&amp;avant={response.context["curseur_suivant"]}')
+        suite = self.client.get(reverse('transaction'), {'q': 'taxi', 'avant': response.context['curseur_suivant']})
+        self.assertEqual(len(response.context['transaction']) + len(suite.context['transaction']), 32)
+        self.assertTrue(all('axi' in t.description.lower() for t in suite.context['transaction']))
+
+    def test_api(self):
+        response = self.client.get(reverse('api_transactions'), {'q': 'taxi', 'max': '60'})
+        self.assertEqual([t['description'] for t in response.json()['results']], ['Taxi aéroport'])
+
+
+class BenchmarkConnexionsTests(TestCase):
+    def test_configuration_par_mode(self):
+        base = {'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'max_size': 4}}}
+        self.assertNotIn('pool', configuration(base, 'sans', 60)['OPTIONS'])
+        persistant = configuration(base, 'persistant', 60)
+        self.assertEqual((persistant['CONN_MAX_AGE'], persistant['CONN_HEALTH_CHECKS']), (60, True))
+        pool = configuration(base, 'pool', 60)
+        self.assertEqual((pool['CONN_MAX_AGE'], pool['OPTIONS']['pool']), (0, {'max_size': 4}))
+
+    def test_mesure(self):
+        out = StringIO()
+        call_command('benchmark_connections', requests=5, modes='sans,persistant', json=True, stdout=out)
+        resultats = json.loads(out.getvalue())
+        self.assertEqual(set(resultats), {'sans', 'persistant'})
+        self.assertGreater(resultats['sans']['p50_ms'], 0)
+        # Le pool exige PostgreSQL
+        if connection.vendor != 'postgresql':
+            with self.assertRaises(CommandError):
+                call_command('benchmark_connections', requests=5, modes='pool', stdout=StringIO())
+
+
+@lecture_replica
+def base_lue(request):
+    return HttpResponse(Transaction.objects.all().db)
+
+
+@lecture_replica
+async def abase_lue(request):
+    return HttpResponse(Transaction.objects.all().db)
+
+
+@override_settings(FINANCE_REPLICA_ALIAS='replica')
+class ReplicaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = creer_utilisateur()
+        self.factory = RequestFactory()
+
+    def base(self, methode='get'):
+        request = getattr(self.factory, methode)('/')
+        request.user = self.user
+        return base_lue(request).content.decode()
+
+    def test_lectures_sur_le_replica(self):
+        self.assertEqual(self.base(), 'replica')
+        self.assertEqual(self.base('post'), 'default')
+        # Hors vue décorée : base principale
+        self.assertEqual(Transaction.objects.all().db, 'default')
+        with override_settings(FINANCE_REPLICA_ALIAS=None):
+            self.assertEqual(self.base(), 'default')
+
+    def test_lecture_de_ses_propres_ecritures(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            creer_transaction(self.user)
+        self.assertEqual(self.base(), 'default')
+        # Un autre utilisateur lit toujours le réplica
+        autre = creer_utilisateur('0700000001')
+        request = self.factory.get('/')
+        request.user = autre
+        self.assertEqual(base_lue(request).content.decode(), 'replica')
+        # Fin de la fenêtre
+        cache.clear()
+        self.assertEqual(self.base(), 'replica')
+
+    async def test_vue_async(self):
+        request = self.factory.get('/')
+        request.auser = lambda: self._auser()
+        self.assertEqual((await abase_lue(request)).content.decode(), 'replica')
+
+    async def _auser(self):
+        return self.user
+
+    def test_ecritures_toujours_sur_la_base_principale(self):
+        routeur = ReplicaRouter()
+        t = creer_transaction(self.user)
+        t._state.db = 'replica'
+        self.assertEqual(routeur.db_for_write(Transaction, instance=t), 'default')
+        self.assertFalse(routeur.allow_migrate('replica', 'finance'))
+        self.assertIsNone(routeur.allow_migrate('default', 'finance'))
+
+
+class ArchivageTests(TestCase):
+    def setUp(self):
+        self.user = creer_utilisateur()
+        self.mtn = Compte.objects.create(user=self.user, type_compte='MTN', phone='0500000000', label='MTN perso')
+        il_y_a_un_an = timezone.now() - timedelta(days=365)
+        creer_transaction(self.user, 'REVENU', 800, compte='momo', portefeuille=self.mtn, date=il_y_a_un_an)
+        creer_transaction(self.user, 'DEPENSE', 120, date=il_y_a_un_an)
+        inactive = creer_transaction(self.user, 'DEPENSE', 999, date=il_y_a_un_an)
+        inactive.status = Transaction.INACTIVE_STATUS
+        inactive.save()
+        self.recente = creer_transaction(self.user, 'DEPENSE', 30, portefeuille=self.mtn)
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier)
+
+    def test_limite_de_retention(self):
+        maintenant = timezone.make_aware(datetime(2026, 3, 15, 12))
+        self.assertEqual(timezone.localtime(limite_de_retention(3, maintenant)).date().isoformat(), '2025-12-01')
+
+    def test_archivage_conserve_soldes_et_cumuls(self):
+        avant = (resume_utilisateur(self.user), totaux_par_compte(self.user))
+        call_command('archive_transactions', retention_months=6, output=self.dossier, batch_size=2,
+                     stdout=StringIO())
+
+        self.assertEqual(list(Transaction.objects.values_list('pk', flat=True)), [self.recente.pk])
+        archive = TransactionArchive.objects.get()
+        self.assertEqual(archive.nombre, 3)
+        lignes = list(lire_archive(archive.fichier))
+        self.assertEqual(sorted(Decimal(l['montant']) for l in lignes), [Decimal('120'), Decimal('800'), Decimal('999')])
+        self.assertFalse(os.stat(archive.fichier).st_mode & stat.S_IWUSR)
+
+        self.user.refresh_from_db()
+        self.mtn.refresh_from_db()
+        self.assertEqual((self.user.balance, self.mtn.balance), (Decimal('1650'), Decimal('770')))
+        self.assertEqual((resume_utilisateur(self.user), totaux_par_compte(self.user)), avant)
+        call_command('rebuild_balances', check=True, stdout=StringIO())
+        call_command('verify_ledger', stdout=StringIO())
+        # Les cumuls des mois archivés survivent à une reconstruction
+        call_command('rebuild_monthly_summaries', stdout=StringIO())
+        self.assertEqual(resume_utilisateur(self.user), avant[0])
+
+    def test_rien_a_archiver(self):
+        sortie = StringIO()
+        call_command('archive_transactions', retention_months=24, output=self.dossier, stdout=sortie)
+        self.assertIn('Aucune transaction', sortie.getvalue())
+        self.assertFalse(TransactionArchive.objects.exists())
+
+    def test_partitions(self):
+        self.assertEqual(partitions.ajouter_mois(date(2026, 11, 1), 3).isoformat(), '2027-02-01')
+        self.assertEqual(partitions.nom_partition(date(2026, 2, 1)), 'finance_transaction_p202602')
+        if connection.vendor != 'postgresql':
+            with self.assertRaises(CommandError):
+                call_command('maintain_partitions', stdout=StringIO())
+
+
+class AdministrationTests(TestCase):
+    def setUp(self):
+        self.admin = creer_utilisateur('0900000000', is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+        self.user = creer_utilisateur(initial_balance=5000)
+        self.mtn = Compte.objects.create(user=self.user, type_compte='MTN', phone='0500000000', label='MTN perso')
+
+    def requetes_liste(self, url):
+        with CaptureQueriesContext(connection) as capture:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(capture)
+
+    def test_listes_sans_n_plus_un(self):
+        url = reverse('admin:finance_transaction_changelist')
+        creer_transaction(self.user, portefeuille=self.mtn)
+        self.requetes_liste(url)  # met en cache l'utilisateur connecté
+        avant = self.requetes_liste(url), self.requetes_liste(reverse('admin:finance_compte_changelist'))
+        for i in range(5):
+            autre = creer_utilisateur(f'080000000{i}')
+            compte = Compte.objects.create(user=autre, type_compte='Orange', phone=f'060000000{i}', label='OM')
+            creer_transaction(autre, portefeuille=compte)
+        self.assertEqual(
+            (self.requetes_liste(url), self.requetes_liste(reverse('admin:finance_compte_changelist'))), avant
+        )
+        response = self.client.get(url, {'q': self.user.phone_number})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_comptage_exact_hors_postgresql(self):
+        for _ in range(3):
+            creer_transaction(self.user)
+        paginateur = EstimatedCountPaginator(Transaction.objects.order_by('-date'), 2)
+        if connection.vendor != 'postgresql':
+            self.assertEqual((paginateur.count, paginateur.num_pages), (3, 2))
+
+    def action(self, action, transactions, **donnees):
+        return self.client.post(reverse('admin:finance_transaction_changelist'), {
+            'action': action, '_selected_action': [t.pk for t in transactions], **donnees,
+        })
+
+    def test_desactivation_en_un_update(self):
+        transactions = [creer_transaction(self.user, montant=100, portefeuille=self.mtn) for _ in range(3)]
+        creer_transaction(self.user, 'REVENU', 50)
+        with CaptureQueriesContext(connection) as capture, self.captureOnCommitCallbacks(execute=True):
+            self.action('desactiver', transactions)
+        mises_a_jour = [q['sql'] for q in capture if q['sql'].startswith('UPDATE "finance_transaction"')]
+        self.assertEqual(len(mises_a_jour), 1)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('5050'))
+        self.assertEqual(Transaction.objects.filter(status=Transaction.INACTIVE_STATUS).count(), 3)
+        self.assertEqual(resume_utilisateur(self.user)['depenses'], 0)
+        call_command('rebuild_balances', check=True, stdout=StringIO())
+        call_command('verify_ledger', stdout=StringIO())
+
+    def test_recategorisation(self):
+        creer_transaction(self.user, 'REVENU', 500, compte='momo', portefeuille=self.mtn)
+        orange = Compte.objects.create(user=self.user, type_compte='Orange', phone='0700000000', label='OM')
+        sortie, _ = Compte.objects.transferer(self.mtn.pk, orange.pk, 100)
+        depense = creer_transaction(self.user, montant=40, categorie='autre')
+        client = self.client_class()
+        client.force_login(self.user)
+        etag = client.get(reverse('api_transactions'))['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.action('recategoriser', [sortie, depense], categorie='transport')
+        response = client.get(reverse('api_transactions'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(Transaction.objects.get(pk=depense.pk).categorie, 'transport')
+        self.assertEqual(Transaction.objects.get(pk=sortie.pk).categorie, 'virement')
+        self.assertEqual(totaux_par_categorie(self.user)['transport']['depenses'], Decimal('40'))
+        self.assertEqual(totaux_par_categorie(self.user)['autre']['depenses'], 0)
+        with self.assertRaises(ValueError):
+            Transaction.objects.recategoriser(Transaction.objects.all(), 'virement')
@@ -0,0 +1,133 @@
+import json
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+
+from finance.models import Compte, SoldeInsuffisant, Transaction
+from finance.routers import lecture_replica
+from finance.services.aggregations import resume_utilisateur, totaux_par_compte
+from finance.services.pagination import TAILLE_PAGE, page_par_curseur
+from finance.services.recherche import filtrer_transactions
+
+# Projection renvoyée par l'API : uniquement les colonnes utiles au front mobile
+CHAMPS_TRANSACTION = ('id', 'type_transaction', 'montant', 'compte', 'categorie', 'description', 'date')
+CHAMPS_COMPTE = ('id', 'type_compte', 'phone', 'label', 'balance')
+TAILLE_MAX = 100
+
+
+def reponse(donnees, status=200):
+    return JsonResponse(donnees, status=status, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+
+def api_login_required(view):
+    """Comme login_required, mais répond 401 en JSON au lieu de rediriger vers la page de connexion."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return reponse({'erreur': "Authentification requise."}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def etag_utilisateur(request, *args, **kwargs):
+    """
+    ETag dérivé de la dernière opération de l'utilisateur (déjà chargé par l'authentification) :
+    un client qui renvoie If-None-Match reçoit 304 sans qu'aucune requête SQL ne soit faite.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    horodatage = user.derniere_operation.timestamp() if user.derniere_operation else 0
+    return f"{user.pk}-{horodatage}-{user.balance}"
+
+
+@method_decorator(api_login_required, name='dispatch')
+@method_decorator(lecture_replica, name='dispatch')
+class TransactionListApi(View):
+    @method_decorator(condition(etag_func=etag_utilisateur))
+    def get(self, request):
+        try:
+            taille = min(int(request.GET.get('limit', TAILLE_PAGE)), TAILLE_MAX)
+        except ValueError:
+            taille = TAILLE_PAGE
+        # Mêmes filtres que la page Transactions : ?q=&type=&categorie=&compte=&min=&max=&du=&au=&meta=cle:valeur
+        transactions, suivant = page_par_curseur(
+            filtrer_transactions(request.user.transactions.active(), request.GET).values(*CHAMPS_TRANSACTION),
+            request.GET.get('avant'),
+            taille=max(taille, 1),
+        )
+        return reponse({'results': transactions, 'suivant': suivant})
+
+    def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                donnees = json.loads(request.body or b'{}')
+            except ValueError:
+                return reponse({'erreur': "JSON invalide."}, status=400)
+            if not isinstance(donnees, dict):
+                return reponse({'erreur': "JSON invalide."}, status=400)
+        else:
+            donnees = request.POST
+
+        t = Transaction(
+            utilisateur=request.user,
+            type_transaction=donnees.get('type_transaction'),
+            montant=donnees.get('montant'),
+            compte=donnees.get('compte'),
+            categorie=donnees.get('categorie'),
+            description=donnees.get('description') or None,
+        )
+        try:
+            t.full_clean(exclude=['utilisateur'], validate_unique=False)
+        except ValidationError as e:
+            return reponse({'erreur': "Données invalides.", 'champs': e.message_dict}, status=400)
+        if t.montant <= 0:
+            return reponse({'erreur': "Données invalides.", 'champs': {'montant': ["Le montant doit être positif."]}}, status=400)
+
+        t.portefeuille = Compte.objects.pour_transaction(request.user, t.compte)
+        try:
+            t.save(verifier_solde=t.delta < 0)  # DEPENSE et ECHEC débitent
+        except SoldeInsuffisant:
+            return reponse({'erreur': "Solde insuffisant."}, status=409)
+
+        return reponse({champ: getattr(t, champ) for champ in CHAMPS_TRANSACTION}, status=201)
+
+
+@method_decorator(api_login_required, name='dispatch')
+@method_decorator(lecture_replica, name='dispatch')
+@method_decorator(condition(etag_func=etag_utilisateur), name='get')
+class SoldeApi(View):
+    def get(self, request):
+        user = request.user
+        # Aucune requête : le solde est porté par l'utilisateur authentifié
+        return reponse({
+            'solde': user.balance,
+            'initial_balance': user.initial_balance,
+            'derniere_operation': user.derniere_operation,
+        })
+
+
+@method_decorator(api_login_required, name='dispatch')
+@method_decorator(lecture_replica, name='dispatch')
+@method_decorator(condition(etag_func=etag_utilisateur), name='get')
+class ResumeApi(View):
+    def get(self, request):
+        user = request.user
+        return reponse({
+            'solde': user.balance,
+            'totaux': resume_utilisateur(user),
+            'par_compte': totaux_par_compte(user),
+        })
+
+
+@method_decorator(api_login_required, name='dispatch')
+@method_decorator(lecture_replica, name='dispatch')
+class CompteListApi(View):
+    def get(self, request):
+        comptes = list(Compte.objects.filter(user=request.user).values(*CHAMPS_COMPTE))
+        return reponse({'results': comptes})
@@ -0,0 +1,176 @@
+"""
+Versions asynchrones (ASGI) du tableau de bord, de l'historique et des endpoints de lecture
+de l'API, montées sous /async/. Même rendu que les vues synchrones, mais sans bloquer un
+thread pendant les accès base et cache : un seul worker uvicorn sert beaucoup de clients
+mobiles lents en parallèle.
+"""
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+
+from finance.models import Compte, Transaction
+from finance.routers import lecture_replica
+from finance.services.aggregations import aresume_utilisateur, atotaux_par_compte
+from finance.services import evenements
+from finance.services.cache import atableau_de_bord
+from finance.services.pagination import TAILLE_PAGE, apage_par_curseur
+from finance.services.recherche import filtrer_transactions, parametres_de_recherche
+from finance.views.api_views import CHAMPS_COMPTE, CHAMPS_TRANSACTION, TAILLE_MAX, etag_utilisateur, reponse
+
+
+class AsyncLoginRequiredView(View):
+    """
+    Charge l'utilisateur avec request.auser() : l'accès paresseux à request.user ferait une
+    requête synchrone, interdite dans une vue async. Redirige (ou répond 401 pour l'API)
+    si l'utilisateur n'est pas connecté.
+    """
+    api = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            if self.api:
+                return reponse({'erreur': "Authentification requise."}, status=401)
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+@method_decorator(lecture_replica, name='dispatch')
+class AsyncIndexView(AsyncLoginRequiredView):
+    template = 'global_data/index.html'
+
+    async def get(self, request):
+        resume = await atableau_de_bord(request.user)
+        return render(request, self.template, {
+            'user': request.user,
+            'transaction': resume['transactions'],
+            'solde': resume['solde'],
+            'par_compte': resume['par_compte'],
+            'flux_direct': True
+        })
+
+
+@method_decorator(lecture_replica, name='dispatch')
+class AsyncTransactionView(AsyncLoginRequiredView):
+    template = 'global_data/transaction.html'
+
+    async def get(self, request):
+        curseur = request.GET.get('avant')
+        transactions, curseur_suivant = await apage_par_curseur(
+            filtrer_transactions(request.user.transactions.active(), request.GET), curseur
+        )
+        return render(request, self.template, {
+            'user': request.user,
+            'transaction': transactions,
+            'solde': request.user.balance,
+            'curseur': curseur,
+            'curseur_suivant': curseur_suivant,
+            'recherche': request.GET,
+            'filtres': parametres_de_recherche(request.GET),
+            'types': Transaction.TYPE_TRANSACTION,
+            'categories': Transaction.CATEGORIES,
+            'comptes': Transaction.COMPTES
+        })
+
+
+@method_decorator(lecture_replica, name='dispatch')
+class AsyncTransactionListApi(AsyncLoginRequiredView):
+    api = True
+
+    @method_decorator(condition(etag_func=etag_utilisateur))
+    async def get(self, request):
+        try:
+            taille = min(int(request.GET.get('limit', TAILLE_PAGE)), TAILLE_MAX)
+        except ValueError:
+            taille = TAILLE_PAGE
+        transactions, suivant = await apage_par_curseur(
+            filtrer_transactions(request.user.transactions.active(), request.GET).values(*CHAMPS_TRANSACTION),
+            request.GET.get('avant'),
+            taille=max(taille, 1),
+        )
+        return reponse({'results': transactions, 'suivant': suivant})
+
+
+@method_decorator(lecture_replica, name='dispatch')
+class AsyncSoldeApi(AsyncLoginRequiredView):
+    api = True
+
+    @method_decorator(condition(etag_func=etag_utilisateur))
+    async def get(self, request):
+        user = request.user
+        return reponse({
+            'solde': user.balance,
+            'initial_balance': user.initial_balance,
+            'derniere_operation': user.derniere_operation,
+        })
+
+
+@method_decorator(lecture_replica, name='dispatch')
+class AsyncResumeApi(AsyncLoginRequiredView):
+    api = True
+
+    @method_decorator(condition(etag_func=etag_utilisateur))
+    async def get(self, request):
+        user = request.user
+        return reponse({
+            'solde': user.balance,
+            'totaux': await aresume_utilisateur(user),
+            'par_compte': await atotaux_par_compte(user),
+        })
+
+
+@method_decorator(lecture_replica, name='dispatch')
+class AsyncCompteListApi(AsyncLoginRequiredView):
+    api = True
+
+    async def get(self, request):
+        comptes = [c async for c in Compte.objects.filter(user=request.user).values(*CHAMPS_COMPTE)]
+        return reponse({'results': comptes})
+
+
+class EvenementsView(AsyncLoginRequiredView):
+    """
+    Flux Server-Sent Events de l'utilisateur : 'solde' à l'ouverture puis à chaque écriture,
+    'transaction' pour chaque nouvelle transaction. Remplace le rechargement de la page.
+    """
+
+    async def get(self, request):
+        # 🔹 Sous WSGI, un flux infini bloquerait un thread : 204 indique à EventSource
+        # de ne pas se reconnecter
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+
+        user = request.user
+        abonnement = evenements.broker().abonner(user.pk)
+
+        async def flux():
+            try:
+                yield "retry: 5000\n\n"
+                yield evenements.format_sse('solde', {
+                    'solde': user.balance, 'derniere_operation': user.derniere_operation,
+                })
+                while True:
+                    try:
+                        type_evenement, donnees = await asyncio.wait_for(
+                            abonnement.recevoir(), settings.FINANCE_SSE_HEARTBEAT
+                        )
+                    except asyncio.TimeoutError:
+                        # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                        yield ": ping\n\n"
+                        continue
+                    yield evenements.format_sse(type_evenement, donnees)
+            finally:
+                abonnement.fermer()
+
+        response = StreamingHttpResponse(flux(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # pas de mise en tampon par nginx
+        return response
@@ -6,6 +6,7 @@ from django.contrib.auth import authenticate, login, logout
 from finance.models import Utilisateur,Compte
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from finance.services import limitation
 
 Utilisateur = get_user_model()
 
@@ -78,13 +79,22 @@ class LoginView(View):
             messages.error(request, "Veuillez remplir tous les champs.")
             return render(request, self.template_name)
 
+        # 🔹 Limitation des tentatives, vérifiée avant de hacher le mot de passe
+        phone_number = phone_number.strip()
+        ip = limitation.adresse_client(request)
+        if not limitation.tentative_autorisee(phone_number, ip):
+            messages.error(request, "Trop de tentatives de connexion. Réessayez dans quelques minutes.")
+            return render(request, self.template_name, status=429)
+
         # Authentification
         user = authenticate(request, phone_number=phone_number, password=password)
         if user is not None:
+            limitation.connexion_reussie(phone_number)
             login(request, user)  # Connexion de l'utilisateur
             messages.success(request, f"Bienvenue {user.first_name} !")
             return redirect('index')  # Redirige vers la page d'accueil ou dashboard
         else:
+            limitation.connexion_echouee(ip)
             messages.error(request, "Numéro de téléphone ou mot de passe incorrect.")
    
         return render(request, self.template_name)
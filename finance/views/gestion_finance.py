@@ -1,75 +1,132 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import render,  redirect
+from django.utils import timezone
 from django.views import View
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate, login, logout
 from finance.models import *
+from finance.routers import lecture_replica
+from finance.services.aggregations import resume_utilisateur, totaux_par_compte
+from finance.services.analytique import depenses_par_categorie, revenus_depenses_par_mois
+from finance.services.cache import tableau_de_bord
+from finance.services.export import FORMATS, transactions_a_exporter
+from finance.services.importation import ErreurImport, importer_transactions, lire_csv
+from finance.services.pagination import page_par_curseur
+from finance.services.recherche import filtrer_transactions, lire_date, parametres_de_recherche
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 
 Utilisateur = get_user_model()
 
 
-
+@method_decorator(lecture_replica, name='dispatch')
 class IndexView(View):
     template=  'global_data/index.html'
     def get(self, request):
         user = request.user
 
-        # Récupérer toutes les transactions de l'utilisateur
-        transactions = user.transactions.all().order_by('-date')
-
-        # Calculer le solde en partant du solde initial
-        solde = getattr(user, 'initial_balance', 0)
-        for t in transactions:
-            if t.type_transaction == 'REVENU':
-                solde += t.montant
-            elif t.type_transaction == 'DEPENSE':
-                solde -= t.montant
-            # ECHEC ou autre type, tu peux ajouter une règle spécifique
-            elif t.type_transaction == 'ECHEC':
-                solde -= t.montant  # si tu considères l'épargne comme un "débit"
+        # Résumé en cache par utilisateur (solde, dernières transactions, totaux par compte),
+        # invalidé à chaque écriture de transaction
+        resume = tableau_de_bord(user)
 
         return render(request, self.template, {
             'user': user,
-            'transaction': transactions,
-            'solde': solde
+            'transaction': resume['transactions'],
+            'solde': resume['solde'],
+            'par_compte': resume['par_compte'],
+            # Solde en direct (SSE) seulement sous ASGI
+            'flux_direct': isinstance(request, ASGIRequest)
         })
 
 
+@method_decorator(lecture_replica, name='dispatch')
 class TransactionView(View):
     template= 'global_data/transaction.html'
     def get(self, request):
         user = request.user
 
-        # Récupérer toutes les transactions de l'utilisateur
-        transactions = user.transactions.all().order_by('-date')
+        # Une page de l'historique, à partir du curseur ?avant=..., avec les filtres de recherche
+        curseur = request.GET.get('avant')
+        transactions, curseur_suivant = page_par_curseur(
+            filtrer_transactions(user.transactions.active(), request.GET), curseur
+        )
 
-        # Calculer le solde en partant du solde initial
-        solde = getattr(user, 'initial_balance', 0)
-        for t in transactions:
-            if t.type_transaction == 'REVENU':
-                solde += t.montant
-            elif t.type_transaction == 'DEPENSE':
-                solde -= t.montant
-            # ECHEC ou autre type, tu peux ajouter une règle spécifique
-            elif t.type_transaction == 'ECHEC':
-                solde -= t.montant  # si tu considères l'épargne comme un "débit"
+        # Solde maintenu par Transaction.save(), plus besoin de parcourir l'historique
+        solde = user.balance
 
         return render(request, self.template, {
             'user': user,
             'transaction': transactions,
-            'solde': solde
+            'solde': solde,
+            'curseur': curseur,
+            'curseur_suivant': curseur_suivant,
+            'recherche': request.GET,
+            'filtres': parametres_de_recherche(request.GET),
+            'types': Transaction.TYPE_TRANSACTION,
+            'categories': Transaction.CATEGORIES,
+            'comptes': Transaction.COMPTES
         })
 
 
 
 
 
+@method_decorator(login_required, name='dispatch')
 class AccountView(View):
     template= 'global_data/account.html'
     def get(self, request):
-        return render(request,self.template )
+        user = request.user
+
+        # Deux requêtes agrégées, quel que soit le nombre de transactions
+        resume = resume_utilisateur(user)
+        par_compte = totaux_par_compte(user)
+        # Portefeuilles liés avec leur solde maintenu : une seule requête
+        portefeuilles = list(user.linked_accounts.order_by('type_compte', 'label'))
+
+        return render(request, self.template, {
+            'user': user,
+            'solde': user.balance,
+            'resume': resume,
+            'par_compte': par_compte,
+            'portefeuilles': portefeuilles,
+            'patrimoine': user.balance + resume['epargne']
+        })
+
+
+@method_decorator(login_required, name='dispatch')
+class VirementView(View):
+    def post(self, request):
+        try:
+            montant = Decimal(request.POST.get('montant', 0))
+            source = int(request.POST.get('source'))
+            destination = int(request.POST.get('destination'))
+        except (InvalidOperation, TypeError, ValueError):
+            messages.error(request, "Virement invalide.")
+            return redirect('account')
+        if not montant.is_finite() or montant <= 0:
+            messages.error(request, "Le montant doit être un nombre positif.")
+            return redirect('account')
+
+        # 🔹 Les deux portefeuilles doivent appartenir à l'utilisateur connecté
+        if request.user.linked_accounts.filter(pk__in=[source, destination]).count() != 2:
+            messages.error(request, "Portefeuille introuvable.")
+            return redirect('account')
+
+        try:
+            Compte.objects.transferer(source, destination, montant, request.POST.get('description') or None)
+        except SoldeInsuffisant:
+            messages.error(request, "Solde insuffisant sur le portefeuille source.")
+        except ValueError as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(request, f"Virement de {montant} CFA effectué !")
+        return redirect('account')
 
 
 class AddView(View):
@@ -80,36 +137,181 @@ class AddView(View):
     def post(self, request):
         user = request.user
         type_transaction = request.POST.get('type_transaction')
-        montant = float(request.POST.get('montant', 0))
         compte = request.POST.get('compte')
         categorie = request.POST.get('categorie')
         description = request.POST.get('description')
 
-        # Calculer le solde actuel
-        transactions = user.transactions.all()
-        solde = getattr(user, 'initial_balance', 0)
-        for t in transactions:
-            if t.type_transaction == 'REVENU':
-                solde += t.montant
-            elif t.type_transaction == 'DEPENSE':
-                solde -= t.montant
-            elif t.type_transaction == 'ECHEC':
-                solde -= t.montant  # si on considère l'épargne comme un débit
-
-        # Vérifier si le solde est suffisant pour une dépense
-        if type_transaction == 'DEPENSE' and montant > solde:
-            messages.error(request, "Vous n'avez pas assez de solde pour effectuer cette dépense !")
-            return redirect('add')  # ou reste sur le formulaire
+        try:
+            montant = Decimal(request.POST.get('montant', 0))
+        except InvalidOperation:
+            messages.error(request, "Le montant doit être un nombre valide.")
+            return redirect('add')
+        if not montant.is_finite() or montant <= 0:
+            messages.error(request, "Le montant doit être un nombre positif.")
+            return redirect('add')
 
-        # Créer la transaction
-        Transaction.objects.create(
+        # Créer la transaction : l'insertion et la mise à jour du solde se font dans un seul
+        # bloc atomique, la vérification du solde étant portée par l'UPDATE conditionnel
+        # (deux dépenses simultanées ne peuvent pas passer toutes les deux)
+        t = Transaction(
             utilisateur=user,
             type_transaction=type_transaction,
             montant=montant,
             compte=compte,
             categorie=categorie,
-            description=description
+            description=description or None
         )
+        # 🔹 Type, compte et catégorie parmi les choix du modèle, comme pour l'API
+        try:
+            t.full_clean(exclude=['utilisateur'], validate_unique=False)
+        except ValidationError:
+            messages.error(request, "Transaction invalide : vérifiez le type, le compte et la catégorie.")
+            return redirect('add')
+
+        t.portefeuille = Compte.objects.pour_transaction(user, compte)
+        try:
+            # Dépenses et épargne débitent le solde : vérifiées toutes les deux
+            t.save(verifier_solde=t.delta < 0)
+        except SoldeInsuffisant:
+            messages.error(request, "Vous n'avez pas assez de solde pour effectuer cette dépense !")
+            return redirect('add')  # ou reste sur le formulaire
 
         messages.success(request, f"{type_transaction.capitalize()} de {montant} CFA ajouté avec succès !")
-        return redirect('index')
\ No newline at end of file
+
+        # 🔹 Budget : une lecture indexée du cumul du mois (MonthlySummary, déjà à jour), pas de parcours
+        if type_transaction == 'DEPENSE':
+            budget = Budget.objects.depassement(user.pk, categorie, t.date)
+            if budget is not None:
+                messages.warning(
+                    request,
+                    f"Budget « {budget.get_categorie_display()} » dépassé : "
+                    f"{budget.depense} CFA dépensés ce mois-ci pour un plafond de {budget.plafond} CFA."
+                )
+        return redirect('index')
+
+
+@method_decorator(login_required, name='dispatch')
+class ImportView(View):
+    template = 'global_data/import.html'
+
+    def get(self, request):
+        return render(request, self.template)
+
+    def post(self, request):
+        fichier = request.FILES.get('fichier')
+        if not fichier:
+            messages.error(request, "Veuillez choisir un fichier CSV.")
+            return redirect('import')
+
+        # Lecture en flux et insertion par lots, dans un seul bloc atomique
+        try:
+            total = importer_transactions(request.user, lire_csv(fichier.file))
+        except (ErreurImport, UnicodeDecodeError, csv.Error) as e:
+            messages.error(request, f"Import annulé. {e}")
+            return redirect('import')
+
+        messages.success(request, f"{total} transaction(s) importée(s) avec succès !")
+        return redirect('transaction')
+
+
+@method_decorator(login_required, name='dispatch')
+@method_decorator(lecture_replica, name='dispatch')
+class ExportView(View):
+    def get(self, request):
+        format_export = request.GET.get('format', 'csv')
+        if format_export not in FORMATS:
+            format_export = 'csv'
+        generer, content_type = FORMATS[format_export]
+
+        # Filtres facultatifs : ?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ&compte=...&categorie=... (dates invalides ignorées)
+        queryset = transactions_a_exporter(
+            request.user,
+            debut=lire_date(request.GET.get('debut')),
+            fin=lire_date(request.GET.get('fin')),
+            compte=request.GET.get('compte'),
+            categorie=request.GET.get('categorie'),
+        )
+
+        # Réponse en flux : les lignes sont envoyées au fil de la lecture en base, après la
+        # sortie de la vue ; on fige donc ici la base choisie par le routeur (réplica ou non)
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(generer(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{format_export}"'
+        return response
+
+
+@method_decorator(login_required, name='dispatch')
+@method_decorator(lecture_replica, name='dispatch')
+class AnalyticsView(View):
+    template = 'global_data/analytics.html'
+    # Nombre de mois affichés
+    periode = 12
+
+    def get(self, request):
+        user = request.user
+
+        # Premier jour du mois, `periode - 1` mois en arrière
+        mois = debut_du_mois(timezone.now())
+        annee, numero = divmod(mois.year * 12 + mois.month - 1 - (self.periode - 1), 12)
+        depuis = mois.replace(year=annee, month=numero + 1)
+
+        # Lu depuis les cumuls mensuels : O(mois), pas O(transactions)
+        par_mois = revenus_depenses_par_mois(user, depuis)
+        par_categorie = depenses_par_categorie(user, depuis)
+
+        # Échelle commune des barres (en %)
+        maximum = max([max(m['REVENU'], m['DEPENSE']) for m in par_mois] + [1])
+        for m in par_mois:
+            m['revenu_pct'] = int(m['REVENU'] * 100 / maximum)
+            m['depense_pct'] = int(m['DEPENSE'] * 100 / maximum)
+        total_depenses = sum(total for _, _, total in par_categorie) or 1
+        categories = [
+            {'code': code, 'libelle': libelle, 'total': total, 'pct': int(total * 100 / total_depenses)}
+            for code, libelle, total in par_categorie
+        ]
+
+        return render(request, self.template, {
+            'user': user,
+            'par_mois': par_mois,
+            'categories': categories,
+        })
+
+
+@method_decorator(login_required, name='dispatch')
+class BudgetView(View):
+    template = 'global_data/budgets.html'
+
+    def get(self, request):
+        user = request.user
+        # Une requête : budgets annotés des dépenses du mois en cours
+        budgets = list(Budget.objects.avec_depense(debut_du_mois(timezone.now())).filter(utilisateur=user))
+        for budget in budgets:
+            budget.pct = min(int(budget.depense * 100 / budget.plafond), 100) if budget.plafond else 100
+        return render(request, self.template, {
+            'user': user,
+            'budgets': budgets,
+            'categories': Transaction.CATEGORIES_SAISIE,
+        })
+
+    def post(self, request):
+        categorie = request.POST.get('categorie')
+        if categorie not in dict(Transaction.CATEGORIES_SAISIE):
+            messages.error(request, "Catégorie invalide.")
+            return redirect('budgets')
+        # Nombre fini tenant dans le champ plafond (12 chiffres, 2 décimales)
+        try:
+            plafond = Budget._meta.get_field('plafond').clean(request.POST.get('plafond') or 0, None)
+        except ValidationError:
+            messages.error(request, "Le plafond doit être un nombre valide.")
+            return redirect('budgets')
+
+        # Plafond vide ou nul : suppression du budget
+        if plafond <= 0:
+            Budget.objects.filter(utilisateur=request.user, categorie=categorie).delete()
+            messages.success(request, "Budget supprimé.")
+        else:
+            Budget.objects.update_or_create(
+                utilisateur=request.user, categorie=categorie, defaults={'plafond': plafond}
+            )
+            messages.success(request, "Budget enregistré !")
+        return redirect('budgets')
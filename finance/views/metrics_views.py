@@ -0,0 +1,28 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from finance.services.metriques import format_prometheus
+
+
+def jeton_valide(request):
+    """En-tête « Authorization: Bearer <FINANCE_METRICS_TOKEN> » (désactivé si le jeton est vide)."""
+    jeton = settings.FINANCE_METRICS_TOKEN
+    if not jeton:
+        return False
+    schema, _, valeur = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return schema.lower() == 'bearer' and hmac.compare_digest(valeur.strip().encode(), jeton.encode())
+
+
+class MetricsView(View):
+    """
+    Compteurs au format texte Prometheus ; réservé au staff et aux collecteurs munis du jeton.
+    Pas de confiance dans l'adresse du pair : derrière un proxy local, tout vient de 127.0.0.1.
+    """
+
+    def get(self, request):
+        if not (request.user.is_staff or jeton_valide(request)):
+            return HttpResponseForbidden()
+        return HttpResponse(format_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
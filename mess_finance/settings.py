@@ -55,6 +55,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in per-request instrumentation (wall time, SQL count/time, N+1 detection),
+# exposed at /metrics/ in Prometheus text format. Placed first so middleware queries count too.
+FINANCE_INSTRUMENTATION = config('FINANCE_INSTRUMENTATION', default=False, cast=bool)
+FINANCE_N_PLUS_ONE_THRESHOLD = config('FINANCE_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+# /metrics/ is served to staff users, and to scrapers sending "Authorization: Bearer <token>"
+# when METRICS_TOKEN is set (e.g. Prometheus `authorization.credentials`).
+FINANCE_METRICS_TOKEN = config('METRICS_TOKEN', default='')
+if FINANCE_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'finance.middleware.InstrumentationMiddleware')
+
 ROOT_URLCONF = 'mess_finance.urls'
 
 TEMPLATES = [
@@ -78,6 +88,10 @@ WSGI_APPLICATION = 'mess_finance.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Persistent connections: keep each connection open DB_CONN_MAX_AGE seconds (0 = close
+# at the end of every request, -1 = unlimited) and ping it before reuse with health checks.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0, cast=int)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -86,9 +100,87 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE if DB_CONN_MAX_AGE >= 0 else None,
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=False, cast=bool),
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=10, cast=int),
+        },
+    }
+}
+
+# psycopg 3 native connection pool (requires psycopg[pool]). Pooling replaces persistent
+# connections: Django refuses CONN_MAX_AGE != 0 together with a pool, so it is reset here.
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        'max_idle': config('DB_POOL_MAX_IDLE', default=600, cast=float),
+        'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=3600, cast=float),
+    }
+
+# Optional read replica (e.g. a streaming standby, or a second local database for testing).
+# Views decorated with finance.routers.lecture_replica (dashboard, history, analytics, exports,
+# read API) read from it on GET; a user's reads stay on the primary for
+# FINANCE_READ_YOUR_WRITES seconds after each of their writes. Tests mirror it to 'default'.
+FINANCE_REPLICA_ALIAS = None
+if config('DB_REPLICA_HOST', default=''):
+    FINANCE_REPLICA_ALIAS = 'replica'
+    DATABASES[FINANCE_REPLICA_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST'),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['finance.routers.ReplicaRouter']
+FINANCE_READ_YOUR_WRITES = config('READ_YOUR_WRITES_WINDOW', default=10, cast=int)
+
+# Optional monthly range partitioning of the transaction table (PostgreSQL only), applied by
+# migration 0015 when enabled beforehand, otherwise by `maintain_partitions --convert`.
+# Run `maintain_partitions` regularly (e.g. daily) to create upcoming months.
+FINANCE_TRANSACTION_PARTITIONING = config('TRANSACTION_PARTITIONING', default=False, cast=bool)
+
+# Cold archive: `archive_transactions` moves transactions older than the retention window
+# (whole months) to read-only gzip JSON Lines files in FINANCE_ARCHIVE_DIR.
+FINANCE_ARCHIVE_DIR = Path(config('ARCHIVE_DIR', default=str(BASE_DIR / 'archives')))
+FINANCE_ARCHIVE_RETENTION_MONTHS = config('ARCHIVE_RETENTION_MONTHS', default=24, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# LocMem by default; set CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://127.0.0.1:6379/1 to share the cache between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='flowfunds'),
     }
 }
 
+# Lifetime (seconds) of the cached per-user dashboard summary
+FINANCE_CACHE_TIMEOUT = config('FINANCE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Pub/sub behind the live balance stream (/async/events/). The in-memory broker only
+# reaches clients connected to the same process.
+FINANCE_EVENT_BROKER = config('FINANCE_EVENT_BROKER', default='finance.services.evenements.MemoireBroker')
+FINANCE_SSE_HEARTBEAT = config('FINANCE_SSE_HEARTBEAT', default=15, cast=int)
+
+# Sessions
+# https://docs.djangoproject.com/en/6.0/topics/http/sessions/
+# Set SESSION_ENGINE=django.contrib.sessions.backends.cached_db (or .cache with a shared
+# cache such as Redis, or .signed_cookies) to skip the per-request session query.
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
+
+# request.user is loaded through the cache instead of one query per request;
+# entries are dropped whenever the user row or its balance changes.
+AUTHENTICATION_BACKENDS = ['finance.backends.CachedModelBackend']
+FINANCE_USER_CACHE_TIMEOUT = config('FINANCE_USER_CACHE_TIMEOUT', default=300, cast=int)
 
 
 # Password validation
@@ -109,6 +201,36 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# https://docs.djangoproject.com/en/6.0/topics/auth/passwords/
+# PASSWORD_HASHER picks the preferred algorithm (pbkdf2, scrypt or argon2; argon2 needs
+# argon2-cffi). Existing hashes keep working and are upgraded on the next successful login,
+# which also happens when one of the cost settings below changes (0 = Django default).
+
+FINANCE_PASSWORD_HASHERS = {
+    'argon2': 'finance.hashers.Argon2PasswordHasher',
+    'scrypt': 'finance.hashers.ScryptPasswordHasher',
+    'pbkdf2': 'finance.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+PASSWORD_HASHERS = [FINANCE_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in FINANCE_PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+FINANCE_PBKDF2_ITERATIONS = config('PBKDF2_ITERATIONS', default=0, cast=int)
+FINANCE_SCRYPT_WORK_FACTOR = config('SCRYPT_WORK_FACTOR', default=0, cast=int)
+FINANCE_ARGON2_TIME_COST = config('ARGON2_TIME_COST', default=0, cast=int)
+FINANCE_ARGON2_MEMORY_COST = config('ARGON2_MEMORY_COST', default=0, cast=int)
+FINANCE_ARGON2_PARALLELISM = config('ARGON2_PARALLELISM', default=0, cast=int)
+
+# Login throttling: sliding window (seconds), max attempts per phone number and max failed
+# attempts per IP, checked before the password is hashed. Behind reverse proxies, set
+# LOGIN_TRUSTED_PROXIES to their number so the client IP is read from X-Forwarded-For.
+FINANCE_LOGIN_WINDOW = config('LOGIN_WINDOW', default=300, cast=int)
+FINANCE_LOGIN_MAX_PER_PHONE = config('LOGIN_MAX_PER_PHONE', default=5, cast=int)
+FINANCE_LOGIN_MAX_PER_IP = config('LOGIN_MAX_PER_IP', default=30, cast=int)
+FINANCE_LOGIN_TRUSTED_PROXIES = config('LOGIN_TRUSTED_PROXIES', default=0, cast=int)
+
 
 AUTH_USER_MODEL = "finance.Utilisateur"
 
@@ -4,13 +4,34 @@ from django.urls import path
 
 from finance.views.auth_views import *
 from finance.views.gestion_finance import *
+from finance.views.api_views import *
+from finance.views.async_views import *
+from finance.views.metrics_views import *
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', IndexView.as_view(), name="index"),
     path('transaction/', TransactionView.as_view(), name="transaction"),
     path('profile/', ProfileView.as_view(), name="profile"),
     path('account/', AccountView.as_view(), name="account"),
+    path('account/transfer/', VirementView.as_view(), name="virement"),
     path('add/', AddView.as_view(), name="add"),
+    path('import/', ImportView.as_view(), name="import"),
+    path('export/', ExportView.as_view(), name="export"),
+    path('budgets/', BudgetView.as_view(), name="budgets"),
+    path('analytics/', AnalyticsView.as_view(), name="analytics"),
+    path('api/transactions/', TransactionListApi.as_view(), name="api_transactions"),
+    path('api/comptes/', CompteListApi.as_view(), name="api_comptes"),
+    path('api/solde/', SoldeApi.as_view(), name="api_solde"),
+    path('api/resume/', ResumeApi.as_view(), name="api_resume"),
+    # Versions ASGI (uvicorn mess_finance.asgi:application)
+    path('async/', AsyncIndexView.as_view(), name="async_index"),
+    path('async/transaction/', AsyncTransactionView.as_view(), name="async_transaction"),
+    path('async/api/transactions/', AsyncTransactionListApi.as_view(), name="async_api_transactions"),
+    path('async/api/comptes/', AsyncCompteListApi.as_view(), name="async_api_comptes"),
+    path('async/api/solde/', AsyncSoldeApi.as_view(), name="async_api_solde"),
+    path('async/api/resume/', AsyncResumeApi.as_view(), name="async_api_resume"),
+    path('async/events/', EvenementsView.as_view(), name="evenements"),
+    path('metrics/', MetricsView.as_view(), name="metrics"),
     path('login/', LoginView.as_view(), name='login'),
     path('register/', RegisterView.as_view(), name='register'),
     path('logout/', LogoutView.as_view(), name='logout')